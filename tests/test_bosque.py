@@ -0,0 +1,96 @@
+"""
+Bosque compacto: mismas predicciones que el Random Forest de scikit-learn
+"""
+
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.ensemble import RandomForestRegressor
+
+from valoracion import bosque as modulo_bosque
+from valoracion.bosque import BosqueCompacto, predecir_por_arbol
+from valoracion.codificador import asignar_nombres, predecir, predecir_intervalo
+from valoracion.compresion import a_float32
+
+
+def _datos(n, semilla):
+    # Como las filas codificadas: numéricas llenas y dummies casi todas en cero
+    rng = np.random.default_rng(semilla)
+    numericas = np.column_stack([rng.uniform(30, 300, n), rng.integers(1, 6, n), rng.uniform(3, 11, n)])
+    dummies = np.zeros((n, 12))
+    dummies[np.arange(n), rng.integers(0, 12, n)] = 1.0
+    X = np.hstack([numericas, dummies])
+    y = X[:, 0] * 3e6 * (1 + X[:, 3:].argmax(axis=1) / 10) + rng.normal(0, 1e7, n)
+    return X, y
+
+
+@pytest.fixture(scope='module')
+def rf():
+    X, y = _datos(300, 0)
+    modelo = RandomForestRegressor(n_estimators=8, max_depth=8, random_state=0).fit(X, y)
+    return asignar_nombres(modelo, [f'x{i}' for i in range(X.shape[1])])
+
+
+@pytest.fixture
+def compacto(rf, tmp_path):
+    directorio = str(tmp_path / 'modelo.arboles')
+    BosqueCompacto.desde_sklearn(rf).guardar(directorio)
+    return BosqueCompacto.cargar(directorio, mmap=True)
+
+
+def test_cargado_con_mmap_predice_igual(rf, compacto):
+    assert isinstance(compacto.valor, np.memmap)
+    assert list(compacto.feature_names_in_) == list(rf.feature_names_in_)
+
+    X, _ = _datos(200, 1)
+    esperado = predecir(rf, X)
+    np.testing.assert_allclose(compacto.predict(X), esperado)
+    np.testing.assert_allclose(compacto.predict(sparse.csr_matrix(X)), esperado)
+    np.testing.assert_allclose(compacto.predict(X[:1]), esperado[:1])
+
+
+def test_float32_mismas_decisiones(rf, compacto, tmp_path):
+    directorio = str(tmp_path / 'modelo-f32.arboles')
+    a_float32(compacto).guardar(directorio)
+    f32 = BosqueCompacto.cargar(directorio)
+    assert f32.umbral.dtype == np.float32 and f32.valor.dtype == np.float32
+
+    X, _ = _datos(200, 2)
+    np.testing.assert_array_equal(f32._hojas(X.astype(np.float32)), compacto._hojas(X.astype(np.float32)))
+    np.testing.assert_allclose(f32.predict(sparse.csr_matrix(X)), predecir(rf, X), rtol=1e-6)
+
+
+@pytest.mark.parametrize('modelo', ['rf', 'compacto'])
+def test_intervalo_promedio_igual_a_predict(request, modelo):
+    modelo = request.getfixturevalue(modelo)
+    X, _ = _datos(100, 3)
+    prediccion, limites = predecir_intervalo(modelo, sparse.csr_matrix(X))
+    np.testing.assert_allclose(prediccion, predecir(modelo, X))
+    assert limites.shape == (100, 2)
+    assert np.all(limites[:, 0] <= limites[:, 1])
+
+
+def test_bloques_grandes_con_scikit_learn(rf, monkeypatch):
+    X, _ = _datos(100, 4)
+    X = sparse.csr_matrix(X)
+    compacto = predecir_por_arbol(rf, X)
+    monkeypatch.setattr(modulo_bosque, 'FILAS_SKLEARN', 10)
+    np.testing.assert_allclose(predecir_por_arbol(rf, X), compacto)
+
+
+def test_aplanado_se_renueva_al_crecer_el_bosque():
+    from valoracion.bosque import bosque_de
+    from valoracion.reentrenamiento import crecer_bosque
+
+    X, y = _datos(300, 5)
+    nombres = [f'x{i}' for i in range(X.shape[1])]
+    modelo = asignar_nombres(RandomForestRegressor(n_estimators=6, max_depth=6, random_state=0).fit(X, y), nombres)
+    anterior = bosque_de(modelo)
+    assert bosque_de(modelo) is anterior
+
+    # Mismo número de árboles después de descartar los más antiguos
+    nuevos_X, nuevos_y = _datos(300, 6)
+    asignar_nombres(crecer_bosque(modelo, nuevos_X, nuevos_y * 2, arboles_nuevos=3, max_arboles=6, trabajadores=1),
+                    nombres)
+    assert len(modelo.estimators_) == anterior.n_estimators
+    np.testing.assert_allclose(bosque_de(modelo).predict(X), predecir(modelo, X))
@@ -0,0 +1,88 @@
+"""
+Codificador One-Hot: mismas columnas y valores que pd.get_dummies alineado con el modelo
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from valoracion.codificador import CodificadorOneHot
+
+
+NUMERICAS = ['area', 'habitaciones', 'banos', 'latitud', 'longitud', 'precio_m2']
+CATEGORICAS = ['ciudad', 'tipo_propiedad', 'categoria_tamano']
+
+
+def _entrenamiento():
+    rng = np.random.default_rng(0)
+    n = 60
+    return pd.DataFrame({
+        'area': rng.uniform(30, 300, n).round(1),
+        'habitaciones': rng.integers(1, 6, n).astype(float),
+        'banos': rng.integers(0, 4, n).astype(float),
+        'latitud': rng.uniform(3, 11, n),
+        'longitud': rng.uniform(-77, -73, n),
+        'precio_m2': rng.uniform(2e6, 6e6, n),
+        'ciudad': rng.choice(['Bogotá D.C', 'Cali', 'Medellín', 'Pereira'], n),
+        'tipo_propiedad': rng.choice(['Apartamento', 'Casa', 'Lote'], n),
+        'categoria_tamano': rng.choice(['Grande', 'Mediana', 'Pequeña'], n),
+    })
+
+
+def _nuevas():
+    # Categoría base de drop_first (Bogotá D.C, Apartamento), una nunca vista (Pasto, Finca),
+    # un valor faltante y sin la columna categoria_tamano
+    return pd.DataFrame({
+        'area': [85.0, 120.0, 40.0, 300.0],
+        'habitaciones': [3.0, 4.0, 1.0, 5.0],
+        'banos': [2.0, 3.0, 0.0, 4.0],
+        'latitud': [4.6, 6.2, 1.2, 3.4],
+        'longitud': [-74.1, -75.6, -77.3, -76.5],
+        'precio_m2': [4e6, 5e6, 2e6, 3e6],
+        'ciudad': ['Bogotá D.C', 'Medellín', 'Pasto', None],
+        'tipo_propiedad': ['Apartamento', 'Casa', 'Finca', 'Lote'],
+    })
+
+
+def _referencia(df, nombres):
+    """pd.get_dummies de las columnas presentes, alineado con las del modelo (faltantes en cero)"""
+    categoricas = [col for col in CATEGORICAS if col in df.columns]
+    dummies = pd.get_dummies(df[NUMERICAS + categoricas], columns=categoricas)
+    return dummies.reindex(columns=nombres, fill_value=0).to_numpy(dtype=np.float64)
+
+
+@pytest.fixture
+def codificador_y_nombres():
+    entrenamiento = _entrenamiento()
+    nombres = list(pd.get_dummies(entrenamiento[NUMERICAS + CATEGORICAS], columns=CATEGORICAS,
+                                  drop_first=True).columns)
+    return CodificadorOneHot(nombres, CATEGORICAS), nombres
+
+
+def test_desde_dataframe_tiene_las_columnas_de_get_dummies(codificador_y_nombres):
+    _, nombres = codificador_y_nombres
+    assert CodificadorOneHot.desde_dataframe(_entrenamiento(), NUMERICAS, CATEGORICAS).feature_names == nombres
+
+
+def test_entrenamiento_igual_a_get_dummies(codificador_y_nombres):
+    codificador, nombres = codificador_y_nombres
+    entrenamiento = _entrenamiento()
+    esperado = pd.get_dummies(entrenamiento[NUMERICAS + CATEGORICAS], columns=CATEGORICAS,
+                              drop_first=True).to_numpy(dtype=np.float64)
+    np.testing.assert_array_equal(codificador.transformar_lote(entrenamiento), esperado)
+    np.testing.assert_array_equal(codificador.transformar_lote(entrenamiento, disperso=True).toarray(), esperado)
+
+
+def test_nuevas_igual_a_get_dummies_alineado(codificador_y_nombres):
+    codificador, nombres = codificador_y_nombres
+    nuevas = _nuevas()
+    esperado = _referencia(nuevas, nombres)
+
+    np.testing.assert_array_equal(codificador.transformar_lote(nuevas), esperado)
+    dispersa = codificador.transformar_lote(nuevas, disperso=True)
+    np.testing.assert_array_equal(dispersa.toarray(), esperado)
+    # Sin ceros guardados: solo los numéricos distintos de cero y una entrada por categoría con columna
+    assert dispersa.nnz == np.count_nonzero(esperado)
+
+    for i, propiedad in enumerate(nuevas.to_dict('records')):
+        np.testing.assert_array_equal(codificador.transformar(propiedad), esperado[i:i + 1])
@@ -0,0 +1,21 @@
+"""
+Valoración por lotes: las filas con nombres no reconocidos quedan marcadas
+"""
+
+import pandas as pd
+
+from valoracion.caracteristicas import derivar_caracteristicas
+from valoracion.estadisticas import EstadisticasMercado
+from valoracion.lote import advertencias
+
+
+def test_advertencia_por_nombre_no_reconocido():
+    estadisticas = EstadisticasMercado.por_defecto()
+    lote = pd.DataFrame({
+        'area': [85.0] * 5, 'habitaciones': [3.0] * 5, 'banos': [2.0] * 5,
+        'ciudad': ['medellin', 'Zzyzx', 'Cali', 'qqqq', None],
+        'tipo_propiedad': ['apartamento', 'Casa', 'Castillo', 'wwww', 'Casa'],
+    })
+    derivado = derivar_caracteristicas(lote, estadisticas)
+    assert list(advertencias(derivado, estadisticas)) == [
+        '', 'ciudad no reconocida', 'tipo no reconocido', 'ciudad y tipo no reconocidos', 'ciudad no reconocida']
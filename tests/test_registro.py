@@ -0,0 +1,58 @@
+"""
+Registro de modelos: cada versión publicada conserva su propio archivo
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from valoracion.entrenamiento import guardar_modelo
+from valoracion.registro import RegistroModelos, activar, leer_registro, ruta_registro
+
+
+def _bosque(semilla):
+    rng = np.random.default_rng(semilla)
+    X = pd.DataFrame({'area': rng.uniform(30, 300, 200), 'habitaciones': rng.integers(1, 6, 200)})
+    y = X['area'] * 3e6 * (1 + semilla)
+    return RandomForestRegressor(n_estimators=5, random_state=semilla).fit(X, y)
+
+
+def _registro(ruta_modelo, directorio):
+    # Estadísticas inexistentes: se usan las de por defecto
+    return RegistroModelos.para_modelo(ruta_modelo, ruta_estadisticas=str(directorio / 'no.json'),
+                                       ruta_dataset=str(directorio / 'no.csv'))
+
+
+@pytest.mark.parametrize('exportar', [True, False])
+def test_registrar_dos_veces_y_volver_a_v1(tmp_path, exportar):
+    ruta = str(tmp_path / 'random_forest_model.pkl')
+    v1, archivo_v1 = guardar_modelo(_bosque(0), ruta, exportar=exportar)
+    v2, archivo_v2 = guardar_modelo(_bosque(1), ruta, exportar=exportar)
+
+    assert (v1, v2) == (1, 2)
+    assert archivo_v1 != archivo_v2
+    assert os.path.exists(archivo_v1) and os.path.exists(archivo_v2)
+
+    X = pd.DataFrame({'area': [100.0], 'habitaciones': [3.0]})
+    assert _registro(ruta, tmp_path).actual().modelo.predict(X)[0] == pytest.approx(6e8, rel=0.2)
+
+    activar(1, ruta=ruta_registro(ruta))
+    cargado = _registro(ruta, tmp_path).actual()
+    assert cargado.version.version == 1
+    assert cargado.modelo.predict(X)[0] == pytest.approx(3e8, rel=0.2)
+
+
+def test_compacto_modificado_no_se_sirve(tmp_path):
+    ruta = str(tmp_path / 'random_forest_model.pkl')
+    _, archivo = guardar_modelo(_bosque(0), ruta)
+    datos = leer_registro(ruta_registro(ruta))['modelos']['random_forest_model']['versiones']['1']
+    assert datos['sha256_compacto'] is not None
+
+    # El bosque compacto es lo que se carga: también se verifica su hash
+    valores = os.path.join(os.path.splitext(archivo)[0] + '.arboles', 'valor.npy')
+    np.save(valores, np.zeros_like(np.load(valores)))
+    with pytest.raises(ValueError, match='no coincide'):
+        _registro(ruta, tmp_path).actual()
@@ -0,0 +1,39 @@
+"""
+Servicio: validación de las propiedades recibidas antes de entrar a un lote
+"""
+
+import pytest
+
+from valoracion.estadisticas import EstadisticasMercado
+from valoracion.servicio import PropiedadInvalida, validar_propiedad
+
+
+BASE = {'area': 85, 'habitaciones': 3, 'banos': 2, 'ciudad': 'medellin', 'tipo_propiedad': 'apartamento'}
+
+
+def test_nombres_se_resuelven_como_en_el_chatbot():
+    limpia = validar_propiedad(BASE, EstadisticasMercado.por_defecto())
+    assert limpia['ciudad'] == 'Medellín'
+    assert limpia['tipo_propiedad'] == 'Apartamento'
+    assert limpia['area'] == 85.0
+
+
+@pytest.mark.parametrize('campo, valor, sugerencia', [
+    ('ciudad', 'Medelin', 'Medellín'),
+    ('tipo_propiedad', 'Castillo', 'Casa'),
+])
+def test_nombre_desconocido_se_rechaza_con_sugerencias(campo, valor, sugerencia):
+    with pytest.raises(PropiedadInvalida, match=valor) as error:
+        validar_propiedad({**BASE, campo: valor}, EstadisticasMercado.por_defecto())
+    assert sugerencia in error.value.sugerencias
+
+
+def test_ciudad_sin_parecidos_se_rechaza():
+    with pytest.raises(PropiedadInvalida):
+        validar_propiedad({**BASE, 'ciudad': 'zzzz'}, EstadisticasMercado.por_defecto())
+
+
+@pytest.mark.parametrize('cambio', [{'area': -5}, {'banos': True}, {'latitud': 40.0}, {'ciudad': ''}])
+def test_campos_fuera_de_rango(cambio):
+    with pytest.raises(ValueError):
+        validar_propiedad({**BASE, **cambio})
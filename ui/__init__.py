@@ -1,9 +1,30 @@
 """
 Sales-Predictor UI Package
 Interfaz gráfica para el sistema de valoración inmobiliaria
+
+PyQt5 solo se importa al usar ChatbotWindow o main; PredictorBot viene de
+valoracion.conversacion y no lo necesita.
 """
 
-from .app_chatbot import ChatbotWindow, PredictorBot, main
+import importlib
+
+_EXPORTACIONES = {
+    'ChatbotWindow': 'ui.app_chatbot',
+    'main': 'ui.app_chatbot',
+    'PredictorBot': 'valoracion.conversacion',
+}
 
 __all__ = ['ChatbotWindow', 'PredictorBot', 'main']
-__version__ = '1.0.0'
\ No newline at end of file
+__version__ = '1.0.0'
+
+
+def __getattr__(nombre):
+    if nombre not in _EXPORTACIONES:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(_EXPORTACIONES[nombre]), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,39 @@
+"""
+Sales-Predictor Valoración Package
+Lógica de predicción sin dependencias de interfaz gráfica
+
+Los submódulos se importan al usar cada nombre por primera vez, así que
+`import valoracion` no carga pandas, NumPy ni scikit-learn por sí solo.
+"""
+
+import importlib
+
+# Nombre público -> submódulo que lo define
+_EXPORTACIONES = {
+    'BosqueCompacto': '.bosque', 'cargar_modelo': '.bosque', 'exportar_modelo': '.bosque',
+    'CachePredicciones': '.cache', 'huella_modelo': '.cache', 'huella_valoracion': '.cache',
+    'CodificadorOneHot': '.codificador', 'predecir': '.codificador', 'predecir_intervalo': '.codificador',
+    'COLUMNAS_NUMERICAS': '.codificador', 'COLUMNAS_CATEGORICAS': '.codificador',
+    'cargar_dataset': '.columnar', 'cargar_columnar': '.columnar', 'guardar_columnar': '.columnar',
+    'IndiceComparables': '.comparables', 'ResumenComparables': '.comparables',
+    'PredictorBot': '.conversacion', 'MotorConversacion': '.conversacion', 'EstadoConversacion': '.conversacion',
+    'IndiceEspacial': '.espacial',
+    'EstadisticasMercado': '.estadisticas', 'cargar_estadisticas': '.estadisticas',
+    'RegistroModelos': '.registro', 'obtener_registro': '.registro',
+    'MotorAsincrono': '.sesiones', 'SesionesChat': '.sesiones',
+}
+
+__all__ = list(_EXPORTACIONES)
+__version__ = '1.0.0'
+
+
+def __getattr__(nombre):
+    if nombre not in _EXPORTACIONES:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(_EXPORTACIONES[nombre], __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
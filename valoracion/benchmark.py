@@ -0,0 +1,497 @@
+"""
+Sales-Predictor - Benchmark de rendimiento
+Mide carga en frío, codificación, predict, intervalos, comparables, consultas espaciales, el chatbot de punta a punta y las sesiones concurrentes
+
+Uso: python -m valoracion.benchmark --tamanos 1 100 10000 1000000 --salida benchmark.json
+     python -m valoracion.benchmark --comparar benchmark_anterior.json
+
+Las propiedades sintéticas se generan remuestreando dataset_limpio.csv
+(ciudad y tipo conjuntos, área con ruido lognormal, coordenadas con ruido).
+Los lotes grandes se procesan en bloques, como el modo por lotes, para
+acotar la memoria. Las mediciones fila a fila se hacen sobre una muestra
+de hasta --max-individual filas y se reportan por fila.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .rutas import RAIZ_PROYECTO, RUTA_MODELO, RUTA_DATASET
+
+
+TAMANOS_DEFECTO = [1, 100, 10_000, 1_000_000]
+TAMANO_BLOQUE = 50_000
+MAX_INDIVIDUAL = 10_000
+MAX_CHATBOT = 200
+MAX_SESIONES = 1000
+REPETICIONES_FRIO = 3
+# Una etapa se marca como regresión si es más lenta que esto respecto al reporte anterior
+UMBRAL_REGRESION = 1.2
+
+RUTA_REPORTE = os.path.join(RAIZ_PROYECTO, 'benchmark.json')
+
+# Se ejecuta en un proceso nuevo para medir el arranque en frío real
+_SCRIPT_FRIO = """
+import json, sys, time
+inicio = time.perf_counter()
+from valoracion import cargar_modelo, cargar_dataset, cargar_estadisticas, IndiceComparables
+importacion = time.perf_counter()
+modelo = cargar_modelo(sys.argv[1])
+t_modelo = time.perf_counter()
+df = cargar_dataset(sys.argv[2])
+t_dataset = time.perf_counter()
+estadisticas = cargar_estadisticas(ruta_dataset=sys.argv[2])
+t_estadisticas = time.perf_counter()
+IndiceComparables.desde_dataframe(df)
+fin = time.perf_counter()
+print(json.dumps({
+    'importacion_s': importacion - inicio,
+    'modelo_s': t_modelo - importacion,
+    'dataset_s': t_dataset - t_modelo,
+    'estadisticas_s': t_estadisticas - t_dataset,
+    'indice_comparables_s': fin - t_estadisticas,
+    'total_s': fin - inicio,
+    'tipo_modelo': type(modelo).__name__,
+}))
+"""
+
+
+# Cada objetivo se importa en un proceso nuevo; 'primera_pregunta' es lo que tarda el chatbot sin
+# interfaz y 'valorar_casa' lo que tarda el script interactivo en hacer su primera pregunta (sin
+# entrada: termina ahí con EOFError), ambos con el modelo medido
+OBJETIVOS_ARRANQUE = {
+    'numpy': 'import numpy',
+    'pandas': 'import pandas',
+    'valoracion': 'import valoracion',
+    'valoracion.conversacion': 'from valoracion.conversacion import PredictorBot',
+    'primera_pregunta': ('from valoracion.conversacion import PredictorBot; '
+                         'from valoracion.registro import obtener_registro; '
+                         'PredictorBot(obtener_registro({ruta_modelo!r})).get_mensaje_bienvenida()'),
+    'ui.app_chatbot': 'import ui.app_chatbot',
+    'valorar_casa': ('import contextlib, functools, io, runpy, sys; import valoracion.registro as r; '
+                     'r.obtener_registro = functools.partial(r.obtener_registro, {ruta_modelo!r}); '
+                     'argv, sys.argv, sys.stdin = sys.argv, ["valorar_casa.py"], io.StringIO()\n'
+                     'with contextlib.redirect_stdout(io.StringIO()), contextlib.suppress(EOFError):\n'
+                     '    runpy.run_path("valorar_casa.py")\n'
+                     'sys.argv = argv'),
+}
+MODULOS_PESADOS = ('numpy', 'pandas', 'sklearn', 'joblib', 'PyQt5')
+
+# La memoria es el pico de RSS del proceso (VmHWM; ru_maxrss hereda el del padre tras fork)
+_SCRIPT_IMPORTACION = """
+import json, sys, time
+inicio = time.perf_counter()
+exec(sys.argv[1])
+segundos = time.perf_counter() - inicio
+try:
+    with open('/proc/self/status') as f:
+        memoria = next(int(l.split()[1]) for l in f if l.startswith('VmHWM')) / 1024
+except OSError:
+    memoria = None
+print(json.dumps({
+    'segundos': segundos,
+    'memoria_mb': memoria,
+    'modulos': [m for m in sys.argv[2:] if m in sys.modules],
+}))
+"""
+
+
+def generar_propiedades(df, n, semilla=42):
+    """Propiedades sintéticas con las distribuciones del dataset limpio"""
+    rng = np.random.default_rng(semilla)
+    filas = rng.integers(0, len(df), size=n)
+    base = df.iloc[filas]
+    area = base['area'].to_numpy(dtype=np.float64) * rng.lognormal(0.0, 0.1, size=n)
+    return pd.DataFrame({
+        'area': np.clip(np.round(area, 1), 10, 2000),
+        'habitaciones': base['habitaciones'].to_numpy(dtype=np.float64),
+        'banos': base['banos'].to_numpy(dtype=np.float64),
+        'latitud': base['latitud'].to_numpy(dtype=np.float64) + rng.normal(0, 0.01, size=n),
+        'longitud': base['longitud'].to_numpy(dtype=np.float64) + rng.normal(0, 0.01, size=n),
+        'ciudad': base['ciudad'].astype(object).to_numpy(),
+        'tipo_propiedad': base['tipo_propiedad'].astype(object).to_numpy(),
+    })
+
+
+def _cronometrar(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def _por_bloques(df, tamano_bloque=TAMANO_BLOQUE):
+    for inicio in range(0, len(df), tamano_bloque):
+        yield df.iloc[inicio:inicio + tamano_bloque]
+
+
+def medir_arranque_frio(ruta_modelo, ruta_dataset, repeticiones=REPETICIONES_FRIO):
+    """Carga de modelo, dataset, estadísticas e índice en procesos nuevos (mediana de las repeticiones)"""
+    entorno = dict(os.environ, PYTHONPATH=RAIZ_PROYECTO + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    mediciones = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', _SCRIPT_FRIO, ruta_modelo, ruta_dataset],
+                                capture_output=True, text=True, check=True, env=entorno)
+        mediciones.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+    resultado = {clave: round(float(np.median([m[clave] for m in mediciones])), 4)
+                 for clave in mediciones[0] if clave.endswith('_s')}
+    resultado['tipo_modelo'] = mediciones[0]['tipo_modelo']
+    return resultado
+
+
+def medir_importaciones(objetivos=OBJETIVOS_ARRANQUE, repeticiones=REPETICIONES_FRIO, ruta_modelo=RUTA_MODELO):
+    """Tiempo de importación, memoria máxima y módulos pesados cargados por cada objetivo
+
+    {ruta_modelo} en el código de un objetivo se reemplaza por el modelo medido.
+    Para el detalle por módulo: python -X importtime -c "import valoracion"
+    """
+    entorno = dict(os.environ, PYTHONPATH=RAIZ_PROYECTO + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    entorno.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    resultado = {}
+    for nombre, codigo in objetivos.items():
+        mediciones = []
+        for _ in range(repeticiones):
+            salida = subprocess.run([sys.executable, '-c', _SCRIPT_IMPORTACION,
+                                     codigo.format(ruta_modelo=ruta_modelo), *MODULOS_PESADOS],
+                                    capture_output=True, text=True, cwd=RAIZ_PROYECTO, env=entorno)
+            if salida.returncode != 0:
+                mediciones = None
+                resultado[nombre] = {'omitido': salida.stderr.strip().splitlines()[-1]}
+                break
+            mediciones.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+        if mediciones:
+            resultado[nombre] = {
+                'ms': round(float(np.median([m['segundos'] for m in mediciones])) * 1e3, 1),
+                'memoria_mb': (round(float(np.median([m['memoria_mb'] for m in mediciones])), 1)
+                               if mediciones[0]['memoria_mb'] is not None else None),
+                'modulos': mediciones[0]['modulos'],
+            }
+    return resultado
+
+
+def medir_tamano(n, propiedades, modelo, codificador, estadisticas, comparables, max_individual, espacial=None,
+                 modelo_lotes=None):
+    """Todas las etapas para un lote de n propiedades
+
+    Con `modelo_lotes` (el .pkl que carga la valoración por lotes cuando el
+    modelo medido es el bosque compacto) también se mide su predict por bloques.
+    """
+    from .bosque import es_bosque
+    from .codificador import predecir, predecir_intervalo
+    from .caracteristicas import derivar_caracteristicas
+
+    resultado = {'filas': n}
+    muestra = min(n, max_individual)
+
+    t, derivadas = _cronometrar(lambda: pd.concat(
+        [derivar_caracteristicas(b, estadisticas) for b in _por_bloques(propiedades)]))
+    resultado['derivar_lote_s'] = t
+
+    registros = derivadas.iloc[:muestra].to_dict('records')
+    t, _ = _cronometrar(lambda: [codificador.transformar(r) for r in registros])
+    resultado['codificar_individual_us_fila'] = t / muestra * 1e6
+
+    # Los lotes se codifican como CSR, igual que en la valoración por lotes
+    t, _ = _cronometrar(lambda: [codificador.transformar_lote(b, disperso=True) for b in _por_bloques(derivadas)])
+    resultado['codificar_lote_s'] = t
+    resultado['codificar_lote_filas_s'] = n / t
+
+    muestra_lote = derivadas.iloc[:muestra]
+    dispersa = codificador.transformar_lote(muestra_lote, disperso=True)
+    resultado['bytes_fila_densa'] = codificador.transformar_lote(muestra_lote).nbytes / muestra
+    resultado['bytes_fila_dispersa'] = (dispersa.data.nbytes + dispersa.indices.nbytes
+                                        + dispersa.indptr.nbytes) / muestra
+
+    t_predict = 0.0
+    for bloque in _por_bloques(derivadas):
+        X = codificador.transformar_lote(bloque, disperso=True)
+        t, _ = _cronometrar(lambda: predecir(modelo, X))
+        t_predict += t
+    resultado['predict_s'] = t_predict
+    resultado['predict_filas_s'] = n / t_predict
+
+    if modelo_lotes is not None:
+        t_lotes = 0.0
+        for bloque in _por_bloques(derivadas):
+            X = codificador.transformar_lote(bloque, disperso=True)
+            t, _ = _cronometrar(lambda: predecir(modelo_lotes, X))
+            t_lotes += t
+        resultado['predict_lotes_filas_s'] = n / t_lotes
+
+    if es_bosque(modelo):
+        # Promedio y cuantiles de todos los árboles en la misma pasada
+        t_intervalo = 0.0
+        for bloque in _por_bloques(derivadas):
+            X = codificador.transformar_lote(bloque, disperso=True)
+            t, _ = _cronometrar(lambda: predecir_intervalo(modelo, X))
+            t_intervalo += t
+        resultado['intervalo_filas_s'] = n / t_intervalo
+
+    filas_individuales = codificador.transformar_lote(derivadas.iloc[:min(muestra, 1000)])
+    t, _ = _cronometrar(lambda: [predecir(modelo, filas_individuales[i:i + 1])
+                                 for i in range(len(filas_individuales))])
+    resultado['predict_individual_ms_fila'] = t / len(filas_individuales) * 1e3
+
+    if comparables is not None:
+        consultas = list(zip(derivadas['ciudad'].iloc[:muestra], derivadas['tipo_propiedad'].iloc[:muestra],
+                             derivadas['area'].iloc[:muestra]))
+        t, _ = _cronometrar(lambda: [comparables.similares(c, tp, a) for c, tp, a in consultas])
+        resultado['comparables_us_consulta'] = t / muestra * 1e6
+
+    if espacial is not None:
+        puntos = list(zip(derivadas['latitud'].iloc[:muestra], derivadas['longitud'].iloc[:muestra]))
+        t, _ = _cronometrar(lambda: [espacial.mas_cercanas(lat, lon) for lat, lon in puntos])
+        resultado['vecinos_us_consulta'] = t / muestra * 1e6
+        t, _ = _cronometrar(lambda: [espacial.en_radio(lat, lon) for lat, lon in puntos])
+        resultado['radio_us_consulta'] = t / muestra * 1e6
+        t, _ = _cronometrar(lambda: [espacial.ubicar(lat, lon) for lat, lon in puntos])
+        resultado['ubicar_us_consulta'] = t / muestra * 1e6
+
+    resultado['muestra_individual'] = muestra
+    return {clave: round(valor, 6) if isinstance(valor, float) else valor
+            for clave, valor in resultado.items()}
+
+
+def medir_chatbot(propiedades, max_conversaciones=MAX_CHATBOT, registro=None):
+    """Latencia de punta a punta de PredictorBot: de la primera respuesta al resultado"""
+    from .conversacion import PredictorBot
+
+    t_carga, bot = _cronometrar(lambda: PredictorBot(registro))
+    latencias = []
+    for fila in propiedades.iloc[:max_conversaciones].itertuples():
+        respuestas = [f'{fila.area:g}', f'{fila.habitaciones:g}', f'{fila.banos:g}',
+                      fila.ciudad, 'no', fila.tipo_propiedad]
+        inicio = time.perf_counter()
+        tipo = None
+        for respuesta in respuestas:
+            tipo, _ = bot.procesar_respuesta(respuesta)
+            if tipo == 'error':
+                break
+        if tipo != 'error':
+            latencias.append(time.perf_counter() - inicio)
+        bot.reiniciar()
+
+    if not latencias:
+        return {'carga_s': round(t_carga, 4), 'conversaciones': 0}
+    latencias = np.array(latencias) * 1e3
+    return {
+        'carga_s': round(t_carga, 4),
+        'conversaciones': len(latencias),
+        'p50_ms': round(float(np.percentile(latencias, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencias, 99)), 3),
+        'promedio_ms': round(float(latencias.mean()), 3),
+    }
+
+
+def medir_sesiones(propiedades, sesiones=MAX_SESIONES, registro=None):
+    """Conversaciones simultáneas sobre un MotorAsincrono: throughput y tamaño de los lotes agrupados"""
+    import asyncio
+
+    from .conversacion import MotorConversacion
+    from .sesiones import MotorAsincrono, SesionesChat
+
+    async def _conversacion(chat, sesion, fila):
+        chat.iniciar(sesion)
+        tipo = None
+        for respuesta in [f'{fila.area:g}', f'{fila.habitaciones:g}', f'{fila.banos:g}',
+                          fila.ciudad, 'no', fila.tipo_propiedad]:
+            tipo, _ = await chat.responder(sesion, respuesta)
+            if tipo == 'error':
+                break
+        chat.cerrar(sesion)
+        return tipo != 'error'
+
+    async def _medir():
+        t_carga, motor = _cronometrar(lambda: MotorAsincrono(MotorConversacion(registro)))
+        await motor.preparar()
+        chat = SesionesChat(motor)
+        inicio = time.perf_counter()
+        completas = await asyncio.gather(*(_conversacion(chat, i, fila)
+                                           for i, fila in enumerate(propiedades.iloc[:sesiones].itertuples())))
+        total = time.perf_counter() - inicio
+        return {
+            'carga_s': round(t_carga, 4),
+            'conversaciones': int(sum(completas)),
+            'total_s': round(total, 4),
+            'conversaciones_s': round(len(completas) / total, 2),
+            'tamano_lote_promedio': motor.agrupador.metricas.resumen()['tamano_lote_promedio'],
+        }
+
+    return asyncio.run(_medir())
+
+
+def _entorno():
+    """Versiones y máquina, para comparar reportes entre sí"""
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ_PROYECTO,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def comparar(actual, anterior, umbral=UMBRAL_REGRESION):
+    """Etapas más lentas que en el reporte anterior: lista de (etapa, anterior, actual, razón)"""
+    # En estas métricas un valor mayor es mejor
+    mejor_si_mayor = ('_filas_s', 'conversaciones_s')
+    regresiones = []
+    pares = [('arranque_frio', actual.get('arranque_frio', {}), anterior.get('arranque_frio', {})),
+             ('chatbot', actual.get('chatbot', {}), anterior.get('chatbot', {})),
+             ('sesiones', actual.get('sesiones', {}), anterior.get('sesiones', {}))]
+    previos = {r['filas']: r for r in anterior.get('tamanos', [])}
+    pares += [(f"n={r['filas']}", r, previos.get(r['filas'], {})) for r in actual.get('tamanos', [])]
+    pares += [(f'importaciones.{nombre}', r, anterior.get('importaciones', {}).get(nombre, {}))
+              for nombre, r in actual.get('importaciones', {}).items()]
+
+    for grupo, nuevo, viejo in pares:
+        for clave, valor in nuevo.items():
+            previo = viejo.get(clave)
+            if clave in ('filas', 'muestra_individual', 'conversaciones', 'tamano_lote_promedio') or not isinstance(valor, (int, float)) \
+                    or not isinstance(previo, (int, float)) or not valor or not previo:
+                continue
+            razon = previo / valor if clave.endswith(mejor_si_mayor) else valor / previo
+            if razon > umbral:
+                regresiones.append((f'{grupo}.{clave}', previo, valor, round(razon, 2)))
+    return regresiones
+
+
+def main(argv=None):
+    """Ejecuta el benchmark y guarda el reporte JSON"""
+    parser = argparse.ArgumentParser(description="Benchmark de carga, codificación, predict y comparables")
+    parser.add_argument('--modelo', default=RUTA_MODELO)
+    parser.add_argument('--dataset', default=RUTA_DATASET)
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS_DEFECTO)
+    parser.add_argument('--max-individual', type=int, default=MAX_INDIVIDUAL,
+                        help="Máximo de filas para las mediciones fila a fila")
+    parser.add_argument('--conversaciones', type=int, default=MAX_CHATBOT,
+                        help="Conversaciones completas del chatbot (0 para omitir)")
+    parser.add_argument('--sesiones', type=int, default=MAX_SESIONES,
+                        help="Conversaciones simultáneas sobre el motor asíncrono (0 para omitir)")
+    parser.add_argument('--salida', default=RUTA_REPORTE)
+    parser.add_argument('--comparar', default=None, help="Reporte anterior para detectar regresiones")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--solo-arranque', action='store_true',
+                        help="Solo el reporte de importaciones y tiempo hasta la primera pregunta")
+    args = parser.parse_args(argv)
+
+    from . import IndiceComparables, IndiceEspacial, cargar_dataset
+    from .bosque import BosqueCompacto
+    from .lote import compacto_para_lotes
+    from .registro import RegistroModelos, cargar_version, ruta_actual
+
+    print("="*80)
+    print(" "*28 + " BENCHMARK")
+    print("="*80)
+
+    reporte = {'entorno': _entorno()}
+
+    print("\n⏳ Importaciones y tiempo hasta la primera pregunta (procesos nuevos)...")
+    # Todos los escenarios usan el mismo modelo: la versión actual del registro de --modelo
+    registro = RegistroModelos.para_modelo(args.modelo, ruta_dataset=args.dataset)
+    ruta_modelo = ruta_actual(args.modelo)
+
+    reporte['importaciones'] = medir_importaciones(ruta_modelo=args.modelo)
+    print(f"   {'Objetivo':<25s} | {'ms':>7s} | {'MB':>6s} | Módulos pesados cargados")
+    for nombre, r in reporte['importaciones'].items():
+        if 'omitido' in r:
+            print(f"   {nombre:<25s} | omitido: {r['omitido']}")
+        else:
+            memoria = f"{r['memoria_mb']:>6.1f}" if r['memoria_mb'] is not None else '     -'
+            print(f"   {nombre:<25s} | {r['ms']:>7.1f} | {memoria} | {', '.join(r['modulos']) or '-'}")
+    if args.solo_arranque:
+        return _guardar_reporte(reporte, args)
+
+    print("\n⏳ Arranque en frío (procesos nuevos)...")
+    reporte['arranque_frio'] = medir_arranque_frio(ruta_modelo, args.dataset)
+    print(f"   ✓ {reporte['arranque_frio']['total_s']:.3f} s ({reporte['arranque_frio']['tipo_modelo']})")
+
+    cargado = registro.actual()
+    modelo, codificador, estadisticas = cargado.modelo, cargado.codificador, cargado.estadisticas
+    df = cargar_dataset(args.dataset)
+    comparables = IndiceComparables.desde_dataframe(df)
+    espacial = IndiceEspacial.desde_dataframe(df)
+    reporte['modelo'] = {'version': cargado.descripcion(), 'tipo': type(modelo).__name__, 'arboles': int(getattr(modelo, 'n_estimators', 0)),
+                         'features': codificador.n_features}
+    # La valoración por lotes no usa el bosque compacto sino el .pkl verificado: se mide aparte
+    modelo_lotes = None
+    if isinstance(modelo, BosqueCompacto) and compacto_para_lotes(cargado.version) is False:
+        try:
+            modelo_lotes = cargar_version(cargado.version, compacto=False)[0]
+        except (OSError, ValueError) as e:
+            print(f"   Sin el .pkl para comparar la valoración por lotes: {e}")
+
+    reporte['tamanos'] = []
+    for n in args.tamanos:
+        print(f"\n⏳ {n:,} propiedades...")
+        propiedades = generar_propiedades(df, n, args.semilla)
+        resultado = medir_tamano(n, propiedades, modelo, codificador, estadisticas, comparables,
+                                 args.max_individual, espacial, modelo_lotes)
+        reporte['tamanos'].append(resultado)
+        print(f"   ✓ codificar lote {resultado['codificar_lote_filas_s']:,.0f} filas/s "
+              f"({resultado['bytes_fila_dispersa']:,.0f} bytes/fila CSR vs {resultado['bytes_fila_densa']:,.0f} densa) | "
+              f"predict {resultado['predict_filas_s']:,.0f} filas/s | "
+              f"intervalo {resultado.get('intervalo_filas_s', float('nan')):,.0f} filas/s | "
+              f"predict individual {resultado['predict_individual_ms_fila']:.3f} ms | "
+              f"comparables {resultado.get('comparables_us_consulta', float('nan')):.1f} µs | "
+              f"vecinos {resultado.get('vecinos_us_consulta', float('nan')):.1f} µs")
+        if 'predict_lotes_filas_s' in resultado:
+            print(f"   ✓ predict por bloques: compacto {resultado['predict_filas_s']:,.0f} filas/s | "
+                  f"scikit-learn (.pkl, valoración por lotes) {resultado['predict_lotes_filas_s']:,.0f} filas/s")
+
+    if args.conversaciones:
+        print(f"\n⏳ Chatbot de punta a punta ({args.conversaciones} conversaciones)...")
+        reporte['chatbot'] = medir_chatbot(generar_propiedades(df, args.conversaciones, args.semilla),
+                                           args.conversaciones, registro)
+        if 'p50_ms' in reporte['chatbot']:
+            print(f"   ✓ p50 {reporte['chatbot']['p50_ms']:.2f} ms | p99 {reporte['chatbot']['p99_ms']:.2f} ms")
+        else:
+            print(f"   {reporte['chatbot'].get('omitido', 'Sin conversaciones completas')}")
+
+    if args.sesiones:
+        print(f"\n⏳ {args.sesiones} sesiones de chat simultáneas (motor asíncrono)...")
+        reporte['sesiones'] = medir_sesiones(generar_propiedades(df, args.sesiones, args.semilla),
+                                             args.sesiones, registro)
+        print(f"   ✓ {reporte['sesiones']['conversaciones_s']:,.0f} conversaciones/s | "
+              f"lote promedio {reporte['sesiones']['tamano_lote_promedio']:.1f} predicciones")
+
+    return _guardar_reporte(reporte, args)
+
+
+def _guardar_reporte(reporte, args):
+    """Guarda el reporte y, con --comparar, devuelve 2 si hay regresiones"""
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=1)
+    print(f"\n Reporte guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            regresiones = comparar(reporte, json.load(f))
+        if regresiones:
+            print(f"\n  {len(regresiones)} etapas más de {UMBRAL_REGRESION}x más lentas que {args.comparar}:")
+            for etapa, previo, valor, razon in regresiones:
+                print(f"   • {etapa}: {previo:g} -> {valor:g} ({razon}x)")
+            return 2
+        print(f"\n Sin regresiones respecto a {args.comparar}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""
+Sales-Predictor - Bosque compacto
+Exporta el Random Forest entrenado a arrays planos y lo evalúa con NumPy
+
+Estructura del directorio (models/random_forest_model.arboles/):
+    meta.json          versión, nombres de las características, árboles y profundidad
+    caracteristica.npy índice de la característica que divide cada nodo
+    umbral.npy         umbral de cada nodo (izquierda si x <= umbral)
+    izquierdo.npy      hijo izquierdo (las hojas apuntan a sí mismas)
+    derecho.npy        hijo derecho (las hojas apuntan a sí mismas)
+    valor.npy          valor de cada nodo (el de la hoja es la predicción del árbol)
+    raices.npy         nodo raíz de cada árbol
+
+Cargarlo no necesita scikit-learn ni deserializar objetos: los arrays se
+mapean en memoria y varios procesos comparten una sola copia del modelo.
+
+Uso: python -m valoracion.bosque   (exporta models/random_forest_model.pkl)
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import weakref
+
+import numpy as np
+
+from .codificador import es_disperso
+from .instrumentacion import tramo
+from .rutas import RUTA_MODELO
+
+
+VERSION_FORMATO = 1
+
+ARRAYS = ('caracteristica', 'umbral', 'izquierdo', 'derecho', 'valor', 'raices')
+
+# Máximo de (filas x árboles) recorridos a la vez; acota la memoria de predict
+CELDAS_POR_BLOQUE = 1 << 21
+
+# Desde cuántas filas un bosque de scikit-learn es más rápido que el compacto:
+# el compacto evita el costo fijo de predict en filas sueltas, pero en bloques
+# grandes recorrer los árboles en C gana (unas 3 veces con 28 mil filas)
+FILAS_SKLEARN = 2_000
+
+
+def ruta_compacta(ruta_modelo):
+    """Directorio del bosque compacto asociado a un modelo (.pkl -> .arboles)"""
+    return os.path.splitext(ruta_modelo)[0] + '.arboles'
+
+
+RUTA_BOSQUE = ruta_compacta(RUTA_MODELO)
+
+
+class BosqueCompacto:
+    """Bosque de regresión guardado como arrays contiguos de nodos
+
+    Todos los árboles comparten los mismos arrays; los índices de los hijos
+    son globales. Expone feature_names_in_ y predict() como el modelo de
+    scikit-learn, así que sirve directamente para CodificadorOneHot y predecir.
+    """
+
+    def __init__(self, caracteristica, umbral, izquierdo, derecho, valor, raices,
+                 feature_names, profundidad):
+        self.caracteristica = caracteristica
+        self.umbral = umbral
+        self.izquierdo = izquierdo
+        self.derecho = derecho
+        self.valor = valor
+        self.raices = raices
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+        self.profundidad = int(profundidad)
+
+    @property
+    def n_estimators(self):
+        return len(self.raices)
+
+    @property
+    def n_nodos(self):
+        return len(self.caracteristica)
+
+    @classmethod
+    def desde_sklearn(cls, modelo):
+        """Aplana un RandomForestRegressor (o ExtraTrees / DecisionTree) ya entrenado"""
+        arboles = [e.tree_ for e in getattr(modelo, 'estimators_', [modelo])]
+        if getattr(arboles[0], 'n_outputs', 1) != 1:
+            raise ValueError("Solo se soportan modelos de regresión con una salida")
+
+        partes = {nombre: [] for nombre in ARRAYS if nombre != 'raices'}
+        raices = []
+        desplazamiento = 0
+        for arbol in arboles:
+            n = arbol.node_count
+            propios = np.arange(desplazamiento, desplazamiento + n, dtype=np.int32)
+            hoja = arbol.children_left < 0
+            partes['caracteristica'].append(np.where(hoja, 0, arbol.feature).astype(np.int32))
+            partes['umbral'].append(np.where(hoja, 0.0, arbol.threshold))
+            partes['izquierdo'].append(np.where(hoja, propios, arbol.children_left + desplazamiento).astype(np.int32))
+            partes['derecho'].append(np.where(hoja, propios, arbol.children_right + desplazamiento).astype(np.int32))
+            partes['valor'].append(arbol.value.reshape(n).astype(np.float64))
+            raices.append(desplazamiento)
+            desplazamiento += n
+
+        return cls(
+            raices=np.asarray(raices, dtype=np.int32),
+            feature_names=[str(c) for c in modelo.feature_names_in_],
+            profundidad=max(arbol.max_depth for arbol in arboles),
+            **{nombre: np.concatenate(valores) for nombre, valores in partes.items()},
+        )
+
+    def guardar(self, directorio=RUTA_BOSQUE):
+        """Guarda los arrays y meta.json (reemplaza el directorio de forma atómica)"""
+        temporal = directorio + '.tmp'
+        shutil.rmtree(temporal, ignore_errors=True)
+        os.makedirs(temporal)
+        for nombre in ARRAYS:
+            np.save(os.path.join(temporal, f'{nombre}.npy'), np.ascontiguousarray(getattr(self, nombre)))
+        meta = {
+            'version': VERSION_FORMATO,
+            'feature_names': list(self.feature_names_in_),
+            'n_arboles': self.n_estimators,
+            'n_nodos': self.n_nodos,
+            'profundidad': self.profundidad,
+        }
+        with open(os.path.join(temporal, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        shutil.rmtree(directorio, ignore_errors=True)
+        os.replace(temporal, directorio)
+
+    @classmethod
+    def cargar(cls, directorio=RUTA_BOSQUE, mmap=True):
+        """Carga un bosque guardado con guardar(); con mmap=True los arrays no se copian"""
+        with open(os.path.join(directorio, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != VERSION_FORMATO:
+            raise ValueError(f"Versión de bosque compacto no soportada: {meta.get('version')}")
+        arrays = {nombre: np.load(os.path.join(directorio, f'{nombre}.npy'),
+                                  mmap_mode='r' if mmap else None)
+                  for nombre in ARRAYS}
+        return cls(feature_names=meta['feature_names'], profundidad=meta['profundidad'], **arrays)
+
+    def _hojas(self, X):
+        """Nodo hoja alcanzado por cada fila en cada árbol, matriz (filas, árboles)
+
+        Cada paso baja un nivel a las celdas (fila, árbol) que aún no están en
+        una hoja; las que llegan salen del conjunto activo.
+        """
+        n, d = X.shape
+        valores = X.ravel()
+        nodos = np.tile(self.raices, n)
+        activos = np.arange(len(nodos))
+        actuales = nodos.copy()
+        desplazamientos = np.repeat(np.arange(n, dtype=np.intp) * d, self.n_estimators)
+        while len(activos):
+            x = np.take(valores, desplazamientos + np.take(self.caracteristica, actuales))
+            siguientes = np.where(x <= np.take(self.umbral, actuales),
+                                  np.take(self.izquierdo, actuales),
+                                  np.take(self.derecho, actuales))
+            nodos[activos] = siguientes
+            # Las hojas apuntan a sí mismas: si el nodo no cambió, ya terminó
+            continuan = siguientes != actuales
+            activos = activos[continuan]
+            actuales = siguientes[continuan]
+            desplazamientos = desplazamientos[continuan]
+        return nodos.reshape(n, self.n_estimators)
+
+    def predecir_arboles(self, X):
+        """Predicción de cada árbol, matriz (filas, árboles)
+
+        Una CSR se pasa a densa de a bloques de a lo sumo CELDAS_POR_BLOQUE
+        celdas, así la memoria no crece con el número de columnas.
+        """
+        # scikit-learn evalúa los árboles sobre X en float32; se replica para
+        # que las comparaciones con los umbrales den exactamente lo mismo
+        disperso = es_disperso(X)
+        if disperso:
+            X = X.tocsr().astype(np.float32)
+        else:
+            X = np.ascontiguousarray(X, dtype=np.float32)
+            if X.ndim == 1:
+                X = X.reshape(1, -1)
+        paso = max(1, CELDAS_POR_BLOQUE // max(1, self.n_estimators))
+        if disperso:
+            paso = min(paso, max(1, CELDAS_POR_BLOQUE // max(1, X.shape[1])))
+        salida = np.empty((X.shape[0], self.n_estimators), dtype=np.float64)
+        for inicio in range(0, X.shape[0], paso):
+            bloque = X[inicio:inicio + paso]
+            if disperso:
+                bloque = bloque.toarray()
+            salida[inicio:inicio + len(bloque)] = self.valor[self._hojas(bloque)]
+        return salida
+
+    def predict(self, X):
+        """Promedio de los árboles, igual que RandomForestRegressor.predict"""
+        return self.predecir_arboles(X).mean(axis=1)
+
+
+def es_bosque(modelo):
+    """True si el modelo tiene predicciones por árbol (BosqueCompacto o bosque de scikit-learn)"""
+    if isinstance(modelo, BosqueCompacto):
+        return True
+    arboles = getattr(modelo, 'estimators_', None)
+    return arboles is not None and len(arboles) > 0 and hasattr(arboles[0], 'tree_')
+
+
+def bosque_de(modelo):
+    """El modelo como BosqueCompacto, para evaluar todos sus árboles en una sola pasada
+
+    Un bosque de scikit-learn se aplana la primera vez y se reutiliza
+    mientras el modelo exista y conserve los mismos árboles. La copia
+    aplanada ocupa 28 bytes por nodo además del modelo (unos 63 MB con el
+    modelo publicado); cargar el bosque compacto exportado en lugar del
+    .pkl la evita. Otros modelos (XGBoost, regresión lineal) no tienen
+    predicciones por árbol independientes: ValueError.
+    """
+    if isinstance(modelo, BosqueCompacto):
+        return modelo
+    if not es_bosque(modelo):
+        raise ValueError(f"{type(modelo).__name__} no es un bosque: no tiene predicciones por árbol")
+    # Los árboles cambian al volver a entrenar, con warm_start o al descartar los más
+    # antiguos (reentrenamiento.crecer_bosque), aunque el número de árboles sea el mismo
+    arboles = tuple(estimador.tree_ for estimador in modelo.estimators_)
+    aplanado = _APLANADOS.get(modelo)
+    if aplanado is None or len(aplanado[0]) != len(arboles) or any(
+            previo is not actual for previo, actual in zip(aplanado[0], arboles)):
+        aplanado = _APLANADOS[modelo] = (arboles, BosqueCompacto.desde_sklearn(modelo))
+    return aplanado[1]
+
+
+# Bosques de scikit-learn ya aplanados por bosque_de(): modelo -> (sus árboles, BosqueCompacto)
+_APLANADOS = weakref.WeakKeyDictionary()
+
+
+def predecir_por_arbol(modelo, X):
+    """Predicción de cada árbol de un bosque, matriz (filas, árboles)
+
+    Un bosque de scikit-learn con al menos FILAS_SKLEARN filas se evalúa
+    árbol por árbol con su propio predict; en los demás casos se usa el
+    bosque compacto (ver bosque_de).
+    """
+    if isinstance(modelo, BosqueCompacto) or X.shape[0] < FILAS_SKLEARN:
+        return bosque_de(modelo).predecir_arboles(X)
+    if not es_bosque(modelo):
+        raise ValueError(f"{type(modelo).__name__} no es un bosque: no tiene predicciones por árbol")
+    # En float32 (lo que usan los árboles) para que cada árbol no vuelva a convertir X
+    X = X.tocsr().astype(np.float32) if es_disperso(X) else np.asarray(X, dtype=np.float32)
+    return np.column_stack([arbol.predict(X) for arbol in modelo.estimators_])
+
+
+def exportar_modelo(ruta_modelo=RUTA_MODELO, directorio=None):
+    """Exporta un modelo .pkl de scikit-learn al formato compacto"""
+    import joblib
+
+    bosque = BosqueCompacto.desde_sklearn(joblib.load(ruta_modelo))
+    bosque.guardar(directorio or ruta_compacta(ruta_modelo))
+    return bosque
+
+
+def cargar_modelo(ruta_modelo=RUTA_MODELO, directorio=None, mmap=True, compacto=None):
+    """Carga el modelo, prefiriendo el bosque compacto
+
+    Se usa el .pkl (con joblib y scikit-learn) si no existe el bosque
+    compacto, si está dañado o si el .pkl es más reciente que él. Con
+    compacto=True se carga solo el bosque compacto y con compacto=False
+    solo el .pkl (por ejemplo, el artefacto cuyo hash ya se verificó).
+    """
+    directorio = directorio or ruta_compacta(ruta_modelo)
+    meta = os.path.join(directorio, 'meta.json')
+    with tramo('cargar_modelo'):
+        if compacto:
+            return BosqueCompacto.cargar(directorio, mmap=mmap)
+        if compacto is None and os.path.exists(meta) and not (
+                os.path.exists(ruta_modelo) and os.path.getmtime(ruta_modelo) > os.path.getmtime(meta)):
+            try:
+                return BosqueCompacto.cargar(directorio, mmap=mmap)
+            except (OSError, ValueError, KeyError):
+                pass
+
+        import joblib
+        return joblib.load(ruta_modelo)
+
+
+def main(argv=None):
+    """Exporta el modelo entrenado al formato compacto"""
+    parser = argparse.ArgumentParser(description="Exporta el Random Forest a arrays planos (bosque compacto)")
+    parser.add_argument('--modelo', default=RUTA_MODELO)
+    parser.add_argument('--salida', default=None,
+                        help="Directorio de salida (por defecto, junto al .pkl)")
+    args = parser.parse_args(argv)
+
+    salida = args.salida or ruta_compacta(args.modelo)
+    bosque = exportar_modelo(args.modelo, salida)
+    print(f" Bosque compacto guardado en {salida}: {bosque.n_estimators} árboles, "
+          f"{bosque.n_nodos:,} nodos, profundidad {bosque.profundidad}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Sales-Predictor - Caché de predicciones
+Evita volver a predecir propiedades ya valoradas con el mismo modelo
+
+    cache = CachePredicciones(huella=huella_modelo(RUTA_MODELO))
+    precio = cache.obtener(propiedad)
+    if precio is None:
+        precio = predecir(modelo, codificador.transformar(propiedad))[0]
+        cache.guardar(propiedad, precio)
+
+Junto al precio se puede guardar su intervalo (inferior, superior) y
+recuperarlo con obtener(propiedad, con_intervalo=True).
+
+La clave es la propiedad normalizada: área, habitaciones, baños,
+coordenadas, ciudad y tipo. El resto de las columnas que recibe el modelo
+(departamento, precio_m2 y categorías) se derivan de ellas.
+
+Hay dos niveles: memoria (LRU con tiempo de vida) y, opcionalmente, disco
+(SQLite), que sobrevive a reinicios. Las entradas guardan una huella
+(SHA-256) del modelo y de las estadísticas de mercado (huella_valoracion): al
+cambiar cualquiera de los dos, las anteriores se descartan.
+
+Variables de entorno:
+    VALORACION_CACHE   archivo SQLite del nivel en disco (sin ella, solo memoria)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .instrumentacion import contar
+from .nombres import normalizar
+
+
+MAX_ENTRADAS = 10_000
+TTL_SEGUNDOS = 24 * 3600
+BYTES_POR_LECTURA = 1 << 20
+
+# Decimales con los que se comparan las coordenadas (~1 m)
+DECIMALES_COORDENADAS = 5
+
+
+def huella_modelo(ruta_modelo):
+    """SHA-256 del archivo del modelo (o de los arrays del bosque compacto si es un directorio)"""
+    if os.path.isdir(ruta_modelo):
+        archivos = [os.path.join(ruta_modelo, f) for f in sorted(os.listdir(ruta_modelo))]
+    else:
+        archivos = [ruta_modelo]
+    huella = hashlib.sha256()
+    for archivo in archivos:
+        with open(archivo, 'rb') as f:
+            while bloque := f.read(BYTES_POR_LECTURA):
+                huella.update(bloque)
+    return huella.hexdigest()
+
+
+def huella_valoracion(huella, estadisticas=None):
+    """Huella de las predicciones: la del modelo más las estadísticas de las que se derivan las variables
+
+    departamento, coordenadas faltantes, precio_m2 y categoria_precio salen
+    de las estadísticas, así que regenerarlas también cambia el precio.
+    """
+    if huella is None or estadisticas is None:
+        return huella
+    combinada = hashlib.sha256(huella.encode('ascii'))
+    combinada.update(json.dumps(estadisticas.a_dict(), sort_keys=True, default=str).encode('utf-8'))
+    return combinada.hexdigest()
+
+
+def _redondear(valor, decimales):
+    return None if valor is None else round(float(valor), decimales)
+
+
+def clave_propiedad(propiedad):
+    """Tupla normalizada que identifica una propiedad (dict) para la caché"""
+    return (
+        _redondear(propiedad['area'], 2),
+        int(propiedad['habitaciones']),
+        int(propiedad['banos']),
+        _redondear(propiedad.get('latitud'), DECIMALES_COORDENADAS),
+        _redondear(propiedad.get('longitud'), DECIMALES_COORDENADAS),
+        normalizar(propiedad['ciudad']),
+        normalizar(propiedad['tipo_propiedad']),
+    )
+
+
+class CachePredicciones:
+    """Caché LRU con tiempo de vida y nivel opcional en disco, segura entre hilos"""
+
+    def __init__(self, huella=None, max_entradas=MAX_ENTRADAS, ttl=TTL_SEGUNDOS, ruta_disco=None):
+        self.huella = huella
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.ruta_disco = ruta_disco
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.aciertos_disco = 0
+        self._disco = None
+        if ruta_disco:
+            self._abrir_disco(ruta_disco)
+
+    @classmethod
+    def para_modelo(cls, ruta_modelo=None, huella=None, **kwargs):
+        """Caché con la huella del modelo (o la ya calculada); el nivel en disco se toma de VALORACION_CACHE"""
+        kwargs.setdefault('ruta_disco', os.environ.get('VALORACION_CACHE'))
+        if huella is None and ruta_modelo is not None:
+            try:
+                huella = huella_modelo(ruta_modelo)
+            except OSError:
+                huella = None
+        return cls(huella=huella, **kwargs)
+
+    def _abrir_disco(self, ruta):
+        self._disco = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._disco.execute('PRAGMA journal_mode=WAL')
+        self._disco.execute('CREATE TABLE IF NOT EXISTS predicciones '
+                            '(clave TEXT PRIMARY KEY, huella TEXT, precio REAL, creada REAL, intervalo TEXT)')
+        # Archivos creados antes de guardar intervalos
+        columnas = [fila[1] for fila in self._disco.execute('PRAGMA table_info(predicciones)')]
+        if 'intervalo' not in columnas:
+            self._disco.execute('ALTER TABLE predicciones ADD COLUMN intervalo TEXT')
+        # Entradas de otro modelo o vencidas
+        self._disco.execute('DELETE FROM predicciones WHERE huella IS NOT ? OR creada < ?',
+                            (self.huella, self._vencimiento()))
+
+    def _vencimiento(self):
+        return time.time() - self.ttl if self.ttl else float('-inf')
+
+    def obtener(self, propiedad, con_intervalo=False):
+        """Precio guardado para la propiedad, o None si no está (o venció)
+
+        Con con_intervalo=True devuelve (precio, intervalo); el intervalo es
+        None si se guardó sin él.
+        """
+        clave = clave_propiedad(propiedad)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[2] >= self._vencimiento():
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                contar('cache_aciertos')
+                return entrada[:2] if con_intervalo else entrada[0]
+            if entrada is not None:
+                del self._entradas[clave]
+
+            if self._disco is not None:
+                fila = self._disco.execute(
+                    'SELECT precio, intervalo, creada FROM predicciones '
+                    'WHERE clave = ? AND huella IS ? AND creada >= ?',
+                    (json.dumps(clave), self.huella, self._vencimiento())).fetchone()
+                if fila is not None:
+                    intervalo = tuple(json.loads(fila[1])) if fila[1] else None
+                    self._agregar(clave, fila[0], intervalo, fila[2])
+                    self.aciertos += 1
+                    self.aciertos_disco += 1
+                    contar('cache_aciertos')
+                    return (fila[0], intervalo) if con_intervalo else fila[0]
+
+            self.fallos += 1
+        contar('cache_fallos')
+        return None
+
+    def guardar(self, propiedad, precio, intervalo=None):
+        """Guarda el precio predicho (y su intervalo, si se tiene) para la propiedad en ambos niveles"""
+        clave = clave_propiedad(propiedad)
+        precio = float(precio)
+        if intervalo is not None:
+            intervalo = tuple(float(limite) for limite in intervalo)
+        creada = time.time()
+        with self._lock:
+            self._agregar(clave, precio, intervalo, creada)
+            if self._disco is not None:
+                self._disco.execute(
+                    'INSERT OR REPLACE INTO predicciones (clave, huella, precio, creada, intervalo) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (json.dumps(clave), self.huella, precio, creada,
+                     json.dumps(intervalo) if intervalo is not None else None))
+
+    def _agregar(self, clave, precio, intervalo, creada):
+        self._entradas[clave] = (precio, intervalo, creada)
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+
+    def invalidar(self, huella=None):
+        """Vacía la caché; con `huella`, pasa a ser la del modelo nuevo"""
+        with self._lock:
+            self._entradas.clear()
+            if huella is not None:
+                self.huella = huella
+            if self._disco is not None:
+                self._disco.execute('DELETE FROM predicciones WHERE huella IS NOT ?', (self.huella,))
+
+    def resumen(self):
+        """Aciertos, fallos y tamaño de la caché"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'aciertos_disco': self.aciertos_disco,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0,
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'disco': self.ruta_disco,
+            }
+
+    def cerrar(self):
+        if self._disco is not None:
+            self._disco.close()
+            self._disco = None
+
+    def __len__(self):
+        return len(self._entradas)
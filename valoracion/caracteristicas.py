@@ -0,0 +1,90 @@
+"""
+Sales-Predictor - Variables derivadas
+precio_m2, categoria_tamano y categoria_precio con una sola definición para entrenamiento, aplicación, chatbot y lotes
+
+    categoria_tamano(areas)                                # array de etiquetas, np.digitize
+    caracteristicas_propiedad(85, 'Medellín', estadisticas) # dict para una propiedad
+    derivar_caracteristicas(lote, estadisticas)            # DataFrame completo
+
+Todo trabaja sobre arrays: un lote de un millón de filas se deriva en una
+pasada y una propiedad suelta es el mismo cálculo con un solo valor.
+precio_m2 es la mediana de la ciudad (el precio real no se conoce al
+valorar), categoria_tamano usa LIMITES_TAMANO y categoria_precio ubica
+area * precio_m2 en los cuartiles de precio de las estadísticas guardadas.
+El entrenamiento deriva sus variables con estas mismas funciones.
+"""
+
+import numpy as np
+
+from .instrumentacion import medir
+
+
+COLUMNAS_REQUERIDAS = ['area', 'habitaciones', 'banos', 'ciudad', 'tipo_propiedad']
+
+# Límites de categoria_tamano (m²) y etiquetas, con los NOMBRES EXACTOS del dataset limpio
+LIMITES_TAMANO = [60, 120, 200]
+CATEGORIAS_TAMANO = np.array(['Pequeña', 'Mediana', 'Grande', 'Muy Grande'], dtype=object)
+CATEGORIAS_PRECIO = np.array(['Económica', 'Media', 'Alta', 'Premium'], dtype=object)
+
+
+def categoria_tamano(area):
+    """Categoría de tamaño de cada área (escalar o array)"""
+    return CATEGORIAS_TAMANO[np.digitize(area, LIMITES_TAMANO)]
+
+
+def categoria_precio(precio, limites):
+    """Categoría de precio de cada valor según tres límites crecientes (los cuartiles de precio)"""
+    return CATEGORIAS_PRECIO[np.digitize(precio, limites)]
+
+
+def caracteristicas_propiedad(area, ciudad, estadisticas):
+    """precio_m2 y categorías de una sola propiedad, listas para agregar a sus datos"""
+    precio_m2 = estadisticas.precio_m2(ciudad)
+    return {
+        'precio_m2': precio_m2,
+        'categoria_tamano': categoria_tamano(area),
+        'categoria_precio': categoria_precio(area * precio_m2, estadisticas.cuartiles_precio),
+    }
+
+
+@medir('derivar_caracteristicas')
+def derivar_caracteristicas(lote, estadisticas):
+    """Completa las columnas derivadas de un lote de forma vectorizada
+
+    Las ciudades y tipos se resuelven con el mismo índice de nombres que el
+    flujo interactivo. Igual que en él: departamento y coordenadas faltantes se
+    toman de la ciudad, precio_m2 es la mediana de la ciudad y las categorías
+    se calculan con los límites de tamaño y los cuartiles de precio. Las
+    columnas derivadas que ya traiga el lote se reemplazan.
+    """
+    faltantes = [col for col in COLUMNAS_REQUERIDAS if col not in lote.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas requeridas en el archivo: {', '.join(faltantes)}")
+
+    lote = lote.copy()
+    # Nombres escritos a mano ('medellin', 'BOGOTA DC', 'Medelin') -> nombre del dataset
+    lote['ciudad'] = estadisticas.indice_ciudades.resolver_lote(lote['ciudad'])
+    lote['tipo_propiedad'] = estadisticas.indice_tipos.resolver_lote(lote['tipo_propiedad'])
+    ciudades = lote['ciudad']
+
+    if 'departamento' in lote.columns:
+        lote['departamento'] = lote['departamento'].fillna(estadisticas.departamento_lote(ciudades))
+    else:
+        lote['departamento'] = estadisticas.departamento_lote(ciudades)
+
+    latitud, longitud = estadisticas.coordenadas_lote(ciudades)
+    for col, promedio in (('latitud', latitud), ('longitud', longitud)):
+        if col in lote.columns:
+            valores = lote[col].to_numpy(dtype=np.float64)
+            lote[col] = np.where(np.isnan(valores), promedio, valores)
+        else:
+            lote[col] = promedio
+
+    area = lote['area'].to_numpy(dtype=np.float64)
+    precio_m2 = estadisticas.precio_m2_lote(ciudades)
+    lote['precio_m2'] = precio_m2
+
+    lote['categoria_tamano'] = categoria_tamano(area)
+    lote['categoria_precio'] = categoria_precio(area * precio_m2, estadisticas.cuartiles_precio)
+
+    return lote
@@ -0,0 +1,213 @@
+"""
+Sales-Predictor - Codificación de características
+One-Hot Encoding precompilado a partir de las columnas que espera el modelo
+
+Los lotes se pueden codificar como matriz dispersa CSR (disperso=True):
+cada fila guarda solo sus valores numéricos y una entrada por columna
+categórica, así que el tamaño crece con las filas y no con el número de
+ciudades o departamentos. El entrenamiento y la valoración por lotes usan
+esa forma; una sola propiedad sigue siendo una fila densa.
+"""
+
+import warnings
+
+import numpy as np
+
+from .instrumentacion import contar, tramo
+
+
+# Columnas del dataset limpio que consume el modelo (sin la variable objetivo)
+COLUMNAS_NUMERICAS = ['area', 'habitaciones', 'banos', 'latitud', 'longitud', 'precio_m2']
+COLUMNAS_CATEGORICAS = ['ciudad', 'departamento', 'tipo_propiedad',
+                        'categoria_tamano', 'categoria_precio']
+
+# Cuantiles de las predicciones de los árboles que forman el intervalo (80% central)
+CUANTILES_INTERVALO = (0.1, 0.9)
+
+
+class CodificadorOneHot:
+    """Convierte propiedades en filas (densas o CSR) alineadas con feature_names_in_
+
+    Equivale a pd.get_dummies + alinear columnas con el modelo, pero se
+    construye una sola vez: cada valor categórico se resuelve con un
+    diccionario a su índice de columna. Los valores que no tienen columna
+    (categoría base de drop_first o valores nunca vistos) quedan en cero,
+    igual que en el alineado original.
+    """
+
+    def __init__(self, feature_names, columnas_categoricas=COLUMNAS_CATEGORICAS):
+        self.feature_names = [str(nombre) for nombre in feature_names]
+        self.n_features = len(self.feature_names)
+
+        indice = {nombre: i for i, nombre in enumerate(self.feature_names)}
+
+        # Columnas numéricas: se copian tal cual
+        self.indices_numericos = [(col, indice[col]) for col in COLUMNAS_NUMERICAS
+                                  if col in indice]
+
+        # Columnas dummy: 'ciudad_Medellín' -> ('ciudad', 'Medellín')
+        # Se prueban primero los prefijos más largos para evitar ambigüedades
+        prefijos = sorted(columnas_categoricas, key=len, reverse=True)
+        self.indices_categoricos = {col: {} for col in columnas_categoricas}
+        for nombre, i in indice.items():
+            for col in prefijos:
+                if nombre.startswith(col + '_'):
+                    self.indices_categoricos[col][nombre[len(col) + 1:]] = i
+                    break
+
+    @classmethod
+    def desde_modelo(cls, modelo, columnas_categoricas=COLUMNAS_CATEGORICAS):
+        """Crea el codificador a partir de un modelo entrenado con nombres de columnas"""
+        return cls(modelo.feature_names_in_, columnas_categoricas)
+
+    @classmethod
+    def desde_dataframe(cls, df, columnas_numericas=COLUMNAS_NUMERICAS,
+                        columnas_categoricas=COLUMNAS_CATEGORICAS):
+        """Codificador con las columnas de pd.get_dummies(drop_first=True) sobre df, sin la matriz densa"""
+        nombres = list(columnas_numericas)
+        for col in columnas_categoricas:
+            valores = sorted(df[col].dropna().unique())
+            nombres += [f'{col}_{valor}' for valor in valores[1:]]
+        return cls(nombres, columnas_categoricas)
+
+    def categorias(self, columna):
+        """Valores de una columna categórica que tienen columna propia en el modelo"""
+        return sorted(self.indices_categoricos.get(columna, {}))
+
+    def transformar(self, propiedad):
+        """Codifica una propiedad (dict) en una matriz de forma (1, n_features)"""
+        with tramo('codificar'):
+            fila = np.zeros((1, self.n_features), dtype=np.float64)
+
+            for col, i in self.indices_numericos:
+                fila[0, i] = propiedad[col]
+
+            for col, mapa in self.indices_categoricos.items():
+                i = mapa.get(propiedad.get(col))
+                if i is not None:
+                    fila[0, i] = 1.0
+
+        contar('filas_codificadas')
+        return fila
+
+    def transformar_lote(self, propiedades, disperso=False):
+        """Codifica un lote (DataFrame o lista de dicts) en una matriz (n, n_features)
+
+        Con disperso=True devuelve una CSR de scipy sin ceros guardados.
+        """
+        import pandas as pd
+
+        if not isinstance(propiedades, pd.DataFrame):
+            propiedades = pd.DataFrame(list(propiedades))
+        if disperso:
+            return self._transformar_disperso(propiedades)
+
+        n = len(propiedades)
+        matriz = np.zeros((n, self.n_features), dtype=np.float64)
+        if n == 0:
+            return matriz
+
+        with tramo('codificar_lote', filas=n):
+            for col, i in self.indices_numericos:
+                matriz[:, i] = propiedades[col].to_numpy(dtype=np.float64)
+
+            filas = np.arange(n)
+            for col, mapa in self.indices_categoricos.items():
+                if not mapa or col not in propiedades.columns:
+                    continue
+                # -1 para valores sin columna propia
+                indices = propiedades[col].map(mapa).fillna(-1).to_numpy(dtype=np.int64)
+                validos = indices >= 0
+                matriz[filas[validos], indices[validos]] = 1.0
+
+        contar('filas_codificadas', n)
+        return matriz
+
+    def _transformar_disperso(self, propiedades):
+        """Lote como CSR: columnas (n, k) con las k entradas posibles de cada fila, sin pasar por la densa"""
+        from scipy import sparse
+
+        n = len(propiedades)
+        with tramo('codificar_lote', filas=n):
+            columnas, valores = [], []
+            for col, i in self.indices_numericos:
+                columnas.append(np.full(n, i, dtype=np.int64))
+                valores.append(propiedades[col].to_numpy(dtype=np.float64))
+            for col, mapa in self.indices_categoricos.items():
+                if not mapa or col not in propiedades.columns:
+                    continue
+                columnas.append(propiedades[col].map(mapa).fillna(-1).to_numpy(dtype=np.int64))
+                valores.append(np.ones(n, dtype=np.float64))
+
+            if not columnas:
+                return sparse.csr_matrix((n, self.n_features), dtype=np.float64)
+            columnas = np.column_stack(columnas)
+            valores = np.column_stack(valores)
+            # Sin columna propia (-1) o en cero: no se guarda, igual que csr_matrix sobre la densa
+            presentes = (columnas >= 0) & (valores != 0)
+            indptr = np.concatenate([[0], np.cumsum(presentes.sum(axis=1))])
+            matriz = sparse.csr_matrix((valores[presentes], columnas[presentes], indptr),
+                                       shape=(n, self.n_features))
+            # Ya vienen en orden si las columnas del modelo siguen el de get_dummies
+            matriz.sort_indices()
+
+        contar('filas_codificadas', n)
+        return matriz
+
+
+def es_disperso(X):
+    """True si X es una matriz dispersa de scipy"""
+    return hasattr(X, 'tocsr')
+
+
+def asignar_nombres(modelo, nombres):
+    """Nombres de columnas de un modelo entrenado con una matriz sin ellos (CSR o array)
+
+    XGBoost toma las entradas ausentes de una CSR como faltantes y no como
+    cero; el modelo queda marcado para que predecir() también le pase CSR.
+    """
+    if hasattr(modelo, 'get_booster'):
+        modelo.get_booster().feature_names = [str(nombre) for nombre in nombres]
+        modelo.entrada_dispersa_ = True
+    else:
+        modelo.feature_names_in_ = np.asarray(nombres, dtype=object)
+    return modelo
+
+
+def predecir(modelo, X):
+    """Predice sobre una matriz ya codificada por CodificadorOneHot (densa o CSR)
+
+    La matriz está en el orden de feature_names_in_, así que se omite la
+    advertencia de sklearn por recibir un array sin nombres de columnas.
+    """
+    n = X.shape[0]
+    if getattr(modelo, 'entrada_dispersa_', False) and not es_disperso(X):
+        from scipy import sparse
+        X = sparse.csr_matrix(X)
+    with tramo('predecir', filas=n), warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        prediccion = modelo.predict(X)
+    contar('filas_predichas', n)
+    contar('arboles_evaluados', n * getattr(modelo, 'n_estimators', 1))
+    return prediccion
+
+
+def predecir_intervalo(modelo, X, cuantiles=CUANTILES_INTERVALO):
+    """Predicción y cuantiles de las predicciones de los árboles, en una sola pasada
+
+    Devuelve (prediccion, limites): la predicción es el promedio de los
+    árboles, como predict, y limites tiene forma (filas, len(cuantiles)).
+    Todos los árboles se evalúan juntos sobre el bosque compacto; un Random
+    Forest de scikit-learn se aplana una sola vez, salvo en bloques grandes
+    (ver bosque.predecir_por_arbol). ValueError si el modelo no es un bosque.
+    """
+    from .bosque import predecir_por_arbol
+
+    n = X.shape[0]
+    with tramo('predecir', filas=n):
+        arboles = predecir_por_arbol(modelo, X)
+        prediccion = arboles.mean(axis=1)
+        limites = np.quantile(arboles, cuantiles, axis=1).T
+    contar('filas_predichas', n)
+    contar('arboles_evaluados', n * arboles.shape[1])
+    return prediccion, limites
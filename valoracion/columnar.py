@@ -0,0 +1,196 @@
+"""
+Sales-Predictor - Formato columnar del dataset limpio
+Columnas binarias mapeables en memoria (mmap) con las categóricas guardadas como códigos
+
+Estructura del directorio (data/dataset_limpio.columnar/):
+    meta.json          versión, filas, columnas, tipos y categorías
+    <columna>.bin      valores numéricos (float64) o códigos categóricos (int8/16/32)
+
+Varios procesos que cargan el mismo directorio comparten las páginas del
+sistema operativo en lugar de tener cada uno su copia del CSV parseado.
+
+Uso: python -m valoracion.columnar   (convierte data/dataset_limpio.csv)
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .instrumentacion import tramo
+from .rutas import RUTA_DATASET
+
+
+def ruta_columnar(ruta_csv):
+    """Directorio columnar asociado a un CSV (dataset_limpio.csv -> dataset_limpio.columnar)"""
+    return os.path.splitext(ruta_csv)[0] + '.columnar'
+
+
+RUTA_COLUMNAR = ruta_columnar(RUTA_DATASET)
+
+VERSION_FORMATO = 1
+
+COLUMNAS_CATEGORICAS_DATASET = ['ciudad', 'departamento', 'tipo_propiedad',
+                                'categoria_tamano', 'categoria_precio']
+
+
+def _tipo_codigos(n_categorias):
+    """Entero más pequeño para los códigos (el mismo criterio que pandas)"""
+    if n_categorias < np.iinfo(np.int8).max:
+        return np.int8
+    if n_categorias < np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+
+class EscritorColumnar:
+    """Escribe un DataFrame por bloques en formato columnar
+
+    Los valores se agregan al final de cada archivo .bin; las categorías
+    se numeran en el orden en que aparecen. Al cerrar se reordenan, se
+    escribe meta.json y el directorio temporal reemplaza al definitivo.
+    """
+
+    def __init__(self, directorio=RUTA_COLUMNAR, columnas_categoricas=COLUMNAS_CATEGORICAS_DATASET):
+        self.directorio = directorio
+        self.temporal = directorio + '.tmp'
+        self.columnas_categoricas = list(columnas_categoricas)
+        self.columnas = None
+        self.categorias = {}
+        self.filas = 0
+        shutil.rmtree(self.temporal, ignore_errors=True)
+        os.makedirs(self.temporal)
+
+    def _ruta(self, columna):
+        return os.path.join(self.temporal, f'{columna}.bin')
+
+    def escribir(self, bloque):
+        """Agrega un bloque (mismas columnas en todos los bloques)"""
+        if self.columnas is None:
+            self.columnas = list(bloque.columns)
+            self.categorias = {col: {} for col in self.columnas if col in self.columnas_categoricas}
+
+        for col in self.columnas:
+            if col in self.categorias:
+                vocabulario = self.categorias[col]
+                for valor in pd.unique(bloque[col].dropna()):
+                    vocabulario.setdefault(valor, len(vocabulario))
+                valores = bloque[col].map(vocabulario).fillna(-1).to_numpy(dtype=np.int32)
+            else:
+                valores = bloque[col].to_numpy(dtype=np.float64)
+            with open(self._ruta(col), 'ab') as f:
+                valores.astype(valores.dtype.newbyteorder('<'), copy=False).tofile(f)
+
+        self.filas += len(bloque)
+
+    def cerrar(self):
+        """Ordena las categorías, reduce los códigos, escribe meta.json y publica el directorio
+
+        Las categorías quedan en orden alfabético, igual que get_dummies sobre
+        columnas de texto, para que drop_first descarte la misma columna.
+        """
+        tipos = {}
+        categorias = {}
+        for col in self.columnas or []:
+            if col in self.categorias:
+                vocabulario = self.categorias[col]
+                categorias[col] = sorted(vocabulario)
+                # nuevo código de cada código original; el -1 (nulo) cae en la última posición
+                recodificar = np.empty(len(vocabulario) + 1, dtype=np.int32)
+                recodificar[[vocabulario[v] for v in categorias[col]]] = np.arange(len(vocabulario))
+                recodificar[-1] = -1
+                tipo = _tipo_codigos(len(vocabulario))
+                codigos = np.fromfile(self._ruta(col), dtype='<i4')
+                codigos = recodificar[codigos].astype(tipo)
+                codigos.tofile(self._ruta(col))
+                tipos[col] = np.dtype(tipo).newbyteorder('<').str
+            else:
+                tipos[col] = '<f8'
+
+        meta = {
+            'version': VERSION_FORMATO,
+            'filas': self.filas,
+            'columnas': self.columnas or [],
+            'tipos': tipos,
+            'categorias': categorias,
+        }
+        with open(os.path.join(self.temporal, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        shutil.rmtree(self.directorio, ignore_errors=True)
+        os.replace(self.temporal, self.directorio)
+
+
+def guardar_columnar(df, directorio=RUTA_COLUMNAR):
+    """Guarda un DataFrame completo en formato columnar"""
+    escritor = EscritorColumnar(directorio)
+    escritor.escribir(df)
+    escritor.cerrar()
+
+
+def cargar_columnar(directorio=RUTA_COLUMNAR, mmap=True):
+    """Carga el formato columnar como DataFrame
+
+    Con mmap=True las columnas numéricas apuntan directamente al archivo
+    (solo lectura) y las categóricas usan los códigos del disco.
+    """
+    with open(os.path.join(directorio, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != VERSION_FORMATO:
+        raise ValueError(f"Versión de formato columnar no soportada: {meta.get('version')}")
+
+    filas = meta['filas']
+    datos = {}
+    for col in meta['columnas']:
+        ruta = os.path.join(directorio, f'{col}.bin')
+        tipo = np.dtype(meta['tipos'][col])
+        if mmap and filas > 0:
+            valores = np.memmap(ruta, dtype=tipo, mode='r', shape=(filas,))
+        else:
+            valores = np.fromfile(ruta, dtype=tipo, count=filas)
+        if col in meta['categorias']:
+            valores = pd.Categorical.from_codes(valores, categories=meta['categorias'][col])
+        datos[col] = valores
+
+    return pd.DataFrame(datos, columns=meta['columnas'], copy=False)
+
+
+def cargar_dataset(ruta_csv=RUTA_DATASET, directorio=None, mmap=True):
+    """Carga el dataset limpio, prefiriendo el formato columnar
+
+    Se usa el CSV si no existe el formato columnar, si está dañado o si el
+    CSV es más reciente (el columnar quedaría desactualizado).
+    """
+    directorio = directorio or ruta_columnar(ruta_csv)
+    meta = os.path.join(directorio, 'meta.json')
+    with tramo('cargar_dataset'):
+        if os.path.exists(meta) and not (
+                os.path.exists(ruta_csv) and os.path.getmtime(ruta_csv) > os.path.getmtime(meta)):
+            try:
+                return cargar_columnar(directorio, mmap=mmap)
+            except (OSError, ValueError, KeyError):
+                pass
+        return pd.read_csv(ruta_csv)
+
+
+def main(argv=None):
+    """Convierte el dataset limpio CSV al formato columnar"""
+    parser = argparse.ArgumentParser(description="Convierte dataset_limpio.csv al formato columnar")
+    parser.add_argument('--dataset', default=RUTA_DATASET)
+    parser.add_argument('--salida', default=None,
+                        help="Directorio de salida (por defecto, junto al CSV)")
+    args = parser.parse_args(argv)
+
+    salida = args.salida or ruta_columnar(args.dataset)
+    df = pd.read_csv(args.dataset)
+    guardar_columnar(df, salida)
+    print(f" Formato columnar guardado en {salida}: {len(df):,} filas x {len(df.columns)} columnas")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
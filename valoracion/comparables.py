@@ -0,0 +1,141 @@
+"""
+Sales-Predictor - Índice de propiedades comparables
+Búsqueda de propiedades similares (misma ciudad y tipo, área ±20%) sin recorrer el dataset
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .instrumentacion import medir
+
+
+TOLERANCIA_AREA = 0.2
+RADIO_TIERRA_KM = 6371.0
+
+ResumenComparables = namedtuple('ResumenComparables', ['cantidad', 'promedio', 'minimo', 'maximo'])
+
+
+def distancia_km(latitud, longitud, latitudes, longitudes):
+    """Distancia haversine (km) de un punto a arrays de coordenadas"""
+    lat1, lon1 = np.radians(latitud), np.radians(longitud)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(a))
+
+
+class _Grupo:
+    """Propiedades de una (ciudad, tipo_propiedad) ordenadas por área"""
+
+    __slots__ = ('area', 'precio', 'acumulado', 'latitud', 'longitud')
+
+    def __init__(self, area, precio, latitud, longitud):
+        # Los arrays llegan ya ordenados por área
+        self.area = area
+        self.precio = precio
+        self.latitud = latitud
+        self.longitud = longitud
+        # Suma acumulada con un cero inicial: suma(lo:hi) = acumulado[hi] - acumulado[lo]
+        self.acumulado = np.concatenate(([0.0], np.cumsum(self.precio)))
+
+
+def _codigos(columna):
+    """(códigos, categorías) de una columna; -1 para los valores faltantes"""
+    if isinstance(columna.dtype, pd.CategoricalDtype):
+        return columna.cat.codes.to_numpy(dtype=np.int64), columna.cat.categories
+    return pd.factorize(columna)
+
+
+class IndiceComparables:
+    """Índice por (ciudad, tipo_propiedad) con arrays ordenados por área
+
+    Una consulta es un acceso al diccionario más dos búsquedas binarias;
+    el promedio sale de las sumas acumuladas y el mínimo/máximo del tramo.
+    """
+
+    def __init__(self, grupos):
+        self._grupos = grupos
+
+    @classmethod
+    @medir('indice_comparables')
+    def desde_dataframe(cls, df):
+        """Construye el índice a partir del dataset limpio"""
+        # Un solo ordenamiento por (grupo, área) en lugar de un groupby: cada
+        # grupo queda como un tramo contiguo, ya ordenado por área
+        codigos_ciudad, ciudades = _codigos(df['ciudad'])
+        codigos_tipo, tipos = _codigos(df['tipo_propiedad'])
+        validas = np.flatnonzero((codigos_ciudad >= 0) & (codigos_tipo >= 0))
+        clave = codigos_ciudad[validas] * len(tipos) + codigos_tipo[validas]
+        area = df['area'].to_numpy(dtype=np.float64)[validas]
+        orden = np.lexsort((area, clave))
+        filas = validas[orden]
+        clave = clave[orden]
+
+        columnas = [df[col].to_numpy(dtype=np.float64)[filas] for col in ('area', 'precio', 'latitud', 'longitud')]
+        cortes = np.flatnonzero(np.diff(clave)) + 1
+        inicios = np.concatenate(([0], cortes)) if len(clave) else cortes
+        grupos = {}
+        for lo, hi in zip(inicios, np.concatenate((cortes, [len(clave)]))):
+            c = int(clave[lo])
+            grupos[(ciudades[c // len(tipos)], tipos[c % len(tipos)])] = _Grupo(*(col[lo:hi] for col in columnas))
+        return cls(grupos)
+
+    def __len__(self):
+        return sum(len(g.area) for g in self._grupos.values())
+
+    def _tramo(self, ciudad, tipo_propiedad, area, tolerancia):
+        grupo = self._grupos.get((ciudad, tipo_propiedad))
+        if grupo is None:
+            return None, 0, 0
+        lo = np.searchsorted(grupo.area, area * (1 - tolerancia), side='left')
+        hi = np.searchsorted(grupo.area, area * (1 + tolerancia), side='right')
+        return grupo, lo, hi
+
+    @medir('comparables')
+    def similares(self, ciudad, tipo_propiedad, area, tolerancia=TOLERANCIA_AREA):
+        """Resumen de precios de propiedades similares, o None si no hay ninguna"""
+        grupo, lo, hi = self._tramo(ciudad, tipo_propiedad, area, tolerancia)
+        if hi <= lo:
+            return None
+        precios = grupo.precio[lo:hi]
+        return ResumenComparables(
+            cantidad=int(hi - lo),
+            promedio=float((grupo.acumulado[hi] - grupo.acumulado[lo]) / (hi - lo)),
+            minimo=float(precios.min()),
+            maximo=float(precios.max()),
+        )
+
+    def mas_cercanos(self, ciudad, tipo_propiedad, latitud, longitud, k=5,
+                     area=None, tolerancia=TOLERANCIA_AREA):
+        """Las k propiedades del mismo grupo más cercanas geográficamente
+
+        Si se indica `area`, solo se consideran las de área similar.
+        Devuelve un DataFrame ordenado por distancia.
+        """
+        columnas = ['area', 'precio', 'latitud', 'longitud', 'distancia_km']
+        grupo = self._grupos.get((ciudad, tipo_propiedad))
+        if grupo is None:
+            return pd.DataFrame(columns=columnas)
+
+        if area is None:
+            lo, hi = 0, len(grupo.area)
+        else:
+            _, lo, hi = self._tramo(ciudad, tipo_propiedad, area, tolerancia)
+        if hi <= lo:
+            return pd.DataFrame(columns=columnas)
+
+        distancias = distancia_km(latitud, longitud, grupo.latitud[lo:hi], grupo.longitud[lo:hi])
+        k = min(k, len(distancias))
+        cercanos = np.argpartition(distancias, k - 1)[:k]
+        cercanos = cercanos[np.argsort(distancias[cercanos], kind='stable')]
+        indices = cercanos + lo
+
+        return pd.DataFrame({
+            'area': grupo.area[indices],
+            'precio': grupo.precio[indices],
+            'latitud': grupo.latitud[indices],
+            'longitud': grupo.longitud[indices],
+            'distancia_km': distancias[cercanos],
+        })
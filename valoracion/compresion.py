@@ -0,0 +1,261 @@
+"""
+Sales-Predictor - Compresión del bosque
+Genera variantes más pequeñas del modelo y compara precisión, tamaño y latencia
+
+Variantes (todas sobre el bosque compacto de valoracion.bosque):
+    arboles-N        solo los primeros N árboles
+    profundidad-D    árboles cortados a profundidad D (el nodo cortado predice su media)
+    fusion-T         hojas hermanas fusionadas si sus valores difieren menos de T (relativo)
+    ...-f32          umbrales y valores en float32
+
+Los umbrales en float32 se redondean hacia abajo: como las entradas ya se
+evalúan en float32, x <= umbral da el mismo resultado y solo los valores de
+las hojas pierden precisión.
+
+Todas se evalúan sobre el conjunto de prueba del notebook con precio_m2 y
+las categorías derivados de las estadísticas publicadas, igual que al
+valorar, así que el MAPE reportado es el que se obtiene en servicio.
+
+Uso: python -m valoracion.compresion --max-mape 2.0
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from .bosque import BosqueCompacto
+from .caracteristicas import derivar_caracteristicas
+from .codificador import CodificadorOneHot, predecir
+from .columnar import cargar_dataset
+from .estadisticas import RUTA_ESTADISTICAS, cargar_estadisticas
+from .metricas import calcular_metricas, dividir_indices
+from .registro import ruta_actual
+from .rutas import RAIZ_PROYECTO, RUTA_MODELO, RUTA_DATASET
+
+
+RUTA_VARIANTES = os.path.join(RAIZ_PROYECTO, 'models', 'variantes')
+
+ARBOLES_DEFECTO = [10, 25, 50, 100]
+PROFUNDIDADES_DEFECTO = [8, 12, 16, 20]
+TOLERANCIAS_DEFECTO = [0.01, 0.05]
+
+# Filas usadas para medir la latencia de una predicción individual
+MUESTRAS_LATENCIA = 200
+
+
+def _reconstruir(bosque, raices, hoja, profundidad_maxima=None):
+    """Copia del bosque con solo los nodos alcanzables desde `raices`
+
+    `hoja` marca los nodos que pasan a ser hojas; con `profundidad_maxima`
+    también lo son todos los nodos de ese nivel. Se recorre por niveles,
+    de forma vectorizada, y los nodos se renumeran en ese orden.
+    """
+    niveles = []
+    nivel = np.asarray(raices, dtype=np.int64)
+    hoja = hoja.copy()
+    while len(nivel):
+        if profundidad_maxima is not None and len(niveles) == profundidad_maxima:
+            hoja[nivel] = True
+        niveles.append(nivel)
+        internos = nivel[~hoja[nivel]]
+        nivel = np.stack([bosque.izquierdo[internos], bosque.derecho[internos]], axis=1).ravel()
+
+    viejos = np.concatenate(niveles)
+    nuevos = np.full(bosque.n_nodos, -1, dtype=np.int64)
+    nuevos[viejos] = np.arange(len(viejos))
+    es_hoja = hoja[viejos]
+    propios = np.arange(len(viejos), dtype=np.int32)
+
+    return BosqueCompacto(
+        caracteristica=np.where(es_hoja, 0, bosque.caracteristica[viejos]).astype(np.int32),
+        umbral=np.where(es_hoja, 0, bosque.umbral[viejos]).astype(bosque.umbral.dtype),
+        izquierdo=np.where(es_hoja, propios, nuevos[bosque.izquierdo[viejos]]).astype(np.int32),
+        derecho=np.where(es_hoja, propios, nuevos[bosque.derecho[viejos]]).astype(np.int32),
+        valor=np.asarray(bosque.valor[viejos]),
+        raices=nuevos[np.asarray(raices)].astype(np.int32),
+        feature_names=list(bosque.feature_names_in_),
+        profundidad=len(niveles) - 1,
+    )
+
+
+def _hojas(bosque):
+    return bosque.izquierdo == np.arange(bosque.n_nodos)
+
+
+def recortar_arboles(bosque, n_arboles):
+    """Conserva solo los primeros n_arboles (cada uno es una muestra bootstrap independiente)"""
+    return _reconstruir(bosque, bosque.raices[:n_arboles], _hojas(bosque))
+
+
+def limitar_profundidad(bosque, profundidad):
+    """Corta los árboles a una profundidad máxima"""
+    return _reconstruir(bosque, bosque.raices, _hojas(bosque), profundidad_maxima=profundidad)
+
+
+def fusionar_hojas(bosque, tolerancia):
+    """Convierte en hoja cada nodo cuyas dos hojas hijas predicen casi lo mismo
+
+    Se repite de abajo hacia arriba mientras haya nodos que fusionar. El
+    nodo fusionado predice su propio valor (la media de sus muestras).
+    """
+    hoja = _hojas(bosque)
+    izquierdo, derecho = np.asarray(bosque.izquierdo), np.asarray(bosque.derecho)
+    valor = np.asarray(bosque.valor, dtype=np.float64)
+    while True:
+        fusionables = (~hoja & hoja[izquierdo] & hoja[derecho]
+                       & (np.abs(valor[izquierdo] - valor[derecho]) <= tolerancia * np.abs(valor)))
+        if not fusionables.any():
+            break
+        hoja |= fusionables
+    return _reconstruir(bosque, bosque.raices, hoja)
+
+
+def a_float32(bosque):
+    """Umbrales y valores en float32 (umbrales redondeados hacia abajo, sin cambiar las decisiones)"""
+    umbral = np.asarray(bosque.umbral, dtype=np.float64)
+    umbral32 = umbral.astype(np.float32)
+    redondeado_arriba = umbral32.astype(np.float64) > umbral
+    umbral32[redondeado_arriba] = np.nextafter(umbral32[redondeado_arriba], np.float32(-np.inf))
+    return BosqueCompacto(
+        caracteristica=np.asarray(bosque.caracteristica),
+        umbral=umbral32,
+        izquierdo=np.asarray(bosque.izquierdo),
+        derecho=np.asarray(bosque.derecho),
+        valor=np.asarray(bosque.valor, dtype=np.float32),
+        raices=np.asarray(bosque.raices),
+        feature_names=list(bosque.feature_names_in_),
+        profundidad=bosque.profundidad,
+    )
+
+
+def generar_variantes(bosque, arboles=ARBOLES_DEFECTO, profundidades=PROFUNDIDADES_DEFECTO,
+                      tolerancias=TOLERANCIAS_DEFECTO, float32=True):
+    """Genera las variantes como pares (nombre, bosque), empezando por el original"""
+    variantes = [('completo', bosque)]
+    variantes += [(f'arboles-{n}', recortar_arboles(bosque, n))
+                  for n in arboles if n < bosque.n_estimators]
+    variantes += [(f'profundidad-{d}', limitar_profundidad(bosque, d))
+                  for d in profundidades if d < bosque.profundidad]
+    variantes += [(f'fusion-{t:g}', fusionar_hojas(bosque, t)) for t in tolerancias]
+    if float32:
+        variantes += [(f'{nombre}-f32', a_float32(variante)) for nombre, variante in list(variantes)]
+    return variantes
+
+
+def _tamano_directorio(directorio):
+    return sum(os.path.getsize(os.path.join(directorio, f)) for f in os.listdir(directorio))
+
+
+def medir_latencia(modelo, X, muestras=MUESTRAS_LATENCIA):
+    """Latencia por fila: (ms de una predicción individual, µs por fila en lote)"""
+    filas = X[:muestras]
+    inicio = time.perf_counter()
+    for i in range(len(filas)):
+        predecir(modelo, filas[i:i + 1])
+    individual = (time.perf_counter() - inicio) / max(1, len(filas)) * 1e3
+
+    inicio = time.perf_counter()
+    predecir(modelo, X)
+    lote = (time.perf_counter() - inicio) / max(1, len(X)) * 1e6
+    return individual, lote
+
+
+def evaluar_variante(nombre, modelo, X, y, tamano_bytes):
+    """Métricas del notebook, tamaño en disco y latencia de una variante"""
+    metricas = calcular_metricas(y, predecir(modelo, X), nombre)
+    individual, lote = medir_latencia(modelo, X)
+    metricas.update({
+        'Árboles': int(modelo.n_estimators),
+        'Nodos': int(getattr(modelo, 'n_nodos', 0)) or None,
+        'Tamaño (MB)': round(tamano_bytes / 1e6, 2),
+        'Latencia individual (ms)': round(individual, 3),
+        'Latencia lote (µs/fila)': round(lote, 2),
+    })
+    return metricas
+
+
+def elegir_variante(resultados, max_mape):
+    """La variante más pequeña que cumple el presupuesto de error (o None)"""
+    candidatas = [r for r in resultados if r['Nodos'] and r['MAPE (%)'] <= max_mape]
+    return min(candidatas, key=lambda r: r['Tamaño (MB)'], default=None)
+
+
+def main(argv=None):
+    """Genera las variantes comprimidas y el reporte de precisión, tamaño y latencia"""
+    parser = argparse.ArgumentParser(description="Variantes comprimidas del Random Forest")
+    parser.add_argument('--modelo', default=RUTA_MODELO, help="Modelo publicado (se usa su versión actual en el registro)")
+    parser.add_argument('--dataset', default=RUTA_DATASET, help="Dataset limpio para evaluar")
+    parser.add_argument('--estadisticas', default=RUTA_ESTADISTICAS,
+                        help="Estadísticas publicadas, para derivar precio_m2 y las categorías")
+    parser.add_argument('--salida', default=RUTA_VARIANTES, help="Directorio de las variantes")
+    parser.add_argument('--arboles', type=int, nargs='*', default=ARBOLES_DEFECTO)
+    parser.add_argument('--profundidades', type=int, nargs='*', default=PROFUNDIDADES_DEFECTO)
+    parser.add_argument('--tolerancias', type=float, nargs='*', default=TOLERANCIAS_DEFECTO)
+    parser.add_argument('--sin-float32', action='store_true', help="No generar variantes float32")
+    parser.add_argument('--max-mape', type=float, default=None,
+                        help="Presupuesto de error: recomienda la variante más pequeña que lo cumple")
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    print("="*80)
+    print(" "*25 + " COMPRESIÓN DEL MODELO")
+    print("="*80)
+
+    # La versión actual del registro (o el archivo, si no está registrado)
+    ruta_modelo = ruta_actual(args.modelo)
+    try:
+        modelo = joblib.load(ruta_modelo)
+    except FileNotFoundError:
+        print(f" ERROR: No se encontró el modelo en '{ruta_modelo}'")
+        return 1
+
+    # Conjunto de prueba del notebook (PASO 3.3), con las variables derivadas como al valorar
+    df = cargar_dataset(args.dataset)
+    _, prueba = dividir_indices(len(df))
+    df = derivar_caracteristicas(df.iloc[prueba], cargar_estadisticas(args.estadisticas, args.dataset))
+    X = CodificadorOneHot.desde_modelo(modelo).transformar_lote(df)
+    y = df['precio'].to_numpy(dtype=np.float64)
+    print(f"\n Evaluando sobre {len(y):,} propiedades de prueba\n")
+
+    os.makedirs(args.salida, exist_ok=True)
+    resultados = [evaluar_variante('original (.pkl)', modelo, X, y, os.path.getsize(ruta_modelo))]
+
+    bosque = BosqueCompacto.desde_sklearn(modelo)
+    for nombre, variante in generar_variantes(bosque, args.arboles, args.profundidades,
+                                              args.tolerancias, not args.sin_float32):
+        directorio = os.path.join(args.salida, f'{nombre}.arboles')
+        variante.guardar(directorio)
+        resultados.append(evaluar_variante(nombre, variante, X, y, _tamano_directorio(directorio)))
+
+    print(f"   {'Variante':<22s} | MAPE    | R²     | Árboles | Tamaño (MB) | Individual (ms) | Lote (µs/fila)")
+    print(f"   {'-'*22} | ------- | ------ | ------- | ----------- | --------------- | --------------")
+    for r in resultados:
+        print(f"   {r['Modelo']:<22s} | {r['MAPE (%)']:>6.2f}% | {r['R²']:>6.4f} | {r['Árboles']:>7d} | "
+              f"{r['Tamaño (MB)']:>11.2f} | {r['Latencia individual (ms)']:>15.3f} | "
+              f"{r['Latencia lote (µs/fila)']:>14.2f}")
+
+    reporte = {'modelo': os.path.basename(ruta_modelo), 'filas_prueba': len(y), 'variantes': resultados}
+    if args.max_mape is not None:
+        elegida = elegir_variante(resultados, args.max_mape)
+        reporte['max_mape'] = args.max_mape
+        reporte['recomendada'] = elegida['Modelo'] if elegida else None
+        if elegida:
+            print(f"\n Variante recomendada (MAPE <= {args.max_mape}%): {elegida['Modelo']} "
+                  f"-> {os.path.join(args.salida, elegida['Modelo'] + '.arboles')}")
+        else:
+            print(f"\n Ninguna variante cumple MAPE <= {args.max_mape}%")
+
+    ruta_reporte = os.path.join(args.salida, 'reporte.json')
+    with open(ruta_reporte, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=1)
+    print(f"\n Reporte guardado en {ruta_reporte}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,543 @@
+"""
+Sales-Predictor - Conversación de valoración
+Lógica del chatbot (preguntas, validación y predicción) sin dependencias de interfaz gráfica
+
+La usan la interfaz Qt (ui/app_chatbot.py) y cualquier proceso sin pantalla:
+
+    from valoracion.conversacion import PredictorBot
+
+    bot = PredictorBot()
+    tipo, mensaje = bot.procesar_respuesta('85')
+
+El estado de cada conversación (paso y datos ingresados) es un
+EstadoConversacion aparte, serializable a JSON. MotorConversacion tiene el
+modelo, las estadísticas y los índices y no guarda nada de ninguna
+conversación, así que uno solo atiende a todas:
+
+    motor = MotorConversacion()
+    estado = EstadoConversacion()
+    tipo, mensaje = motor.procesar(estado, '85')
+    guardado = estado.a_dict()
+
+Para muchas sesiones concurrentes con las predicciones agrupadas, ver
+valoracion.sesiones.
+"""
+
+import re
+
+from .cache import CachePredicciones
+from .caracteristicas import caracteristicas_propiedad
+from .bosque import es_bosque
+from .codificador import CUANTILES_INTERVALO, predecir, predecir_intervalo
+from .instrumentacion import medir
+from .registro import obtener_registro
+
+
+# "6.25, -75.57" o "6.25 -75.57": coordenadas escritas en lugar de la ciudad
+_COORDENADAS = re.compile(r'^\(?\s*(-?\d+(?:\.\d+)?)\s*[,;\s]\s*(-?\d+(?:\.\d+)?)\s*\)?$')
+
+# Tipo de resultado interno: los datos están completos y falta la predicción
+PREDICCION_PENDIENTE = 'prediccion_pendiente'
+
+
+class EstadoConversacion:
+    """Paso actual y datos ingresados de una conversación (serializable a JSON)"""
+
+    __slots__ = ('step', 'data', 'esperando_coordenadas', 'coordenadas_preguntadas')
+
+    def __init__(self, step=0, data=None, esperando_coordenadas=False, coordenadas_preguntadas=False):
+        self.step = step
+        self.data = dict(data or {})
+        self.esperando_coordenadas = esperando_coordenadas
+        self.coordenadas_preguntadas = coordenadas_preguntadas
+
+    def reiniciar(self):
+        """Vuelve al primer paso para una nueva valoración"""
+        self.step = 0
+        self.data = {}
+        self.esperando_coordenadas = False
+        self.coordenadas_preguntadas = False
+
+    def a_dict(self):
+        """Representación serializable a JSON"""
+        return {
+            'step': self.step,
+            'data': {clave: float(valor) if isinstance(valor, float) else valor
+                     for clave, valor in self.data.items()},
+            'esperando_coordenadas': self.esperando_coordenadas,
+            'coordenadas_preguntadas': self.coordenadas_preguntadas,
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reconstruye el estado guardado con a_dict()"""
+        return cls(**datos)
+
+
+class MotorConversacion:
+    """Preguntas, validación y predicción del chatbot, compartidas por todas las conversaciones"""
+    
+    def __init__(self, registro=None):
+        # Registro de modelos (por defecto, el compartido del proceso para models/)
+        self.registro = registro
+        self.cargado = None
+        self.modelo = None
+        self.codificador = None
+        self.cache = None
+        self.estadisticas = None
+        self._comparables = None
+        self._espacial = None
+        self._sin_dataset = False
+        self.df = None
+        self.ciudades_validas = []
+        self.departamentos_validos = []
+        self.tipos_propiedad_validos = []
+        self.mapeo_ciudad_depto = {}
+        self.indice_ciudades = None
+        self.indice_tipos = None
+        
+        # Cargar modelo y estadísticas (el dataset se carga al pedir comparables)
+        self.cargar_modelo()
+        
+    def cargar_modelo(self):
+        """Carga el modelo y las estadísticas de referencia"""
+        try:
+            # Un solo modelo por proceso, compartido con las demás conversaciones
+            self.registro = self.registro or obtener_registro()
+            self._usar_modelo(self.registro.actual())
+        except Exception as e:
+            raise Exception(f"Error al cargar el modelo: {str(e)}")
+    
+    def _usar_modelo(self, cargado):
+        """Toma el modelo, el codificador y las estadísticas de una versión cargada del registro"""
+        self.cargado = cargado
+        self.modelo = cargado.modelo
+        self.codificador = cargado.codificador
+        # Predicciones ya hechas con este mismo modelo (se descartan al cambiar de versión)
+        if self.cache is None:
+            self.cache = CachePredicciones.para_modelo(huella=cargado.huella_cache)
+        else:
+            self.cache.invalidar(cargado.huella_cache)
+        
+        # Estadísticas de referencia precalculadas (ciudades, coordenadas, precio_m2, cuartiles)
+        self.estadisticas = cargado.estadisticas
+        self.ciudades_validas = self.estadisticas.ciudades
+        self.departamentos_validos = self.estadisticas.departamentos
+        self.tipos_propiedad_validos = self.estadisticas.tipos_propiedad
+        self.mapeo_ciudad_depto = self.estadisticas.mapeo_ciudad_depto
+        # Índices normalizados (sin tildes, por prefijo y por trigramas) para resolver nombres
+        self.indice_ciudades = self.estadisticas.indice_ciudades
+        self.indice_tipos = self.estadisticas.indice_tipos
+    
+    def _actualizar_modelo(self):
+        """Pasa a la versión nueva del modelo si se publicó una mientras el bot estaba abierto"""
+        cargado = self.registro.actual()
+        if cargado is not self.cargado:
+            self._usar_modelo(cargado)
+    
+    def cargar_indices(self):
+        """Carga el dataset y construye los índices de comparables y espacial (una sola vez)"""
+        if self._comparables is None and not self._sin_dataset:
+            # pandas solo se importa aquí: valorar una propiedad no lo necesita
+            from .columnar import cargar_dataset
+            from .comparables import IndiceComparables
+            from .espacial import IndiceEspacial
+
+            try:
+                self.df = cargar_dataset()
+                self._comparables = IndiceComparables.desde_dataframe(self.df)
+                self._espacial = IndiceEspacial.desde_dataframe(self.df)
+            except FileNotFoundError:
+                self._sin_dataset = True
+
+    @property
+    def comparables(self):
+        """Índice de propiedades similares, construido a partir del dataset en el primer uso"""
+        self.cargar_indices()
+        return self._comparables
+
+    @property
+    def espacial(self):
+        """Índice espacial (vecinos, radio y ciudad más cercana), construido en el primer uso"""
+        self.cargar_indices()
+        return self._espacial
+    
+    def get_mensaje_bienvenida(self):
+        """Mensaje de bienvenida inicial"""
+        return """🏠 ¡Bienvenido al Sistema de Valoración Inmobiliaria!
+
+Soy tu asistente virtual y te ayudaré a estimar el valor de tu propiedad usando inteligencia artificial.
+
+Voy a hacerte algunas preguntas sobre la propiedad. ¡Empecemos!
+
+📐 **¿Cuál es el área total de la propiedad en metros cuadrados (m²)?**"""
+    
+    def procesar(self, estado, respuesta):
+        """Procesa la respuesta del usuario según el paso actual de su conversación"""
+        tipo, mensaje = self.avanzar(estado, respuesta)
+        if tipo == PREDICCION_PENDIENTE:
+            return self._realizar_prediccion(estado)
+        return tipo, mensaje
+    
+    def avanzar(self, estado, respuesta):
+        """Valida la respuesta y avanza el estado, sin predecir
+
+        Cuando ya están todos los datos devuelve (PREDICCION_PENDIENTE, None)
+        y quien llama decide cómo predecir (en el momento o agrupando).
+        """
+        respuesta = respuesta.strip()
+        
+        if estado.step == 0:  # Área
+            return self._procesar_area(estado, respuesta)
+        elif estado.step == 1:  # Habitaciones
+            return self._procesar_habitaciones(estado, respuesta)
+        elif estado.step == 2:  # Baños
+            return self._procesar_banos(estado, respuesta)
+        elif estado.step == 3:  # Ciudad
+            return self._procesar_ciudad(estado, respuesta)
+        elif estado.step == 4:  # ¿Conoce coordenadas?
+            return self._procesar_coordenadas_pregunta(estado, respuesta)
+        elif estado.step == 5 and estado.esperando_coordenadas:  # Latitud
+            return self._procesar_latitud(estado, respuesta)
+        elif estado.step == 6 and estado.esperando_coordenadas:  # Longitud
+            return self._procesar_longitud(estado, respuesta)
+        elif (estado.step == 5 and not estado.esperando_coordenadas) or estado.step == 7:  # Tipo propiedad
+            return self._procesar_tipo_propiedad(estado, respuesta)
+        elif estado.step == 8:  # ¿Valorar otra?
+            return self._procesar_otra_valoracion(estado, respuesta)
+        
+        return "error", "Lo siento, algo salió mal. Por favor intenta de nuevo."
+    
+    def sugerencias(self, estado, texto, n=8):
+        """Autocompletado para el paso actual: ciudades o tipos de propiedad parecidos al texto"""
+        if estado.step == 3:
+            return self.indice_ciudades.sugerencias(texto, n)
+        if (estado.step == 5 and not estado.esperando_coordenadas) or estado.step == 7:
+            return self.indice_tipos.sugerencias(texto, n)
+        return []
+    
+    def _procesar_area(self, estado, respuesta):
+        """Procesa el área ingresada"""
+        try:
+            area = float(respuesta.replace(',', '.'))
+            if area < 10 or area > 2000:
+                return "error", "🚫 El área debe estar entre 10 y 2000 m². Por favor ingresa un valor válido."
+            
+            estado.data['area'] = area
+            estado.step = 1
+            return "success", f"✅ Perfecto, {area} m² registrados.\n\n🛏️ **¿Cuántas habitaciones tiene la propiedad?**"
+        except ValueError:
+            return "error", "❌ Parece que tu entrada no es un número válido. Por favor ingresa el área en m² (ejemplo: 85 o 120.5)"
+    
+    def _procesar_habitaciones(self, estado, respuesta):
+        """Procesa las habitaciones ingresadas"""
+        try:
+            habitaciones = int(float(respuesta))
+            if habitaciones < 0 or habitaciones > 20:
+                return "error", "🚫 El número de habitaciones debe estar entre 0 y 20. Por favor ingresa un valor válido."
+            
+            estado.data['habitaciones'] = habitaciones
+            estado.step = 2
+            return "success", f"✅ {habitaciones} habitación(es) registradas.\n\n🚿 **¿Cuántos baños tiene la propiedad?**"
+        except ValueError:
+            return "error", "❌ Por favor ingresa un número entero válido (ejemplo: 3 o 2)"
+    
+    def _procesar_banos(self, estado, respuesta):
+        """Procesa los baños ingresados"""
+        try:
+            banos = int(float(respuesta))
+            if banos < 0 or banos > 10:
+                return "error", "🚫 El número de baños debe estar entre 0 y 10. Por favor ingresa un valor válido."
+            
+            estado.data['banos'] = banos
+            estado.step = 3
+            
+            # Mostrar opciones de ciudad
+            ciudades_muestra = self.ciudades_validas[:15]
+            ciudades_texto = "\n".join([f"   {i+1}. {ciudad}" for i, ciudad in enumerate(ciudades_muestra)])
+            total_ciudades = len(self.ciudades_validas)
+            
+            mensaje = f"✅ {banos} baño(s) registrado(s).\n\n📍 **¿En qué ciudad se encuentra la propiedad?**\n\n"
+            mensaje += f"Algunas opciones ({total_ciudades} disponibles):\n{ciudades_texto}"
+            if total_ciudades > 15:
+                mensaje += f"\n   ... y {total_ciudades - 15} ciudades más"
+            mensaje += "\n\n💡 Escribe el número o el nombre de la ciudad (ejemplo: 2 o Medellín)"
+            mensaje += "\n   o las coordenadas de la propiedad (ejemplo: 6.25, -75.57)"
+            
+            return "success", mensaje
+        except ValueError:
+            return "error", "❌ Por favor ingresa un número entero válido (ejemplo: 2 o 1)"
+    
+    def _procesar_ciudad(self, estado, respuesta):
+        """Procesa la ciudad ingresada (o unas coordenadas, de las que se deduce la ciudad)"""
+        coordenadas = _COORDENADAS.match(respuesta)
+        if coordenadas:
+            return self._procesar_ubicacion(estado, float(coordenadas.group(1)), float(coordenadas.group(2)))
+        
+        ciudad_encontrada = None
+        
+        # Intentar como número primero
+        try:
+            idx = int(respuesta) - 1
+            if 0 <= idx < len(self.ciudades_validas):
+                ciudad_encontrada = self.ciudades_validas[idx]
+        except ValueError:
+            # Si no es número, búsqueda por nombre (sin tildes ni mayúsculas, o un prefijo único)
+            ciudad_encontrada = self.indice_ciudades.resolver(respuesta)
+        
+        if not ciudad_encontrada:
+            # Sugerencias ordenadas por parecido entre todas las ciudades
+            sugerencias = self.indice_ciudades.sugerencias(respuesta)
+            mensaje_error = f"❌ No encontré la ciudad '{respuesta}'."
+            if sugerencias:
+                mensaje_error += f"\n\n¿Quisiste decir alguna de estas?\n" + "\n".join([f"   • {s}" for s in sugerencias])
+            else:
+                mensaje_error += "\n\nPor favor escribe el número o el nombre completo de la ciudad."
+            return "error", mensaje_error
+        
+        estado.data['ciudad'] = ciudad_encontrada
+        estado.data['departamento'] = self.mapeo_ciudad_depto.get(ciudad_encontrada, 'Desconocido')
+        estado.step = 4
+        
+        return "success", f"✅ Ciudad: {ciudad_encontrada}, {estado.data['departamento']}\n\n🗺️ **¿Conoces las coordenadas geográficas exactas de la propiedad?**\n_(Responde 'sí' o 'no')_"
+    
+    def _procesar_ubicacion(self, estado, latitud, longitud):
+        """Ciudad y departamento a partir de las coordenadas; pasa directo al tipo de propiedad"""
+        if not (-4.3 <= latitud <= 13.5 and -79.0 <= longitud <= -66.8):
+            return "error", ("🚫 Esas coordenadas están fuera de Colombia (latitud entre -4.3 y 13.5, "
+                             "longitud entre -79.0 y -66.8). Por favor verifica los valores o escribe la ciudad.")
+        
+        ubicacion = self.espacial.ubicar(latitud, longitud) if self.espacial is not None else None
+        if ubicacion is None:
+            return "error", "❌ No puedo ubicar coordenadas sin el dataset. Por favor escribe el número o el nombre de la ciudad."
+        
+        ciudad, departamento, distancia = ubicacion
+        estado.data['ciudad'] = ciudad
+        estado.data['departamento'] = departamento or self.mapeo_ciudad_depto.get(ciudad, 'Desconocido')
+        estado.data['latitud'] = latitud
+        estado.data['longitud'] = longitud
+        estado.esperando_coordenadas = True
+        estado.coordenadas_preguntadas = True
+        estado.step = 7
+        
+        tipos_texto = "\n".join([f"   {i+1}. {tipo}" for i, tipo in enumerate(self.tipos_propiedad_validos)])
+        mensaje = f"✅ Coordenadas ({latitud}, {longitud}): {ciudad}, {estado.data['departamento']}"
+        mensaje += f" (propiedad más cercana a {distancia:.1f} km)\n\n"
+        mensaje += f"🏘️ **¿Qué tipo de propiedad es?**\n\n{tipos_texto}\n\n💡 Escribe el número o el nombre del tipo de propiedad"
+        return "success", mensaje
+    
+    def _procesar_coordenadas_pregunta(self, estado, respuesta):
+        """Procesa si el usuario conoce las coordenadas"""
+        respuesta_lower = respuesta.lower()
+        
+        if respuesta_lower in ['si', 'sí', 's', 'yes', 'y']:
+            estado.esperando_coordenadas = True
+            estado.step = 5
+            return "success", "📍 **¿Cuál es la latitud?**\n_(Debe estar entre -4.3 y 13.5 para Colombia)_"
+        elif respuesta_lower in ['no', 'n', 'nop', 'nope']:
+            estado.esperando_coordenadas = False
+            self._usar_coordenadas_promedio(estado)
+            estado.step = 5
+            
+            # Mostrar tipos de propiedad
+            tipos_texto = "\n".join([f"   {i+1}. {tipo}" for i, tipo in enumerate(self.tipos_propiedad_validos)])
+            mensaje = f"✅ Usaré coordenadas aproximadas de {estado.data['ciudad']}: ({estado.data['latitud']:.2f}, {estado.data['longitud']:.2f})\n\n"
+            mensaje += f"🏘️ **¿Qué tipo de propiedad es?**\n\n{tipos_texto}\n\n💡 Escribe el número o el nombre del tipo de propiedad"
+            
+            return "success", mensaje
+        else:
+            return "error", "❌ Por favor responde 'sí' o 'no'"
+    
+    def _procesar_latitud(self, estado, respuesta):
+        """Procesa la latitud ingresada"""
+        try:
+            latitud = float(respuesta.replace(',', '.'))
+            if latitud < -4.3 or latitud > 13.5:
+                return "error", "🚫 La latitud debe estar entre -4.3 y 13.5 para Colombia. Por favor verifica el valor."
+            
+            estado.data['latitud'] = latitud
+            estado.step = 6
+            return "success", f"✅ Latitud: {latitud}\n\n📍 **¿Cuál es la longitud?**"
+        except ValueError:
+            return "error", "❌ Por favor ingresa un número válido (ejemplo: 4.60 o -74.08)"
+    
+    def _procesar_longitud(self, estado, respuesta):
+        """Procesa la longitud ingresada"""
+        try:
+            longitud = float(respuesta.replace(',', '.'))
+            if longitud < -79.0 or longitud > -66.8:
+                return "error", "🚫 La longitud debe estar entre -79.0 y -66.8 para Colombia. Por favor verifica el valor."
+            
+            estado.data['longitud'] = longitud
+            estado.step = 7
+            
+            # Mostrar tipos de propiedad
+            tipos_texto = "\n".join([f"   {i+1}. {tipo}" for i, tipo in enumerate(self.tipos_propiedad_validos)])
+            mensaje = f"✅ Longitud: {longitud}\n\n🏘️ **¿Qué tipo de propiedad es?**\n\n{tipos_texto}\n\n💡 Escribe el número o el nombre del tipo de propiedad"
+            
+            return "success", mensaje
+        except ValueError:
+            return "error", "❌ Por favor ingresa un número válido (ejemplo: -74.08 o -75.5)"
+    
+    def _procesar_tipo_propiedad(self, estado, respuesta):
+        """Procesa el tipo de propiedad ingresado"""
+        tipo_encontrado = None
+        
+        # Intentar como número primero
+        try:
+            idx = int(respuesta) - 1
+            if 0 <= idx < len(self.tipos_propiedad_validos):
+                tipo_encontrado = self.tipos_propiedad_validos[idx]
+        except ValueError:
+            # Si no es número, buscar por nombre
+            tipo_encontrado = self.indice_tipos.resolver(respuesta)
+        
+        if not tipo_encontrado:
+            tipos_texto = "\n".join([f"   {i+1}. {tipo}" for i, tipo in enumerate(self.tipos_propiedad_validos)])
+            return "error", f"❌ Tipo de propiedad no reconocido.\n\nOpciones válidas:\n{tipos_texto}\n\n💡 Escribe el número o el nombre"
+        
+        estado.data['tipo_propiedad'] = tipo_encontrado
+        estado.step = 8
+        
+        # La predicción la hace quien llamó a avanzar()
+        return PREDICCION_PENDIENTE, None
+    
+    def _usar_coordenadas_promedio(self, estado):
+        """Usa coordenadas promedio de la ciudad"""
+        estado.data['latitud'], estado.data['longitud'] = self.estadisticas.coordenadas(estado.data['ciudad'])
+    
+    @medir('calcular_categorias')
+    def _calcular_categorias(self, estado):
+        """Calcula precio_m2 y las categorías de tamaño y precio"""
+        estado.data.update(caracteristicas_propiedad(estado.data['area'], estado.data['ciudad'], self.estadisticas))
+    
+    @medir('valoracion')
+    def _realizar_prediccion(self, estado):
+        """Realiza la predicción del precio"""
+        try:
+            guardada = self.preparar_prediccion(estado)
+            if guardada is None:
+                # Codificar directamente en el orden de columnas del modelo
+                datos_final = self.codificador.transformar(estado.data)
+                
+                # Predicción
+                prediccion, intervalo = self._predecir(datos_final)
+                self.cache.guardar(estado.data, prediccion, intervalo)
+            else:
+                prediccion, intervalo = guardada
+            
+            return "success", self.completar_prediccion(estado, prediccion, intervalo)
+            
+        except Exception as e:
+            return "error", f"❌ Error al realizar la predicción: {str(e)}\n\nPor favor intenta de nuevo."
+    
+    def preparar_prediccion(self, estado):
+        """Completa los datos derivados; devuelve (precio, intervalo) si ya está en la caché, si no None"""
+        self._actualizar_modelo()
+        
+        # Calcular categorías
+        self._calcular_categorias(estado)
+        
+        # Una propiedad ya valorada se responde desde la caché
+        return self.cache.obtener(estado.data, con_intervalo=True)
+    
+    def _predecir(self, X):
+        """Precio de una fila codificada y su intervalo (None si el modelo no es un bosque)"""
+        if not es_bosque(self.modelo):
+            return predecir(self.modelo, X)[0], None
+        prediccion, limites = predecir_intervalo(self.modelo, X)
+        return prediccion[0], tuple(limites[0])
+    
+    def completar_prediccion(self, estado, prediccion, intervalo=None):
+        """Guarda el precio en el estado y genera el mensaje de resultado"""
+        estado.data['prediccion'] = float(prediccion)
+        if intervalo is not None:
+            estado.data['intervalo'] = [float(limite) for limite in intervalo]
+        return self._generar_mensaje_resultado(estado, prediccion, intervalo)
+    
+    def _generar_mensaje_resultado(self, estado, prediccion, intervalo=None):
+        """Genera el mensaje con los resultados de la predicción"""
+        mensaje = "🎉 **VALORACIÓN COMPLETADA**\n\n"
+        mensaje += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+        mensaje += f"📋 **Resumen de la Propiedad:**\n"
+        mensaje += f"   • Tipo: {estado.data['tipo_propiedad']}\n"
+        mensaje += f"   • Área: {estado.data['area']:.0f} m²\n"
+        mensaje += f"   • Habitaciones: {estado.data['habitaciones']}\n"
+        mensaje += f"   • Baños: {estado.data['banos']}\n"
+        mensaje += f"   • Ubicación: {estado.data['ciudad']}, {estado.data['departamento']}\n"
+        mensaje += f"   • Categoría: {estado.data['categoria_tamano']} - {estado.data['categoria_precio']}\n\n"
+        mensaje += f"💰 **PRECIO ESTIMADO:** ${prediccion:,.0f} COP\n"
+        mensaje += f"💵 **Precio por m²:** ${prediccion/estado.data['area']:,.0f} COP/m²\n\n"
+        if intervalo is not None:
+            cobertura = CUANTILES_INTERVALO[1] - CUANTILES_INTERVALO[0]
+            mensaje += f"📏 **Rango probable:** ${intervalo[0]:,.0f} - ${intervalo[1]:,.0f} COP\n"
+            mensaje += f"   ({cobertura:.0%} de los árboles del modelo estiman dentro de este rango)\n\n"
+        
+        # Comparación con propiedades similares
+        if self.comparables is not None:
+            similares = self.comparables.similares(estado.data['ciudad'], estado.data['tipo_propiedad'],
+                                                   estado.data['area'])
+            
+            if similares is not None:
+                mensaje += f"📊 **Comparación con el Mercado:**\n"
+                mensaje += f"   • Propiedades similares: {similares.cantidad}\n"
+                mensaje += f"   • Precio promedio: ${similares.promedio:,.0f} COP\n"
+                mensaje += f"   • Rango: ${similares.minimo:,.0f} - ${similares.maximo:,.0f} COP\n\n"
+                
+                diferencia_prom = ((prediccion - similares.promedio) / similares.promedio) * 100
+                if abs(diferencia_prom) < 10:
+                    mensaje += f"✅ Tu propiedad está dentro del rango normal del mercado\n\n"
+                elif diferencia_prom > 0:
+                    mensaje += f"📈 Tu propiedad está {diferencia_prom:.1f}% por encima del promedio\n\n"
+                else:
+                    mensaje += f"📉 Tu propiedad está {abs(diferencia_prom):.1f}% por debajo del promedio\n\n"
+            
+            # Con coordenadas reales, las del mismo tipo y área similar alrededor de la propiedad
+            if estado.esperando_coordenadas:
+                from .espacial import RADIO_KM
+
+                cercanas = self.espacial.cercanas(estado.data['latitud'], estado.data['longitud'], RADIO_KM,
+                                                  estado.data['tipo_propiedad'], estado.data['area'])
+                if cercanas is not None:
+                    mensaje += f"📍 **Alrededor de la propiedad ({RADIO_KM:.0f} km):**\n"
+                    mensaje += f"   • Propiedades similares: {cercanas.cantidad}\n"
+                    mensaje += f"   • Precio promedio: ${cercanas.promedio:,.0f} COP\n"
+                    mensaje += f"   • Rango: ${cercanas.minimo:,.0f} - ${cercanas.maximo:,.0f} COP\n\n"
+        
+        mensaje += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+        mensaje += "¿Deseas valorar otra propiedad? (responde 'sí' o 'no')"
+        
+        return mensaje
+    
+    def _procesar_otra_valoracion(self, estado, respuesta):
+        """Procesa si el usuario quiere valorar otra propiedad"""
+        respuesta_lower = respuesta.lower()
+        
+        if respuesta_lower in ['si', 'sí', 's', 'yes', 'y']:
+            estado.reiniciar()
+            return "success", self.get_mensaje_bienvenida()
+        else:
+            return "final", "¡Gracias por usar Sales-Predictor! 🏠\n\nEspero haberte ayudado. ¡Hasta pronto! 👋"
+    
+
+
+class PredictorBot(MotorConversacion):
+    """Una conversación con su propio estado, para la interfaz Qt y los scripts"""
+    
+    def __init__(self, registro=None):
+        self.estado = EstadoConversacion()
+        super().__init__(registro)
+    
+    # El estado se expone como antes (bot.step, bot.data, ...)
+    step = property(lambda self: self.estado.step)
+    data = property(lambda self: self.estado.data)
+    esperando_coordenadas = property(lambda self: self.estado.esperando_coordenadas)
+    coordenadas_preguntadas = property(lambda self: self.estado.coordenadas_preguntadas)
+    
+    def procesar_respuesta(self, respuesta):
+        """Procesa la respuesta del usuario según el paso actual"""
+        return self.procesar(self.estado, respuesta)
+    
+    def reiniciar(self):
+        """Reinicia el bot para una nueva conversación"""
+        self.estado.reiniciar()
@@ -0,0 +1,278 @@
+"""
+Sales-Predictor - Entrenamiento sin notebook
+Regresión lineal, Random Forest y XGBoost (sección 4 del notebook) desde la línea de comandos
+
+Uso: python -m valoracion.entrenamiento --trabajadores 4
+
+Diferencias con el notebook:
+    - En lugar de GridSearchCV se usa búsqueda por mitades sucesivas
+      (HalvingRandomSearchCV): las configuraciones débiles se descartan con
+      pocas muestras y solo las mejores llegan al conjunto completo.
+    - Los procesos están acotados por --trabajadores: la búsqueda paraleliza
+      las configuraciones y cada estimador usa un solo hilo; el modelo
+      final se reentrena con todos los trabajadores.
+    - Misma división 80/20 (random_state=42), mismos espacios de
+      hiperparámetros, misma métrica (MAPE) y mismas métricas de evaluación.
+    - XGBoost usa la matriz dispersa (CSR) tal cual y scikit-learn la recibe
+      densa solo mientras sea chica (ver matriz_para); el notebook la pasa
+      siempre a DataFrame denso.
+
+Las variables son las mismas en ambos: el notebook también las prepara con
+preparar_datos (precio_m2 mediano de la ciudad, categoria_tamano con los
+límites 60/120/200 m²) y publica el modelo con guardar_modelo.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from .codificador import CodificadorOneHot, asignar_nombres, predecir
+from .columnar import cargar_dataset
+from .metricas import calcular_metricas, dividir_indices, SEMILLA
+from .rutas import RAIZ_PROYECTO, RUTA_MODELO, RUTA_DATASET
+
+
+# PASO 3.1 del notebook (categoria_precio se excluye: se deriva del precio)
+FEATURES_NUMERICAS = ['area', 'habitaciones', 'banos', 'latitud', 'longitud', 'precio_m2']
+FEATURES_CATEGORICAS = ['ciudad', 'departamento', 'tipo_propiedad', 'categoria_tamano']
+
+# Espacios de búsqueda de la sección 4 del notebook
+PARAMETROS_RF = {
+    'n_estimators': [100, 200],
+    'max_depth': [20, 30, None],
+    'min_samples_split': [2, 5],
+    'min_samples_leaf': [1, 2]
+}
+PARAMETROS_XGB = {
+    'n_estimators': [100, 200, 300],
+    'max_depth': [5, 7, 10],
+    'learning_rate': [0.01, 0.1, 0.2],
+    'subsample': [0.8, 1.0],
+    'colsample_bytree': [0.8, 1.0]
+}
+
+RUTA_REPORTE = os.path.join(RAIZ_PROYECTO, 'models', 'entrenamiento.json')
+
+PLIEGUES = 3
+METRICA_BUSQUEDA = 'neg_mean_absolute_percentage_error'
+
+# Celdas (filas x columnas) hasta las que scikit-learn entrena con la matriz densa
+MAX_CELDAS_DENSAS = 1 << 26
+
+
+def preparar_datos(df, estadisticas=None):
+    """PASOS 3.1 y 3.2: variables X codificadas con One-Hot (drop_first) y objetivo y
+
+    Devuelve (X, y, nombres): X es una CSR con las columnas que daría
+    pd.get_dummies, construida sin pasar por la matriz densa.
+    precio_m2 y las categorías se recalculan con valoracion.caracteristicas,
+    igual que al valorar: precio_m2 es la mediana de la ciudad y no el
+    precio real de cada fila. Por defecto las estadísticas salen de `df`,
+    las mismas que guarda `python -m valoracion.estadisticas`.
+    """
+    from .caracteristicas import derivar_caracteristicas
+    from .estadisticas import EstadisticasMercado
+
+    if estadisticas is None:
+        estadisticas = EstadisticasMercado.desde_dataframe(df)
+    df = derivar_caracteristicas(df, estadisticas)
+    codificador = CodificadorOneHot.desde_dataframe(df, FEATURES_NUMERICAS, FEATURES_CATEGORICAS)
+    X = codificador.transformar_lote(df, disperso=True)
+    y = df['precio'].astype(np.float64)
+    return X, y, codificador.feature_names
+
+
+def matriz_para(estimador, X):
+    """X (CSR) en la forma que conviene al estimador
+
+    XGBoost entrena directamente sobre la CSR. Los de scikit-learn reciben
+    la densa mientras quepa en MAX_CELDAS_DENSAS: su divisor para matrices
+    dispersas es varias veces más lento con columnas numéricas llenas.
+    """
+    if hasattr(estimador, 'get_booster') or X.shape[0] * X.shape[1] > MAX_CELDAS_DENSAS:
+        return X
+    return X.toarray()
+
+
+def _crear_busqueda(estimador, parametros, metodo, candidatos, trabajadores, semilla):
+    """Búsqueda con mitades sucesivas o aleatoria, sin reentrenar al final"""
+    if metodo == 'mitades':
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingRandomSearchCV
+
+        return HalvingRandomSearchCV(
+            estimador, parametros, n_candidates=candidatos, factor=3, cv=PLIEGUES,
+            scoring=METRICA_BUSQUEDA, n_jobs=trabajadores, random_state=semilla, refit=False)
+
+    from sklearn.model_selection import RandomizedSearchCV
+
+    return RandomizedSearchCV(
+        estimador, parametros, n_iter=candidatos, cv=PLIEGUES,
+        scoring=METRICA_BUSQUEDA, n_jobs=trabajadores, random_state=semilla, refit=False)
+
+
+def buscar_y_entrenar(nombre, estimador, parametros, X_train, y_train, metodo, candidatos,
+                      trabajadores, semilla=SEMILLA):
+    """Busca hiperparámetros con un hilo por estimador y reentrena el mejor con todos los trabajadores"""
+    X_train = matriz_para(estimador, X_train)
+    n_combinaciones = int(np.prod([len(v) for v in parametros.values()]))
+    candidatos = min(candidatos, n_combinaciones)
+    print(f"\n Búsqueda de hiperparámetros para {nombre}: {candidatos} de {n_combinaciones} "
+          f"combinaciones, {PLIEGUES} pliegues, {trabajadores} trabajadores")
+
+    estimador.set_params(n_jobs=1)
+    busqueda = _crear_busqueda(estimador, parametros, metodo, candidatos, trabajadores, semilla)
+    busqueda.fit(X_train, y_train)
+
+    mejor = estimador.set_params(**busqueda.best_params_, n_jobs=trabajadores)
+    mejor.fit(X_train, y_train)
+    return mejor, busqueda.best_params_
+
+
+def entrenar_modelos(df, metodo='mitades', candidatos=12, trabajadores=None, semilla=SEMILLA,
+                     incluir_xgboost=True):
+    """Entrena y evalúa los tres modelos del notebook
+
+    Devuelve (modelos, resultados): los modelos entrenados por nombre y una
+    lista con las métricas, los mejores hiperparámetros y el tiempo de cada uno.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+
+    trabajadores = trabajadores or os.cpu_count() or 1
+    X, y, nombres = preparar_datos(df)
+    entrenamiento, prueba = dividir_indices(X.shape[0], random_state=semilla)
+    X_train, X_test = X[entrenamiento], X[prueba]
+    y_train, y_test = y.iloc[entrenamiento], y.iloc[prueba]
+    print(f" Train: {X_train.shape[0]:,} | Test: {X_test.shape[0]:,} | Features: {X.shape[1]} "
+          f"({X.nnz / X.shape[0]:.1f} no nulas por fila)")
+
+    modelos = {}
+    resultados = []
+
+    def registrar(nombre, modelo, parametros, inicio):
+        # Entrenados sin DataFrame: los nombres de columnas los usa CodificadorOneHot.desde_modelo
+        modelos[nombre] = asignar_nombres(modelo, nombres)
+        metricas = calcular_metricas(y_test, predecir(modelo, matriz_para(modelo, X_test)), nombre)
+        metricas['Mejores parámetros'] = parametros
+        metricas['Tiempo (s)'] = round(time.perf_counter() - inicio, 1)
+        resultados.append(metricas)
+        print(f"   ✓ {nombre}: MAPE {metricas['MAPE (%)']:.2f}% | R² {metricas['R²']:.4f} "
+              f"({metricas['Tiempo (s)']:.1f} s)")
+
+    # MODELO 1: Regresión lineal (baseline)
+    inicio = time.perf_counter()
+    lineal = LinearRegression()
+    registrar('Regresión Lineal', lineal.fit(matriz_para(lineal, X_train), y_train), {}, inicio)
+
+    # MODELO 2: Random Forest
+    inicio = time.perf_counter()
+    rf, parametros = buscar_y_entrenar(
+        'Random Forest', RandomForestRegressor(random_state=semilla), PARAMETROS_RF,
+        X_train, y_train, metodo, candidatos, trabajadores, semilla)
+    registrar('Random Forest', rf, parametros, inicio)
+
+    # MODELO 3: XGBoost (opcional)
+    if incluir_xgboost:
+        try:
+            import xgboost as xgb
+        except ImportError:
+            print("\n  XGBoost no está instalado, se omite (pip install xgboost)")
+        else:
+            inicio = time.perf_counter()
+            modelo_xgb, parametros = buscar_y_entrenar(
+                'XGBoost', xgb.XGBRegressor(random_state=semilla), PARAMETROS_XGB,
+                X_train, y_train, metodo, candidatos, trabajadores, semilla)
+            registrar('XGBoost', modelo_xgb, parametros, inicio)
+
+    return modelos, resultados
+
+
+def guardar_modelo(modelo, ruta=RUTA_MODELO, exportar=True, nombre=None, metricas=None):
+    """Publica el modelo como una versión nueva; devuelve (versión, archivo)
+
+    Se guarda en su propio archivo junto a `ruta` (<nombre>-v<N>.pkl,
+    escritura atómica) y, si es un bosque, también su exportación compacta.
+    Por último se registra como la versión actual de `nombre` (por defecto,
+    el del archivo), con sus `metricas` de prueba si se pasan, así los
+    procesos en marcha lo toman sin reiniciarse. Los archivos de versiones
+    anteriores no se tocan.
+    """
+    import joblib
+
+    from .registro import (archivos_registrados, nombre_modelo, registrar, ruta_registro,
+                           ruta_version, siguiente_version)
+
+    nombre = nombre or nombre_modelo(ruta)
+    registro = ruta_registro(ruta)
+    version = siguiente_version(nombre, registro)
+    destino = ruta_version(ruta, nombre, version)
+    if os.path.normpath(destino) in archivos_registrados(registro):
+        raise ValueError(f"'{destino}' ya pertenece a una versión registrada")
+
+    temporal = destino + '.tmp'
+    joblib.dump(modelo, temporal)
+    os.replace(temporal, destino)
+    if exportar and hasattr(modelo, 'estimators_'):
+        from .bosque import BosqueCompacto, ruta_compacta
+        BosqueCompacto.desde_sklearn(modelo).guardar(ruta_compacta(destino))
+    return registrar(destino, nombre, registro, version, metricas), destino
+
+
+def main(argv=None):
+    """Punto de entrada del entrenamiento"""
+    parser = argparse.ArgumentParser(description="Entrena y compara los modelos del notebook")
+    parser.add_argument('--dataset', default=RUTA_DATASET)
+    parser.add_argument('--salida', default=RUTA_MODELO,
+                        help="Modelo publicado: el Random Forest se guarda junto a él como <nombre>-v<N>.pkl")
+    parser.add_argument('--reporte', default=RUTA_REPORTE, help="Métricas y parámetros (JSON)")
+    parser.add_argument('--busqueda', choices=['mitades', 'aleatoria'], default='mitades',
+                        help="Mitades sucesivas (descarta configuraciones débiles pronto) o aleatoria")
+    parser.add_argument('--candidatos', type=int, default=12,
+                        help="Configuraciones a probar por modelo")
+    parser.add_argument('--trabajadores', type=int, default=None,
+                        help="Procesos en total (por defecto, todos los núcleos)")
+    parser.add_argument('--semilla', type=int, default=SEMILLA)
+    parser.add_argument('--sin-xgboost', action='store_true')
+    args = parser.parse_args(argv)
+
+    print("="*80)
+    print(" "*25 + " ENTRENAMIENTO DE MODELOS")
+    print("="*80)
+
+    try:
+        df = cargar_dataset(args.dataset)
+    except FileNotFoundError:
+        print(f" ERROR: No se encontró el dataset en '{args.dataset}'")
+        return 1
+
+    inicio = time.perf_counter()
+    modelos, resultados = entrenar_modelos(df, args.busqueda, args.candidatos, args.trabajadores,
+                                           args.semilla, not args.sin_xgboost)
+    tiempo = time.perf_counter() - inicio
+
+    print(f"\n   {'Modelo':<25s} | MAPE    | RMSE              | MAE               | R²")
+    print(f"   {'-'*25} | ------- | ----------------- | ----------------- | ------")
+    for m in resultados:
+        print(f"   {m['Modelo']:<25s} | {m['MAPE (%)']:>6.2f}% | ${m['RMSE']:>15,.0f} | "
+              f"${m['MAE']:>15,.0f} | {m['R²']:>6.4f}")
+
+    # Igual que el notebook, se publica el Random Forest
+    metricas_rf = next(m for m in resultados if m['Modelo'] == 'Random Forest')
+    version, archivo = guardar_modelo(modelos['Random Forest'], args.salida, metricas=metricas_rf)
+    with open(args.reporte, 'w', encoding='utf-8') as f:
+        json.dump({'dataset': os.path.basename(args.dataset), 'filas': len(df),
+                   'busqueda': args.busqueda, 'tiempo_s': round(tiempo, 1),
+                   'modelos': resultados}, f, ensure_ascii=False, indent=1, default=str)
+
+    print(f"\n Random Forest guardado en {archivo} (versión {version}, {tiempo/60:.1f} minutos en total)")
+    print(f" Reporte guardado en {args.reporte}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Sales-Predictor - Índice espacial
+Vecinos más cercanos, búsqueda por radio y ciudad más cercana a partir de coordenadas
+
+Las propiedades se reparten en una grilla de celdas de CELDA_GRADOS y se
+ordenan por celda; un array de inicios (como una matriz CSR) da el tramo de
+cada celda. Las celdas de una fila de la grilla quedan contiguas, así que
+una consulta junta unos pocos tramos y solo calcula distancias haversine
+sobre ellos, sin recorrer el dataset.
+
+    espacial = IndiceEspacial.desde_dataframe(df)
+    espacial.mas_cercanas(6.25, -75.57, k=10)
+    espacial.en_radio(6.25, -75.57, radio_km=2)
+    espacial.ubicar(6.25, -75.57)      # ('Medellín', 'Antioquia', 0.3)
+"""
+
+import math
+from collections import Counter
+
+import numpy as np
+
+from .comparables import TOLERANCIA_AREA, ResumenComparables, distancia_km
+from .instrumentacion import medir
+
+
+# ~5.5 km por celda: pocas celdas por consulta en ciudad y una grilla pequeña a escala nacional
+CELDA_GRADOS = 0.05
+KM_POR_GRADO = 111.195
+RADIO_KM = 2.0
+# Propiedades más cercanas que votan la ciudad de unas coordenadas
+VECINOS_UBICACION = 5
+
+
+def _codificar(columna):
+    """(códigos int32, categorías) de una columna categórica o de texto"""
+    import pandas as pd
+
+    if isinstance(columna.dtype, pd.CategoricalDtype):
+        return columna.cat.codes.to_numpy(dtype=np.int32), list(columna.cat.categories)
+    codigos, categorias = pd.factorize(columna)
+    return codigos.astype(np.int32), list(categorias)
+
+
+class IndiceEspacial:
+    """Grilla de celdas sobre latitud/longitud con las columnas de cada propiedad"""
+
+    def __init__(self, latitud, longitud, columnas=None, celda_grados=CELDA_GRADOS):
+        latitud = np.asarray(latitud, dtype=np.float64)
+        longitud = np.asarray(longitud, dtype=np.float64)
+        validas = np.flatnonzero(np.isfinite(latitud) & np.isfinite(longitud))
+
+        self.celda = celda_grados
+        self.lat_min = float(latitud[validas].min()) if len(validas) else 0.0
+        self.lon_min = float(longitud[validas].min()) if len(validas) else 0.0
+        filas = ((latitud[validas] - self.lat_min) / self.celda).astype(np.int64)
+        cols = ((longitud[validas] - self.lon_min) / self.celda).astype(np.int64)
+        self.n_filas = int(filas.max()) + 1 if len(validas) else 0
+        self.n_columnas = int(cols.max()) + 1 if len(validas) else 0
+
+        celda = filas * self.n_columnas + cols
+        orden = np.argsort(celda, kind='stable')
+        # inicios[c]:inicios[c + 1] son las propiedades de la celda c
+        self.inicios = np.searchsorted(celda[orden], np.arange(self.n_filas * self.n_columnas + 1))
+        # Posición de cada propiedad en el DataFrame original
+        self.posiciones = validas[orden]
+        self.latitud = latitud[self.posiciones]
+        self.longitud = longitud[self.posiciones]
+        self.columnas = {nombre: valores[self.posiciones] for nombre, valores in (columnas or {}).items()}
+        self.categorias = {}
+
+    @classmethod
+    @medir('indice_espacial')
+    def desde_dataframe(cls, df, celda_grados=CELDA_GRADOS):
+        """Construye el índice a partir del dataset limpio (precio, área, ciudad, departamento y tipo)"""
+        columnas = {col: df[col].to_numpy(dtype=np.float64) for col in ('precio', 'area') if col in df}
+        categorias = {}
+        for col in ('ciudad', 'departamento', 'tipo_propiedad'):
+            if col in df:
+                columnas[col], categorias[col] = _codificar(df[col])
+        indice = cls(df['latitud'].to_numpy(dtype=np.float64), df['longitud'].to_numpy(dtype=np.float64),
+                     columnas, celda_grados)
+        indice.categorias = categorias
+        return indice
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    def _candidatos(self, latitud, longitud, celdas_lat, celdas_lon):
+        """Índices (en el orden del índice) de las celdas a ±celdas alrededor del punto"""
+        fila = math.floor((latitud - self.lat_min) / self.celda)
+        col = math.floor((longitud - self.lon_min) / self.celda)
+        f0, f1 = max(fila - celdas_lat, 0), min(fila + celdas_lat, self.n_filas - 1)
+        c0, c1 = max(col - celdas_lon, 0), min(col + celdas_lon, self.n_columnas - 1)
+        if f1 < f0 or c1 < c0:
+            return np.empty(0, dtype=np.int64)
+
+        base = np.arange(f0, f1 + 1) * self.n_columnas
+        inicio = self.inicios[base + c0]
+        largo = self.inicios[base + c1 + 1] - inicio
+        total = int(largo.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        # Concatenación vectorizada de los tramos [inicio, inicio + largo) de cada fila
+        desplazamiento = inicio - np.concatenate(([0], np.cumsum(largo)[:-1]))
+        return np.arange(total) + np.repeat(desplazamiento, largo)
+
+    def _celdas_para(self, latitud, radio_km):
+        """Celdas a cada lado que cubren radio_km en latitud y longitud"""
+        km_lat = KM_POR_GRADO * self.celda
+        grados = radio_km / KM_POR_GRADO
+        km_lon = km_lat * max(math.cos(math.radians(min(abs(latitud) + grados, 89.0))), 1e-3)
+        return math.ceil(radio_km / km_lat), math.ceil(radio_km / km_lon)
+
+    def en_radio(self, latitud, longitud, radio_km=RADIO_KM):
+        """(posiciones, distancias_km) de las propiedades a menos de radio_km, de la más cercana a la más lejana"""
+        candidatos = self._candidatos(latitud, longitud, *self._celdas_para(latitud, radio_km))
+        distancias = distancia_km(latitud, longitud, self.latitud[candidatos], self.longitud[candidatos])
+        dentro = distancias <= radio_km
+        candidatos, distancias = candidatos[dentro], distancias[dentro]
+        orden = np.argsort(distancias, kind='stable')
+        return candidatos[orden], distancias[orden]
+
+    def mas_cercanas(self, latitud, longitud, k=10):
+        """(posiciones, distancias_km) de las k propiedades más cercanas
+
+        Se amplía el cuadrado de celdas alrededor del punto hasta que la
+        k-ésima distancia queda dentro del radio que el cuadrado garantiza.
+        """
+        if not len(self) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        km_lat = KM_POR_GRADO * self.celda
+        anillo = 1
+        while True:
+            km_lon = km_lat * max(math.cos(math.radians(min(abs(latitud) + anillo * self.celda, 89.0))), 1e-3)
+            celdas_lon = max(1, math.ceil(anillo * km_lat / km_lon))
+            candidatos = self._candidatos(latitud, longitud, anillo, celdas_lon)
+            cubre_todo = (anillo >= self.n_filas and celdas_lon >= self.n_columnas)
+            if len(candidatos) >= k or cubre_todo:
+                distancias = distancia_km(latitud, longitud, self.latitud[candidatos], self.longitud[candidatos])
+                n = min(k, len(distancias))
+                cercanos = np.argpartition(distancias, n - 1)[:n] if n else np.empty(0, dtype=np.int64)
+                cercanos = cercanos[np.argsort(distancias[cercanos], kind='stable')]
+                # Todo punto fuera del cuadrado está al menos a anillo celdas de distancia
+                if cubre_todo or (n == k and distancias[cercanos[-1]] <= anillo * km_lat):
+                    return candidatos[cercanos], distancias[cercanos]
+            anillo *= 2
+
+    def _valor(self, columna, i):
+        codigo = self.columnas[columna][i]
+        return self.categorias[columna][codigo] if codigo >= 0 else None
+
+    def ubicar(self, latitud, longitud, k=VECINOS_UBICACION):
+        """(ciudad, departamento, distancia_km) más probables para unas coordenadas
+
+        Votan las k propiedades más cercanas; en un empate gana la más cercana.
+        Devuelve None si el índice está vacío o no tiene la columna ciudad.
+        """
+        if 'ciudad' not in self.columnas:
+            return None
+        cercanas, distancias = self.mas_cercanas(latitud, longitud, k)
+        if not len(cercanas):
+            return None
+        votos = Counter(self.columnas['ciudad'][cercanas].tolist())
+        maximo = max(votos.values())
+        # cercanas viene ordenada por distancia: la primera con más votos
+        elegido = next(i for i in cercanas if votos[self.columnas['ciudad'][i]] == maximo)
+        departamento = self._valor('departamento', elegido) if 'departamento' in self.columnas else None
+        distancia = float(distancias[np.flatnonzero(cercanas == elegido)[0]])
+        return self._valor('ciudad', elegido), departamento, distancia
+
+    def _filtrar(self, indices, tipo_propiedad=None, area=None, tolerancia=TOLERANCIA_AREA):
+        mascara = np.ones(len(indices), dtype=bool)
+        if tipo_propiedad is not None:
+            categorias = self.categorias.get('tipo_propiedad', [])
+            codigo = categorias.index(tipo_propiedad) if tipo_propiedad in categorias else -2
+            mascara &= self.columnas['tipo_propiedad'][indices] == codigo
+        if area is not None:
+            areas = self.columnas['area'][indices]
+            mascara &= (areas >= area * (1 - tolerancia)) & (areas <= area * (1 + tolerancia))
+        return mascara
+
+    @medir('comparables_cercanos')
+    def cercanas(self, latitud, longitud, radio_km=RADIO_KM, tipo_propiedad=None, area=None,
+                 tolerancia=TOLERANCIA_AREA):
+        """Resumen de precios de las propiedades en el radio (mismo tipo y área similar si se indican)"""
+        indices, _ = self.en_radio(latitud, longitud, radio_km)
+        indices = indices[self._filtrar(indices, tipo_propiedad, area, tolerancia)]
+        if not len(indices):
+            return None
+        precios = self.columnas['precio'][indices]
+        return ResumenComparables(
+            cantidad=int(len(precios)),
+            promedio=float(precios.mean()),
+            minimo=float(precios.min()),
+            maximo=float(precios.max()),
+        )
+
+    def a_posiciones(self, indices):
+        """Posiciones en el DataFrame original (para df.iloc) de índices devueltos por las consultas"""
+        return self.posiciones[indices]
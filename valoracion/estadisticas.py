@@ -0,0 +1,244 @@
+"""
+Sales-Predictor - Estadísticas de referencia del mercado
+Valores por ciudad y globales que se usan para completar los datos de una propiedad
+
+Se calculan una sola vez a partir de dataset_limpio.csv y se guardan en un
+archivo JSON versionado, de modo que la predicción no necesita leer el CSV.
+
+Uso: python -m valoracion.estadisticas   (regenera data/estadisticas_mercado.json)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from .instrumentacion import tramo
+from .nombres import IndiceNombres
+from .rutas import RAIZ_PROYECTO, RUTA_DATASET
+
+
+RUTA_ESTADISTICAS = os.path.join(RAIZ_PROYECTO, 'data', 'estadisticas_mercado.json')
+
+# Versión del formato del archivo; cambiarla invalida los archivos anteriores
+VERSION_ESQUEMA = 1
+
+# Valores por defecto cuando no hay dataset disponible
+LATITUD_DEFECTO = 4.6
+LONGITUD_DEFECTO = -74.0
+PRECIO_M2_DEFECTO = 3000000
+CUARTILES_PRECIO_DEFECTO = [200000000, 350000000, 600000000]
+MAPEO_CIUDAD_DEPTO_DEFECTO = {
+    'Bogotá D.C': 'Cundinamarca',
+    'Medellín': 'Antioquia',
+    'Cali': 'Valle del Cauca',
+    'Barranquilla': 'Atlántico',
+    'Cartagena': 'Bolívar'
+}
+TIPOS_PROPIEDAD_DEFECTO = ['Apartamento', 'Casa', 'Lote', 'Finca']
+
+
+class EstadisticasMercado:
+    """Coordenadas promedio, precio_m2 mediano por ciudad y cuartiles de precio"""
+
+    def __init__(self, coordenadas_ciudad, precio_m2_ciudad, precio_m2_global,
+                 cuartiles_precio, mapeo_ciudad_depto, tipos_propiedad, fuente=None):
+        # coordenadas_ciudad: {ciudad: (latitud, longitud)}
+        self.coordenadas_ciudad = coordenadas_ciudad
+        self.precio_m2_ciudad = precio_m2_ciudad
+        self.precio_m2_global = precio_m2_global
+        self.cuartiles_precio = list(cuartiles_precio)
+        self.mapeo_ciudad_depto = mapeo_ciudad_depto
+        self.tipos_propiedad = sorted(tipos_propiedad)
+        self.fuente = fuente or {}
+        self._indice_ciudades = None
+        self._indice_tipos = None
+
+    @property
+    def ciudades(self):
+        """Ciudades válidas en orden alfabético"""
+        return sorted(self.mapeo_ciudad_depto)
+
+    @property
+    def departamentos(self):
+        """Departamentos válidos en orden alfabético"""
+        return sorted(set(self.mapeo_ciudad_depto.values()))
+
+    @property
+    def indice_ciudades(self):
+        """Índice normalizado de las ciudades, para resolver nombres escritos a mano"""
+        if self._indice_ciudades is None:
+            self._indice_ciudades = IndiceNombres(self.ciudades)
+        return self._indice_ciudades
+
+    @property
+    def indice_tipos(self):
+        """Índice normalizado de los tipos de propiedad"""
+        if self._indice_tipos is None:
+            self._indice_tipos = IndiceNombres(self.tipos_propiedad)
+        return self._indice_tipos
+
+    @classmethod
+    def desde_dataframe(cls, df, fuente=None):
+        """Calcula todas las estadísticas en una sola pasada agrupada"""
+        por_ciudad = df.groupby('ciudad').agg(
+            latitud=('latitud', 'mean'),
+            longitud=('longitud', 'mean'),
+            precio_m2=('precio_m2', 'median'),
+            departamento=('departamento', 'first'),
+        )
+        coordenadas = {
+            ciudad: (float(fila.latitud), float(fila.longitud))
+            for ciudad, fila in por_ciudad.dropna(subset=['latitud', 'longitud']).iterrows()
+        }
+        return cls(
+            coordenadas_ciudad=coordenadas,
+            precio_m2_ciudad={c: float(v) for c, v in por_ciudad['precio_m2'].dropna().items()},
+            precio_m2_global=float(df['precio_m2'].median()),
+            cuartiles_precio=[float(q) for q in df['precio'].quantile([0.25, 0.5, 0.75])],
+            mapeo_ciudad_depto=por_ciudad['departamento'].to_dict(),
+            tipos_propiedad=df['tipo_propiedad'].dropna().unique().tolist(),
+            fuente=fuente,
+        )
+
+    @classmethod
+    def desde_csv(cls, ruta=RUTA_DATASET):
+        """Calcula las estadísticas leyendo el dataset limpio"""
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        fuente = {
+            'archivo': os.path.basename(ruta),
+            'sha256': hashlib.sha256(contenido).hexdigest(),
+        }
+        import pandas as pd
+
+        df = pd.read_csv(ruta)
+        fuente['filas'] = len(df)
+        return cls.desde_dataframe(df, fuente=fuente)
+
+    @classmethod
+    def por_defecto(cls):
+        """Estadísticas mínimas para operar sin dataset"""
+        return cls(
+            coordenadas_ciudad={},
+            precio_m2_ciudad={},
+            precio_m2_global=PRECIO_M2_DEFECTO,
+            cuartiles_precio=CUARTILES_PRECIO_DEFECTO,
+            mapeo_ciudad_depto=dict(MAPEO_CIUDAD_DEPTO_DEFECTO),
+            tipos_propiedad=TIPOS_PROPIEDAD_DEFECTO,
+        )
+
+    def a_dict(self):
+        """Representación serializable a JSON"""
+        return {
+            'version': VERSION_ESQUEMA,
+            'fuente': self.fuente,
+            'precio_m2_global': self.precio_m2_global,
+            'cuartiles_precio': self.cuartiles_precio,
+            'tipos_propiedad': self.tipos_propiedad,
+            'ciudades': {
+                ciudad: {
+                    'departamento': depto,
+                    'latitud': self.coordenadas_ciudad.get(ciudad, (None, None))[0],
+                    'longitud': self.coordenadas_ciudad.get(ciudad, (None, None))[1],
+                    'precio_m2': self.precio_m2_ciudad.get(ciudad),
+                }
+                for ciudad, depto in sorted(self.mapeo_ciudad_depto.items())
+            },
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reconstruye las estadísticas desde a_dict(); valida la versión del esquema"""
+        if datos.get('version') != VERSION_ESQUEMA:
+            raise ValueError(f"Versión de estadísticas no soportada: {datos.get('version')}")
+        ciudades = datos['ciudades']
+        return cls(
+            coordenadas_ciudad={c: (v['latitud'], v['longitud']) for c, v in ciudades.items()
+                                if v['latitud'] is not None and v['longitud'] is not None},
+            precio_m2_ciudad={c: v['precio_m2'] for c, v in ciudades.items()
+                              if v['precio_m2'] is not None},
+            precio_m2_global=datos['precio_m2_global'],
+            cuartiles_precio=datos['cuartiles_precio'],
+            mapeo_ciudad_depto={c: v['departamento'] for c, v in ciudades.items()},
+            tipos_propiedad=datos['tipos_propiedad'],
+            fuente=datos.get('fuente'),
+        )
+
+    def guardar(self, ruta=RUTA_ESTADISTICAS):
+        """Guarda las estadísticas en JSON (escritura atómica)"""
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.a_dict(), f, ensure_ascii=False, indent=1)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta=RUTA_ESTADISTICAS):
+        """Carga las estadísticas guardadas con guardar()"""
+        with open(ruta, encoding='utf-8') as f:
+            return cls.desde_dict(json.load(f))
+
+    def coordenadas(self, ciudad):
+        """Coordenadas promedio de la ciudad (Bogotá por defecto)"""
+        return self.coordenadas_ciudad.get(ciudad, (LATITUD_DEFECTO, LONGITUD_DEFECTO))
+
+    def precio_m2(self, ciudad):
+        """Precio por m² mediano de la ciudad (mediana global por defecto)"""
+        return self.precio_m2_ciudad.get(ciudad, self.precio_m2_global)
+
+    def departamento(self, ciudad):
+        """Departamento asociado a la ciudad"""
+        return self.mapeo_ciudad_depto.get(ciudad, 'Desconocido')
+
+    def coordenadas_lote(self, ciudades):
+        """Coordenadas promedio para una serie de ciudades (arrays latitud, longitud)"""
+        latitudes = {c: lat for c, (lat, _) in self.coordenadas_ciudad.items()}
+        longitudes = {c: lon for c, (_, lon) in self.coordenadas_ciudad.items()}
+        latitud = ciudades.map(latitudes).fillna(LATITUD_DEFECTO).to_numpy(dtype=np.float64)
+        longitud = ciudades.map(longitudes).fillna(LONGITUD_DEFECTO).to_numpy(dtype=np.float64)
+        return latitud, longitud
+
+    def precio_m2_lote(self, ciudades):
+        """Precio por m² mediano para una serie de ciudades"""
+        return ciudades.map(self.precio_m2_ciudad).fillna(self.precio_m2_global).to_numpy(dtype=np.float64)
+
+    def departamento_lote(self, ciudades):
+        """Departamentos para una serie de ciudades"""
+        return ciudades.map(self.mapeo_ciudad_depto).fillna('Desconocido')
+
+
+def cargar_estadisticas(ruta=RUTA_ESTADISTICAS, ruta_dataset=RUTA_DATASET):
+    """Carga las estadísticas precalculadas; si no existen, las calcula desde el CSV
+
+    Si tampoco hay dataset se devuelven los valores por defecto.
+    """
+    with tramo('cargar_estadisticas'):
+        try:
+            return EstadisticasMercado.cargar(ruta)
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+        try:
+            return EstadisticasMercado.desde_csv(ruta_dataset)
+        except FileNotFoundError:
+            return EstadisticasMercado.por_defecto()
+
+
+def main(argv=None):
+    """Regenera el archivo de estadísticas a partir del dataset limpio"""
+    parser = argparse.ArgumentParser(description="Genera las estadísticas de referencia del mercado")
+    parser.add_argument('--dataset', default=RUTA_DATASET)
+    parser.add_argument('--salida', default=RUTA_ESTADISTICAS)
+    args = parser.parse_args(argv)
+
+    estadisticas = EstadisticasMercado.desde_csv(args.dataset)
+    estadisticas.guardar(args.salida)
+    print(f" Estadísticas guardadas en {args.salida}: {len(estadisticas.ciudades)} ciudades, "
+          f"{estadisticas.fuente['filas']:,} propiedades")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
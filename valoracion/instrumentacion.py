@@ -0,0 +1,203 @@
+"""
+Sales-Predictor - Instrumentación
+Tramos con nombre y contadores para saber en qué etapa se va el tiempo de una valoración
+
+    from valoracion.instrumentacion import tramo, contar
+
+    with tramo('predecir'):
+        ...
+    contar('filas_codificadas', len(lote))
+
+Cada tramo acumula llamadas, tiempo total, p50/p99 y máximo; el resumen se
+consulta con resumen() o en GET /metricas del servicio HTTP.
+
+Variables de entorno (se leen al importar el módulo):
+    VALORACION_METRICAS       archivo JSONL: una línea por tramo y un resumen al salir
+    VALORACION_PERFIL         archivo .prof de cProfile (abrir con pstats o snakeviz)
+    VALORACION_PERFIL_TRAMOS  tramos a perfilar, separados por comas; si no se
+                              indica, se perfila todo el hilo principal
+"""
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+
+MAX_MUESTRAS = 1000
+
+
+class _EstadisticaTramo:
+    """Duraciones de un tramo: totales y ventana reciente para percentiles"""
+
+    __slots__ = ('llamadas', 'total', 'maximo', 'recientes')
+
+    def __init__(self, max_muestras):
+        self.llamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.recientes = deque(maxlen=max_muestras)
+
+    def registrar(self, segundos):
+        self.llamadas += 1
+        self.total += segundos
+        self.maximo = max(self.maximo, segundos)
+        self.recientes.append(segundos)
+
+    def a_dict(self):
+        ordenadas = sorted(self.recientes)
+        percentil = lambda p: ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))] * 1e3
+        return {
+            'llamadas': self.llamadas,
+            'total_ms': round(self.total * 1e3, 3),
+            'promedio_ms': round(self.total / self.llamadas * 1e3, 3),
+            'p50_ms': round(percentil(0.50), 3),
+            'p99_ms': round(percentil(0.99), 3),
+            'max_ms': round(self.maximo * 1e3, 3),
+        }
+
+
+class Instrumentacion:
+    """Registro de tramos y contadores, seguro entre hilos"""
+
+    def __init__(self, max_muestras=MAX_MUESTRAS):
+        self.max_muestras = max_muestras
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._tramos = {}
+        self._contadores = Counter()
+        self._log = None
+        self._perfil = None
+        self._perfilados = None
+        self._estadisticas_perfil = None
+
+    def configurar(self, log=None, perfil=None, tramos_perfilados=None):
+        """Activa el log estructurado (JSONL) y/o cProfile
+
+        Con `tramos_perfilados` solo se perfilan esos tramos (en cualquier
+        hilo); si no, se perfila el hilo actual desde este momento.
+        """
+        if log:
+            self._log = open(log, 'a', encoding='utf-8', buffering=1)
+        if perfil:
+            self._perfil = perfil
+            if tramos_perfilados:
+                self._perfilados = set(tramos_perfilados)
+            else:
+                perfilador = cProfile.Profile()
+                perfilador.enable()
+                atexit.register(self._guardar_perfil_global, perfilador)
+        if log or perfil:
+            atexit.register(self.cerrar)
+
+    @contextmanager
+    def tramo(self, nombre, **atributos):
+        """Mide el bloque con el nombre dado; los tramos anidados registran a su padre"""
+        pila = getattr(self._local, 'pila', None)
+        if pila is None:
+            pila = self._local.pila = []
+        padre = pila[-1] if pila else None
+        pila.append(nombre)
+
+        perfilador = None
+        if (self._perfilados is not None and nombre in self._perfilados
+                and not getattr(self._local, 'perfilando', False)):
+            # Un solo perfilador activo por hilo: los tramos anidados quedan dentro del externo
+            perfilador = cProfile.Profile()
+            self._local.perfilando = True
+            perfilador.enable()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            if perfilador is not None:
+                perfilador.disable()
+                self._local.perfilando = False
+            pila.pop()
+            with self._lock:
+                estadistica = self._tramos.get(nombre)
+                if estadistica is None:
+                    estadistica = self._tramos[nombre] = _EstadisticaTramo(self.max_muestras)
+                estadistica.registrar(segundos)
+                if perfilador is not None:
+                    self._acumular_perfil(perfilador)
+            if self._log is not None:
+                self._escribir({'tipo': 'tramo', 'nombre': nombre, 'padre': padre,
+                                'ms': round(segundos * 1e3, 3), **atributos})
+
+    def medir(self, nombre=None):
+        """Decorador: cada llamada a la función es un tramo"""
+        def decorador(funcion):
+            etiqueta = nombre or funcion.__qualname__
+
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                with self.tramo(etiqueta):
+                    return funcion(*args, **kwargs)
+            return envoltura
+        return decorador
+
+    def contar(self, nombre, cantidad=1):
+        """Suma `cantidad` al contador `nombre`"""
+        with self._lock:
+            self._contadores[nombre] += cantidad
+
+    def resumen(self):
+        """Estadísticas de todos los tramos y contadores"""
+        with self._lock:
+            return {
+                'tramos': {nombre: e.a_dict() for nombre, e in sorted(self._tramos.items())},
+                'contadores': dict(sorted(self._contadores.items())),
+            }
+
+    def reiniciar(self):
+        """Borra tramos y contadores acumulados"""
+        with self._lock:
+            self._tramos.clear()
+            self._contadores.clear()
+
+    def cerrar(self):
+        """Escribe el resumen final en el log y guarda el perfil de los tramos"""
+        if self._log is not None and not self._log.closed:
+            if self._tramos or self._contadores:
+                self._escribir({'tipo': 'resumen', **self.resumen()})
+            self._log.close()
+        if self._estadisticas_perfil is not None:
+            self._estadisticas_perfil.dump_stats(self._perfil)
+
+    def _escribir(self, registro):
+        registro = {'ts': round(time.time(), 6), 'hilo': threading.current_thread().name, **registro}
+        linea = json.dumps(registro, ensure_ascii=False, default=str)
+        with self._lock:
+            if not self._log.closed:
+                self._log.write(linea + '\n')
+
+    def _acumular_perfil(self, perfilador):
+        if self._estadisticas_perfil is None:
+            self._estadisticas_perfil = pstats.Stats(perfilador)
+        else:
+            self._estadisticas_perfil.add(perfilador)
+
+    def _guardar_perfil_global(self, perfilador):
+        perfilador.disable()
+        perfilador.dump_stats(self._perfil)
+
+
+instrumentacion = Instrumentacion()
+instrumentacion.configurar(
+    log=os.environ.get('VALORACION_METRICAS'),
+    perfil=os.environ.get('VALORACION_PERFIL'),
+    tramos_perfilados=[t for t in os.environ.get('VALORACION_PERFIL_TRAMOS', '').split(',') if t],
+)
+
+tramo = instrumentacion.tramo
+medir = instrumentacion.medir
+contar = instrumentacion.contar
+resumen = instrumentacion.resumen
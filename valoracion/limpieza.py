@@ -0,0 +1,263 @@
+"""
+Sales-Predictor - Pipeline de limpieza por bloques
+Pasos 2.2 a 2.9 del notebook aplicados al dataset crudo sin cargarlo completo en memoria
+
+Uso: python -m valoracion.limpieza --entrada data/co_properties.csv --salida data/dataset_limpio.csv
+
+El archivo se recorre dos veces por bloques:
+    1. Filtra cada bloque y acumula histogramas de habitaciones y baños por tipo
+       de propiedad, de los que salen las medianas exactas para la imputación.
+    2. Vuelve a filtrar, imputa, crea las variables derivadas y escribe el
+       resultado de forma incremental.
+La memoria queda acotada por el tamaño del bloque, no por el del archivo.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .caracteristicas import categoria_precio, categoria_tamano
+from .columnar import EscritorColumnar, ruta_columnar
+from .rutas import RAIZ_PROYECTO, RUTA_DATASET
+
+
+RUTA_CRUDO = os.path.join(RAIZ_PROYECTO, 'data', 'co_properties.csv')
+TAMANO_BLOQUE = 200_000
+
+# PASO 2.3: columnas originales -> nombres del proyecto (solo las que usa el dataset final)
+COLUMNAS_SELECCIONADAS = {
+    'price': 'precio',
+    'surface_total': 'area_total',
+    'surface_covered': 'area_construida',
+    'rooms': 'habitaciones',
+    'bedrooms': 'dormitorios',
+    'bathrooms': 'banos',
+    'lat': 'latitud',
+    'lon': 'longitud',
+    'property_type': 'tipo_propiedad',
+    'l2': 'departamento',
+    'l3': 'ciudad',
+}
+
+# Tipos explícitos para no inferirlos en cada bloque
+TIPOS_CRUDOS = {
+    'operation_type': 'category',
+    'price': 'float64',
+    'surface_total': 'float64',
+    'surface_covered': 'float64',
+    'rooms': 'float64',
+    'bedrooms': 'float64',
+    'bathrooms': 'float64',
+    'lat': 'float64',
+    'lon': 'float64',
+    'property_type': 'object',
+    'l2': 'object',
+    'l3': 'object',
+}
+
+COLUMNAS_FINALES = ['precio', 'area', 'habitaciones', 'banos', 'latitud', 'longitud', 'precio_m2',
+                    'ciudad', 'departamento', 'tipo_propiedad', 'categoria_tamano', 'categoria_precio']
+
+# Límites de precio del PASO 2.8 del notebook: categoria_precio del dataset describe el precio
+# real y no entra al modelo (al entrenar y al valorar se usa la de valoracion.caracteristicas)
+LIMITES_PRECIO = [100_000_000, 300_000_000, 600_000_000]
+
+
+def leer_bloques(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """Lee el dataset crudo por bloques, solo con las columnas necesarias"""
+    return pd.read_csv(ruta, usecols=list(TIPOS_CRUDOS), dtype=TIPOS_CRUDOS,
+                       chunksize=tamano_bloque)
+
+
+def filtrar_bloque(bloque):
+    """PASOS 2.2 a 2.6: venta, columnas, precio, área y coordenadas válidas
+
+    Devuelve el bloque ya renombrado con 'area' consolidada y
+    'habitaciones_final' (dormitorios o, si faltan, habitaciones) sin imputar.
+    """
+    # 2.2: solo operaciones de venta
+    bloque = bloque[bloque['operation_type'] == 'Venta']
+
+    # 2.3: seleccionar y renombrar
+    bloque = bloque[list(COLUMNAS_SELECCIONADAS)].rename(columns=COLUMNAS_SELECCIONADAS)
+
+    # 2.5: área construida y, si falta, área total
+    area = bloque['area_construida'].fillna(bloque['area_total'])
+    # 2.7 (consolidación): dormitorios y, si faltan, habitaciones
+    habitaciones = bloque['dormitorios'].fillna(bloque['habitaciones'])
+
+    precio = bloque['precio']
+    latitud = bloque['latitud']
+    longitud = bloque['longitud']
+    valido = (
+        # 2.4: precio entre 10M y 10,000M COP (descarta nulos y <= 0)
+        (precio >= 10_000_000) & (precio <= 10_000_000_000) &
+        # 2.5: área entre 10 y 2000 m²
+        (area >= 10) & (area <= 2000) &
+        # 2.6: coordenadas dentro de Colombia
+        (latitud >= -5) & (latitud <= 14) &
+        (longitud >= -80) & (longitud <= -66)
+    )
+
+    filtrado = bloque.loc[valido, ['precio', 'banos', 'latitud', 'longitud',
+                                   'tipo_propiedad', 'departamento', 'ciudad']]
+    filtrado.insert(1, 'area', area[valido])
+    filtrado.insert(2, 'habitaciones_final', habitaciones[valido])
+    return filtrado
+
+
+def _mediana_desde_conteo(conteo):
+    """Mediana exacta (misma convención que pandas) a partir de un histograma"""
+    total = sum(conteo.values())
+    if total == 0:
+        return np.nan
+    valores = sorted(conteo)
+    acumulado = np.cumsum([conteo[v] for v in valores])
+    i = np.searchsorted(acumulado, (total - 1) // 2, side='right')
+    j = np.searchsorted(acumulado, total // 2, side='right')
+    return (valores[i] + valores[j]) / 2
+
+
+class MedianasImputacion:
+    """Histogramas por tipo de propiedad para imputar habitaciones y baños (PASO 2.7)"""
+
+    def __init__(self):
+        # columna -> {tipo: Counter(valor -> frecuencia)}
+        self.conteos = {'habitaciones_final': {}, 'banos': {}}
+        # columna -> Counter(tipo -> nulos)
+        self.nulos = {'habitaciones_final': Counter(), 'banos': Counter()}
+
+    def actualizar(self, bloque):
+        """Acumula los valores de un bloque filtrado"""
+        tipos = bloque['tipo_propiedad'].fillna('__nulo__')
+        for col in self.conteos:
+            frecuencias = bloque[col].groupby(tipos).value_counts()
+            for (tipo, valor), n in frecuencias.items():
+                self.conteos[col].setdefault(tipo, Counter())[valor] += n
+            for tipo, n in bloque[col].isna().groupby(tipos).sum().items():
+                self.nulos[col][tipo] += int(n)
+
+    def calcular(self):
+        """Medianas por tipo y global, en el mismo orden que el notebook
+
+        La mediana global se calcula después de imputar por tipo, así que
+        incluye los valores imputados.
+        """
+        medianas = {}
+        for col, por_tipo in self.conteos.items():
+            por_tipo_mediana = {}
+            global_conteo = Counter()
+            for tipo in set(por_tipo) | set(self.nulos[col]):
+                conteo = por_tipo.get(tipo, Counter())
+                global_conteo.update(conteo)
+                if tipo == '__nulo__':
+                    continue
+                mediana = _mediana_desde_conteo(conteo)
+                por_tipo_mediana[tipo] = mediana
+                if not np.isnan(mediana) and self.nulos[col][tipo]:
+                    global_conteo[mediana] += self.nulos[col][tipo]
+            medianas[col] = (por_tipo_mediana, _mediana_desde_conteo(global_conteo))
+        return medianas
+
+
+def imputar(bloque, medianas):
+    """PASO 2.7: imputa con la mediana por tipo de propiedad y luego la global"""
+    for col, (por_tipo, mediana_global) in medianas.items():
+        valores = bloque[col]
+        if valores.isna().any():
+            valores = valores.fillna(bloque['tipo_propiedad'].map(por_tipo))
+            bloque[col] = valores.fillna(mediana_global)
+    return bloque
+
+
+def agregar_caracteristicas(bloque):
+    """PASO 2.8 y 2.9: variables derivadas y columnas finales
+
+    categoria_tamano usa los límites de la valoración (60/120/200 m²), como
+    el notebook, para que el dataset y el modelo coincidan.
+    """
+    bloque['precio_m2'] = bloque['precio'] / bloque['area']
+    bloque['ciudad'] = bloque['ciudad'].fillna('Desconocida').str.strip().str.title()
+    bloque['departamento'] = bloque['departamento'].fillna('Desconocido').str.strip().str.title()
+    bloque['categoria_tamano'] = categoria_tamano(bloque['area'].to_numpy())
+    bloque['categoria_precio'] = categoria_precio(bloque['precio'].to_numpy(), LIMITES_PRECIO)
+    bloque = bloque.rename(columns={'habitaciones_final': 'habitaciones'})
+    return bloque[COLUMNAS_FINALES]
+
+
+def limpiar_archivo(ruta_entrada=RUTA_CRUDO, ruta_salida=RUTA_DATASET,
+                    tamano_bloque=TAMANO_BLOQUE, verbose=True):
+    """Ejecuta el pipeline completo y devuelve el número de filas escritas
+
+    Además del CSV se escribe su versión columnar (ver valoracion.columnar).
+    """
+    # Pasada 1: medianas de imputación
+    inicio = time.perf_counter()
+    medianas_imputacion = MedianasImputacion()
+    filas_crudas = 0
+    for bloque in leer_bloques(ruta_entrada, tamano_bloque):
+        filas_crudas += len(bloque)
+        medianas_imputacion.actualizar(filtrar_bloque(bloque))
+    medianas = medianas_imputacion.calcular()
+    if verbose:
+        print(f"   ✓ Pasada 1: {filas_crudas:,} filas leídas, medianas calculadas "
+              f"({time.perf_counter() - inicio:.1f} s)")
+
+    # Pasada 2: limpieza, imputación y escritura incremental
+    inicio = time.perf_counter()
+    temporal = ruta_salida + '.tmp'
+    columnar = EscritorColumnar(ruta_columnar(ruta_salida))
+    total = 0
+    primero = True
+    for bloque in leer_bloques(ruta_entrada, tamano_bloque):
+        bloque = agregar_caracteristicas(imputar(filtrar_bloque(bloque), medianas))
+        bloque.to_csv(temporal, mode='w' if primero else 'a', header=primero,
+                      index=False, encoding='utf-8')
+        columnar.escribir(bloque)
+        primero = False
+        total += len(bloque)
+    if primero:
+        vacio = pd.DataFrame(columns=COLUMNAS_FINALES)
+        vacio.to_csv(temporal, index=False, encoding='utf-8')
+        columnar.escribir(vacio)
+    os.replace(temporal, ruta_salida)
+    # Después del CSV, para que el columnar no quede más antiguo que él
+    columnar.cerrar()
+    if verbose:
+        print(f"   ✓ Pasada 2: {total:,} filas escritas en {ruta_salida} "
+              f"({time.perf_counter() - inicio:.1f} s)")
+
+    return total
+
+
+def main(argv=None):
+    """Punto de entrada del pipeline de limpieza"""
+    parser = argparse.ArgumentParser(description="Limpieza por bloques del dataset crudo de propiedades")
+    parser.add_argument('--entrada', default=RUTA_CRUDO, help="Dataset crudo (co_properties.csv)")
+    parser.add_argument('--salida', default=RUTA_DATASET, help="Dataset limpio de salida")
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE,
+                        help="Filas leídas por bloque")
+    args = parser.parse_args(argv)
+
+    print("="*80)
+    print(" "*20 + " LIMPIEZA DEL DATASET (POR BLOQUES)")
+    print("="*80)
+
+    try:
+        total = limpiar_archivo(args.entrada, args.salida, args.tamano_bloque)
+    except FileNotFoundError:
+        print(f" ERROR: No se encontró el dataset crudo en '{args.entrada}'")
+        return 1
+
+    print(f"\n DATASET FINAL: {total:,} filas x {len(COLUMNAS_FINALES)} columnas")
+    print(" Recuerda regenerar las estadísticas: python -m valoracion.estadisticas")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
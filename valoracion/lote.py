@@ -0,0 +1,307 @@
+"""
+Sales-Predictor - Valoración por lotes
+Valora archivos CSV/Parquet de propiedades sin pasar por el flujo interactivo
+
+Uso: python valorar_casa.py --lote propiedades.csv --salida valoradas.csv
+     python valorar_casa.py --lote propiedades.csv --salida valoradas.csv --trabajadores 8
+     python valorar_casa.py --lote propiedades.csv --salida valoradas.csv --cuantiles 0.1 0.9
+     python valorar_casa.py --lote propiedades.csv --salida valoradas.csv --version 2
+
+El modelo es la versión actual del registro (o la de --version), con su
+hash verificado como en la aplicación y el servicio; --modelo usa en su
+lugar un archivo puntual, sin registro. A diferencia de la aplicación y el
+servicio, que valoran pocas filas a la vez con el bosque compacto, aquí se
+carga el .pkl: en bloques de miles de filas predict de scikit-learn es
+unas 3 veces más rápido (ver bosque.FILAS_SKLEARN).
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .caracteristicas import derivar_caracteristicas
+from .codificador import CodificadorOneHot, predecir, predecir_intervalo
+from .estadisticas import RUTA_ESTADISTICAS
+from .registro import (NOMBRE_DEFECTO, RUTA_REGISTRO, ModeloCargado, VersionModelo, cargar_version,
+                       nombre_modelo, resolver)
+from .rutas import RUTA_DATASET
+
+
+TAMANO_BLOQUE = 50_000
+# Bloques en vuelo por trabajador (leídos y aún no escritos); acota la memoria del modo paralelo
+BLOQUES_POR_TRABAJADOR = 2
+
+
+def compacto_para_lotes(version):
+    """False (cargar el .pkl) si la versión tiene .pkl; si solo es un bosque compacto, None"""
+    return False if os.path.isfile(version.ruta) else None
+
+
+def columnas_intervalo(cuantiles):
+    """Nombres de las columnas de cada cuantil: 0.1 -> 'precio_p10'"""
+    return [f'precio_p{q * 100:g}' for q in cuantiles]
+
+
+def advertencias(lote, estadisticas):
+    """'' por fila, o qué nombre no se reconoció tras derivar_caracteristicas
+
+    Una ciudad o un tipo que no se resolvió queda como venía y se valora
+    con los valores por defecto (coordenadas y precio_m2 globales).
+    """
+    ciudad = ~lote['ciudad'].isin(estadisticas.ciudades).to_numpy()
+    tipo = ~lote['tipo_propiedad'].isin(estadisticas.tipos_propiedad).to_numpy()
+    return np.select([ciudad & tipo, ciudad, tipo],
+                     ['ciudad y tipo no reconocidos', 'ciudad no reconocida', 'tipo no reconocido'], '')
+
+
+def valorar_lote(lote, modelo, codificador, estadisticas, cuantiles=None):
+    """Deriva, codifica (CSR) y predice un bloque completo en una sola llamada a predict
+
+    La columna 'advertencia' marca las filas con una ciudad o un tipo que
+    no se reconoció (ver advertencias). Con `cuantiles` agrega una columna
+    por cuantil de las predicciones de los árboles (ver predecir_intervalo),
+    calculadas en la misma pasada.
+    """
+    lote = derivar_caracteristicas(lote, estadisticas)
+    lote['advertencia'] = advertencias(lote, estadisticas)
+    X = codificador.transformar_lote(lote, disperso=True)
+    if not cuantiles:
+        lote['precio_estimado'] = predecir(modelo, X)
+        return lote
+
+    lote['precio_estimado'], limites = predecir_intervalo(modelo, X, cuantiles)
+    for i, columna in enumerate(columnas_intervalo(cuantiles)):
+        lote[columna] = limites[:, i]
+    return lote
+
+
+def _leer_bloques(ruta, tamano_bloque):
+    """Itera el archivo de entrada por bloques (CSV o Parquet)"""
+    if ruta.lower().endswith(('.parquet', '.pq')):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Para leer archivos Parquet instala pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(ruta).iter_batches(batch_size=tamano_bloque):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(ruta, chunksize=tamano_bloque)
+
+
+class _EscritorSalida:
+    """Escribe los bloques valorados de forma incremental (CSV o Parquet)"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.parquet = ruta.lower().endswith(('.parquet', '.pq'))
+        self._writer = None
+        self._schema = None
+        self._primero = True
+
+    def escribir(self, bloque):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if self._writer is None:
+                self._schema = tabla.schema
+                self._writer = pq.ParquetWriter(self.ruta, self._schema)
+            else:
+                tabla = tabla.cast(self._schema)
+            self._writer.write_table(tabla)
+        else:
+            bloque.to_csv(self.ruta, mode='w' if self._primero else 'a',
+                          header=self._primero, index=False, encoding='utf-8')
+        self._primero = False
+
+    def cerrar(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def valorar_archivo(ruta_entrada, ruta_salida, modelo, estadisticas,
+                    tamano_bloque=TAMANO_BLOQUE, codificador=None, cuantiles=None):
+    """Valora un archivo completo por bloques; devuelve (filas procesadas, filas con advertencia)"""
+    if codificador is None:
+        codificador = CodificadorOneHot.desde_modelo(modelo)
+
+    escritor = _EscritorSalida(ruta_salida)
+    total = no_reconocidas = 0
+    try:
+        for bloque in _leer_bloques(ruta_entrada, tamano_bloque):
+            inicio = time.perf_counter()
+            valorado = valorar_lote(bloque, modelo, codificador, estadisticas, cuantiles)
+            escritor.escribir(valorado)
+            total += len(valorado)
+            no_reconocidas += int((valorado['advertencia'] != '').sum())
+            tiempo = time.perf_counter() - inicio
+            print(f"   ✓ Bloque de {len(valorado):,} propiedades valorado en {tiempo:.2f} s "
+                  f"(total: {total:,})")
+    finally:
+        escritor.cerrar()
+
+    return total, no_reconocidas
+
+
+# Estado de cada proceso trabajador: (modelo, codificador, estadisticas)
+_trabajador = None
+
+
+def _iniciar_trabajador(version, estadisticas):
+    """Prepara el proceso trabajador una sola vez
+
+    Con 'fork' el modelo ya está en memoria (heredado del padre, copia en
+    escritura); si no, se carga el mismo artefacto verificado que en el
+    proceso principal.
+    """
+    global _trabajador
+    if _trabajador is None:
+        modelo = cargar_version(version, compacto_para_lotes(version))[0]
+        _trabajador = (modelo, CodificadorOneHot.desde_modelo(modelo), estadisticas)
+    modelo = _trabajador[0]
+    # Un proceso por núcleo: el paralelismo interno de sklearn solo compite con los demás trabajadores
+    if hasattr(modelo, 'n_jobs'):
+        modelo.n_jobs = 1
+
+
+def _valorar_en_trabajador(bloque, cuantiles=None):
+    modelo, codificador, estadisticas = _trabajador
+    return valorar_lote(bloque, modelo, codificador, estadisticas, cuantiles)
+
+
+def valorar_archivo_paralelo(ruta_entrada, ruta_salida, version, estadisticas, trabajadores=None,
+                             tamano_bloque=TAMANO_BLOQUE, bloques_por_trabajador=BLOQUES_POR_TRABAJADOR,
+                             modelo=None, cuantiles=None):
+    """Valora un archivo repartiendo los bloques entre procesos
+
+    Los resultados se escriben en el orden de entrada a medida que llegan y
+    nunca hay más de trabajadores x bloques_por_trabajador bloques en vuelo.
+    `version` es la VersionModelo a cargar en cada trabajador (o la ruta de
+    un modelo sin registrar). Si se pasa `modelo` y el sistema permite
+    'fork', los trabajadores lo heredan sin volver a cargarlo. Devuelve
+    (filas procesadas, filas con advertencia).
+    """
+    global _trabajador
+    if isinstance(version, str):
+        version = VersionModelo(nombre_modelo(version), None, version, None)
+    trabajadores = trabajadores or os.cpu_count() or 1
+    max_en_vuelo = max(1, trabajadores * bloques_por_trabajador)
+
+    if modelo is not None and 'fork' in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context('fork')
+        _trabajador = (modelo, CodificadorOneHot.desde_modelo(modelo), estadisticas)
+    else:
+        contexto = multiprocessing.get_context('spawn')
+
+    escritor = _EscritorSalida(ruta_salida)
+    total = no_reconocidas = 0
+    pendientes = deque()
+    inicio = time.perf_counter()
+
+    def escribir_siguiente():
+        nonlocal total, no_reconocidas
+        valorado = pendientes.popleft().get()
+        escritor.escribir(valorado)
+        total += len(valorado)
+        no_reconocidas += int((valorado['advertencia'] != '').sum())
+        print(f"   ✓ Bloque de {len(valorado):,} propiedades valorado "
+              f"(total: {total:,}, {total / (time.perf_counter() - inicio):,.0f} propiedades/s)")
+
+    try:
+        with contexto.Pool(trabajadores, initializer=_iniciar_trabajador,
+                           initargs=(version, estadisticas)) as pool:
+            for bloque in _leer_bloques(ruta_entrada, tamano_bloque):
+                if len(pendientes) >= max_en_vuelo:
+                    escribir_siguiente()
+                pendientes.append(pool.apply_async(_valorar_en_trabajador, (bloque, cuantiles)))
+            while pendientes:
+                escribir_siguiente()
+    finally:
+        _trabajador = None
+        escritor.cerrar()
+
+    return total, no_reconocidas
+
+
+def main(argv=None):
+    """Punto de entrada del modo por lotes"""
+    parser = argparse.ArgumentParser(
+        description="Valoración por lotes de propiedades (CSV o Parquet)")
+    parser.add_argument('--lote', required=True,
+                        help="Archivo de entrada con las columnas de dataset_limpio.csv")
+    parser.add_argument('--salida', required=True,
+                        help="Archivo de salida (.csv o .parquet) con la columna precio_estimado")
+    parser.add_argument('--version', type=int, default=None,
+                        help="Versión registrada (por defecto, la actual)")
+    parser.add_argument('--modelo', default=None,
+                        help="Archivo de modelo puntual, en lugar del registro (sin verificación de hash)")
+    parser.add_argument('--estadisticas', default=RUTA_ESTADISTICAS,
+                        help="Estadísticas de referencia precalculadas (JSON)")
+    parser.add_argument('--dataset', default=RUTA_DATASET,
+                        help="Dataset limpio, si no existen las estadísticas precalculadas")
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE,
+                        help="Propiedades por llamada a predict")
+    parser.add_argument('--trabajadores', type=int, default=1,
+                        help="Procesos para valorar bloques en paralelo (0 = todos los núcleos)")
+    parser.add_argument('--cuantiles', type=float, nargs='+', default=None,
+                        help="Agrega columnas precio_pXX con esos cuantiles de los árboles (p. ej. 0.1 0.9)")
+    args = parser.parse_args(argv)
+    if args.cuantiles and not all(0 <= q <= 1 for q in args.cuantiles):
+        parser.error("--cuantiles deben estar entre 0 y 1")
+
+    print("="*80)
+    print(" "*25 + "🏠 VALORACIÓN POR LOTES")
+    print("="*80)
+
+    try:
+        if args.modelo:
+            version = VersionModelo(nombre_modelo(args.modelo), None, args.modelo, None)
+        else:
+            version = resolver(NOMBRE_DEFECTO, args.version, RUTA_REGISTRO)
+        cargado = ModeloCargado.cargar(version, args.estadisticas, args.dataset,
+                                       compacto=compacto_para_lotes(version))
+    except FileNotFoundError:
+        print(f" ERROR: No se encontró el modelo en '{version.ruta}'")
+        return 1
+    except ValueError as e:
+        # Versión inexistente o archivo que no coincide con el hash registrado
+        print(f" ERROR: {e}")
+        return 1
+    modelo, estadisticas = cargado.modelo, cargado.estadisticas
+    print(f" Modelo: {cargado.descripcion()}")
+
+    if not os.path.exists(args.lote):
+        print(f" ERROR: No se encontró el archivo de entrada '{args.lote}'")
+        return 1
+
+    inicio = time.perf_counter()
+    try:
+        if args.trabajadores == 1:
+            total, no_reconocidas = valorar_archivo(args.lote, args.salida, modelo, estadisticas,
+                                    tamano_bloque=args.tamano_bloque, codificador=cargado.codificador,
+                                    cuantiles=args.cuantiles)
+        else:
+            print(f" Valorando con {args.trabajadores or os.cpu_count()} procesos")
+            total, no_reconocidas = valorar_archivo_paralelo(args.lote, args.salida, version, estadisticas,
+                                             args.trabajadores or None, args.tamano_bloque,
+                                             modelo=modelo, cuantiles=args.cuantiles)
+    except (ValueError, ImportError) as e:
+        print(f" ERROR: {e}")
+        return 1
+    tiempo = time.perf_counter() - inicio
+
+    print(f"\n {total:,} propiedades valoradas en {tiempo:.2f} s -> {args.salida}")
+    if no_reconocidas:
+        print(f"   {no_reconocidas:,} con ciudad o tipo no reconocidos, valoradas con los valores por "
+              f"defecto (columna 'advertencia')")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+Sales-Predictor - Métricas de evaluación
+Mismas definiciones que el PASO 3.4 del notebook (MAPE, RMSE, MAE, R²)
+"""
+
+import numpy as np
+
+
+# PASO 3.3 del notebook: 80/20 con semilla fija
+TAMANO_PRUEBA = 0.20
+SEMILLA = 42
+
+
+def calcular_metricas(y_true, y_pred, nombre_modelo="Modelo"):
+    """Calcula MAPE, RMSE, MAE y R² para un modelo"""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    errores = y_true - y_pred
+
+    mape = np.mean(np.abs(errores / y_true)) * 100
+    rmse = np.sqrt(np.mean(errores ** 2))
+    mae = np.mean(np.abs(errores))
+    r2 = 1 - np.sum(errores ** 2) / np.sum((y_true - y_true.mean()) ** 2)
+
+    return {
+        'Modelo': nombre_modelo,
+        'MAPE (%)': round(float(mape), 2),
+        'RMSE': round(float(rmse), 0),
+        'MAE': round(float(mae), 0),
+        'R²': round(float(r2), 4)
+    }
+
+
+def dividir_indices(n_filas, test_size=TAMANO_PRUEBA, random_state=SEMILLA):
+    """Índices de entrenamiento y prueba, idénticos al train_test_split del notebook"""
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(np.arange(n_filas), test_size=test_size, random_state=random_state)
@@ -0,0 +1,147 @@
+"""
+Sales-Predictor - Índice de nombres
+Resuelve ciudades y tipos de propiedad escritos a mano (sin tildes, en minúsculas, con errores)
+
+    indice = IndiceNombres(estadisticas.ciudades)
+    indice.resolver('medellin')          # 'Medellín'
+    indice.resolver('bogota')            # 'Bogotá D.C' (único nombre que empieza así)
+    indice.sugerencias('medelin')        # ['Medellín', ...]
+    indice.resolver_lote(serie, umbral=UMBRAL_LOTE)
+
+Los nombres se normalizan una sola vez (Unicode NFKD sin tildes, minúsculas,
+signos como espacios). Una consulta se resuelve con un diccionario exacto,
+después por prefijo (del nombre o de cualquiera de sus palabras) y, para
+las sugerencias, por trigramas: cada trigrama apunta a los nombres que lo
+contienen y la similitud de Dice de todos los candidatos sale de un
+np.bincount sobre esas listas.
+"""
+
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+
+
+# Similitud mínima para aceptar una corrección automática en el modo por lotes
+UMBRAL_LOTE = 0.75
+MAX_SUGERENCIAS = 5
+
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto):
+    """Texto sin tildes, en minúsculas y con los signos convertidos en un solo espacio"""
+    texto = unicodedata.normalize('NFKD', str(texto).casefold())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(' ', texto).strip()
+
+
+def trigramas(normalizado):
+    """Trigramas del texto normalizado, con relleno para que pesen el inicio y el final"""
+    relleno = f'  {normalizado} '
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceNombres:
+    """Índice normalizado de un conjunto de nombres con búsqueda exacta, por prefijo y difusa"""
+
+    def __init__(self, valores):
+        self.valores = list(dict.fromkeys(valores))
+        self.normalizados = [normalizar(v) for v in self.valores]
+        # Exacto con y sin espacios ('bogota d c' y 'bogotadc')
+        self._exacto = {}
+        for i, normalizado in enumerate(self.normalizados):
+            self._exacto.setdefault(normalizado, i)
+            self._exacto.setdefault(normalizado.replace(' ', ''), i)
+
+        # Prefijos: (nombre normalizado desde cada palabra, índice) en orden
+        self._prefijos = sorted({(' '.join(palabras[k:]), i)
+                                 for i, palabras in enumerate(n.split(' ') for n in self.normalizados)
+                                 for k in range(len(palabras))})
+        self._claves_prefijo = [clave for clave, _ in self._prefijos]
+
+        # Trigramas -> array de índices de los nombres que los contienen
+        listas = {}
+        for i, normalizado in enumerate(self.normalizados):
+            for trigrama in trigramas(normalizado):
+                listas.setdefault(trigrama, []).append(i)
+        self._trigramas = {t: np.array(ids, dtype=np.int32) for t, ids in listas.items()}
+        self._n_trigramas = np.array([len(trigramas(n)) for n in self.normalizados], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.valores)
+
+    def _por_prefijo(self, normalizado):
+        """Índices de los nombres con alguna palabra (o el nombre completo) que empieza así"""
+        inicio = bisect.bisect_left(self._claves_prefijo, normalizado)
+        encontrados = []
+        for clave, i in self._prefijos[inicio:]:
+            if not clave.startswith(normalizado):
+                break
+            encontrados.append(i)
+        return list(dict.fromkeys(encontrados))
+
+    def _similitudes(self, normalizado):
+        """Similitud de Dice por trigramas entre la consulta y todos los nombres"""
+        consulta = trigramas(normalizado)
+        listas = [self._trigramas[t] for t in consulta if t in self._trigramas]
+        if not listas:
+            return np.zeros(len(self.valores))
+        compartidos = np.bincount(np.concatenate(listas), minlength=len(self.valores))
+        return 2 * compartidos / (len(consulta) + self._n_trigramas)
+
+    def resolver(self, texto, umbral=None):
+        """Nombre canónico para el texto, o None si no hay una coincidencia clara
+
+        Se acepta la coincidencia exacta (normalizada) o un prefijo que solo
+        corresponde a un nombre. Con `umbral`, también el nombre más
+        parecido por trigramas si su similitud lo alcanza y no empata.
+        """
+        normalizado = normalizar(texto)
+        if not normalizado:
+            return None
+        i = self._exacto.get(normalizado, self._exacto.get(normalizado.replace(' ', '')))
+        if i is not None:
+            return self.valores[i]
+
+        candidatos = self._por_prefijo(normalizado)
+        if len(candidatos) == 1:
+            return self.valores[candidatos[0]]
+
+        if umbral is not None and len(self.valores):
+            similitudes = self._similitudes(normalizado)
+            orden = np.argsort(-similitudes, kind='stable')[:2]
+            mejor = similitudes[orden[0]]
+            if mejor >= umbral and (len(orden) == 1 or similitudes[orden[1]] < mejor):
+                return self.valores[orden[0]]
+        return None
+
+    def sugerencias(self, texto, n=MAX_SUGERENCIAS):
+        """Hasta n nombres ordenados por parecido (los que empiezan igual primero)"""
+        normalizado = normalizar(texto)
+        if not normalizado:
+            return self.valores[:n]
+        puntaje = self._similitudes(normalizado)
+        puntaje[self._por_prefijo(normalizado)] += 1.0
+        exacto = self._exacto.get(normalizado)
+        if exacto is not None:
+            puntaje[exacto] += 2.0
+        candidatos = np.flatnonzero(puntaje > 0)
+        orden = candidatos[np.argsort(-puntaje[candidatos], kind='stable')][:n]
+        return [self.valores[i] for i in orden]
+
+    def resolver_lote(self, textos, umbral=UMBRAL_LOTE):
+        """Resuelve una serie de textos; los que no se reconocen se dejan como vienen
+
+        Cada valor distinto se resuelve una sola vez, así miles de filas con
+        las mismas ciudades cuestan lo mismo que sus valores únicos.
+        """
+        import pandas as pd
+
+        textos = pd.Series(textos)
+        codigos, unicos = pd.factorize(textos)
+        resueltos = np.array([self.resolver(t, umbral) or t for t in unicos], dtype=object)
+        resultado = np.where(codigos >= 0, resueltos[np.maximum(codigos, 0)] if len(unicos) else None,
+                             textos.to_numpy(dtype=object))
+        return pd.Series(resultado, index=textos.index, name=textos.name)
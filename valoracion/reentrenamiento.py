@@ -0,0 +1,254 @@
+"""
+Sales-Predictor - Reentrenamiento incremental
+Agrega al modelo publicado lo aprendido de propiedades nuevas sin reentrenar desde cero
+
+Uso: python -m valoracion.reentrenamiento --nuevos data/nuevas_limpias.csv
+
+Pasos:
+    1. Deriva precio_m2 y las categorías como al valorar y separa un 20% de
+       las propiedades nuevas como validación.
+    2. Amplía el vocabulario: cada ciudad, departamento, tipo o categoría
+       que no aparece en el histórico recibe su columna dummy al final, así
+       los árboles existentes siguen siendo válidos (nunca leen las columnas nuevas).
+    3. Random Forest: agrega árboles entrenados solo con las propiedades
+       nuevas (warm_start). XGBoost: continúa el boosting con más rondas
+       (sin columnas nuevas: las categorías nuevas quedan como la base).
+    4. Compara el modelo actual y el candidato sobre la validación nueva y
+       sobre la de prueba histórica del notebook; solo publica si no empeora.
+
+El tiempo depende del tamaño de las propiedades nuevas, no del histórico.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .caracteristicas import derivar_caracteristicas
+from .codificador import CodificadorOneHot, asignar_nombres, es_disperso, predecir
+from .columnar import cargar_dataset
+from .estadisticas import RUTA_ESTADISTICAS, cargar_estadisticas
+from .entrenamiento import FEATURES_CATEGORICAS, guardar_modelo, matriz_para
+from .metricas import calcular_metricas, dividir_indices
+from .registro import nombre_modelo, ruta_actual
+from .rutas import RUTA_MODELO, RUTA_DATASET
+
+
+ARBOLES_NUEVOS = 20
+RONDAS_NUEVAS = 50
+# Puntos porcentuales de MAPE que el candidato puede empeorar sin bloquear la publicación
+TOLERANCIA_MAPE = 0.1
+
+
+def vocabulario_historico(estadisticas):
+    """Valores categóricos ya vistos en el entrenamiento, tengan o no columna
+
+    Incluye la categoría base que drop_first dejó sin columna, para no
+    confundirla con una categoría nueva.
+    """
+    from .caracteristicas import CATEGORIAS_TAMANO
+
+    return {
+        'ciudad': set(estadisticas.mapeo_ciudad_depto),
+        'departamento': set(estadisticas.mapeo_ciudad_depto.values()),
+        'tipo_propiedad': set(estadisticas.tipos_propiedad),
+        'categoria_tamano': set(CATEGORIAS_TAMANO),
+    }
+
+
+def ampliar_vocabulario(feature_names, df, conocidas=None, columnas_categoricas=FEATURES_CATEGORICAS):
+    """Nombres de columnas ampliados con las categorías nuevas de df
+
+    Una categoría es nueva si no tiene columna ni está en `conocidas`
+    (vocabulario histórico). Las columnas se agregan al final para no
+    mover las existentes.
+    """
+    codificador = CodificadorOneHot(feature_names, columnas_categoricas)
+    conocidas = conocidas or {}
+    nuevas = []
+    for col in columnas_categoricas:
+        vistas = set(codificador.categorias(col)) | conocidas.get(col, set())
+        for valor in sorted(df[col].dropna().unique()):
+            if valor not in vistas:
+                nuevas.append(f'{col}_{valor}')
+    return list(feature_names) + nuevas, nuevas
+
+
+def _ampliar_arboles(modelo, n_features):
+    """Declara los árboles existentes con el nuevo número de columnas
+
+    Los nodos no cambian (las columnas nuevas están al final); solo se
+    reconstruye cada tree_ con el nuevo n_features a partir de su estado.
+    """
+    from sklearn.tree._tree import Tree
+
+    for estimador in modelo.estimators_:
+        viejo = estimador.tree_
+        nuevo = Tree(n_features, np.ones(viejo.n_outputs, dtype=np.intp), viejo.n_outputs)
+        nuevo.__setstate__(viejo.__getstate__())
+        estimador.tree_ = nuevo
+        estimador.n_features_in_ = n_features
+
+
+def crecer_bosque(modelo, X, y, arboles_nuevos=ARBOLES_NUEVOS, max_arboles=None, trabajadores=None):
+    """Agrega árboles entrenados con (X, y) a un Random Forest ya entrenado
+
+    Con max_arboles se descartan los árboles más antiguos (ventana deslizante).
+    """
+    if X.shape[1] > modelo.n_features_in_:
+        _ampliar_arboles(modelo, X.shape[1])
+    modelo.set_params(warm_start=True, n_estimators=len(modelo.estimators_) + arboles_nuevos,
+                      n_jobs=trabajadores or os.cpu_count())
+    modelo.fit(X, y)
+    if max_arboles and len(modelo.estimators_) > max_arboles:
+        modelo.estimators_ = modelo.estimators_[-max_arboles:]
+        modelo.set_params(n_estimators=max_arboles)
+    modelo.set_params(warm_start=False)
+    return modelo
+
+
+def continuar_boosting(modelo, X, y, rondas_nuevas=RONDAS_NUEVAS):
+    """Continúa el boosting de un XGBRegressor con más rondas sobre (X, y)
+
+    Una CSR no trae nombres de columnas: se quitan del booster para
+    continuar y se vuelven a asignar al terminar.
+    """
+    nombres = list(modelo.feature_names_in_)
+    booster = modelo.get_booster()
+    if es_disperso(X):
+        booster.feature_names = None
+    modelo.set_params(n_estimators=rondas_nuevas)
+    modelo.fit(X, y, xgb_model=booster)
+    if es_disperso(X):
+        asignar_nombres(modelo, nombres)
+    return modelo
+
+
+def reentrenar(modelo, nuevos, conocidas=None, arboles_nuevos=ARBOLES_NUEVOS,
+               rondas_nuevas=RONDAS_NUEVAS, max_arboles=None, trabajadores=None):
+    """Devuelve un modelo candidato entrenado con las propiedades nuevas (modifica `modelo`)"""
+    y = nuevos['precio'].to_numpy(dtype=np.float64)
+    if hasattr(modelo, 'get_booster'):
+        codificador = CodificadorOneHot.desde_modelo(modelo)
+        if getattr(modelo, 'entrada_dispersa_', False):
+            # Entrenado sobre CSR (ausente = faltante): se continúa con la misma representación
+            X = codificador.transformar_lote(nuevos, disperso=True)
+        else:
+            X = pd.DataFrame(codificador.transformar_lote(nuevos), columns=codificador.feature_names)
+        return continuar_boosting(modelo, X, y, rondas_nuevas), []
+
+    nombres, nuevas = ampliar_vocabulario(modelo.feature_names_in_, nuevos, conocidas)
+    X = matriz_para(modelo, CodificadorOneHot(nombres).transformar_lote(nuevos, disperso=True))
+    modelo = crecer_bosque(modelo, X, y, arboles_nuevos, max_arboles, trabajadores)
+    return asignar_nombres(modelo, nombres), nuevas
+
+
+def validar(actual, candidato, conjuntos, tolerancia=TOLERANCIA_MAPE, max_mape=None):
+    """Compara ambos modelos en cada conjunto de validación
+
+    Devuelve (aprobado, filas del reporte). El candidato se aprueba si en
+    ningún conjunto empeora el MAPE en más de `tolerancia` puntos y, si se
+    indica, no supera `max_mape`.
+    """
+    aprobado = True
+    filas = []
+    for nombre, df in conjuntos.items():
+        y = df['precio'].to_numpy(dtype=np.float64)
+        m_actual, m_candidato = (
+            calcular_metricas(y, predecir(modelo, CodificadorOneHot.desde_modelo(modelo)
+                                          .transformar_lote(df, disperso=True)),
+                              f'{etiqueta} ({nombre})')
+            for modelo, etiqueta in ((actual, 'Actual'), (candidato, 'Candidato'))
+        )
+        filas += [m_actual, m_candidato]
+        if m_candidato['MAPE (%)'] > m_actual['MAPE (%)'] + tolerancia:
+            aprobado = False
+        if max_mape is not None and m_candidato['MAPE (%)'] > max_mape:
+            aprobado = False
+    return aprobado, filas
+
+
+def main(argv=None):
+    """Punto de entrada del reentrenamiento incremental"""
+    parser = argparse.ArgumentParser(description="Reentrenamiento incremental con propiedades nuevas")
+    parser.add_argument('--nuevos', required=True, help="Propiedades nuevas ya limpias (columnas de dataset_limpio.csv)")
+    parser.add_argument('--modelo', default=RUTA_MODELO,
+                        help="Modelo publicado (se parte de su versión actual en el registro)")
+    parser.add_argument('--salida', default=None,
+                        help="Dónde publicar: la versión nueva se guarda junto a este archivo (por defecto, --modelo)")
+    parser.add_argument('--dataset', default=RUTA_DATASET,
+                        help="Dataset histórico, para validar también sobre su conjunto de prueba")
+    parser.add_argument('--estadisticas', default=RUTA_ESTADISTICAS,
+                        help="Estadísticas del histórico (vocabulario ya conocido)")
+    parser.add_argument('--arboles-nuevos', type=int, default=ARBOLES_NUEVOS)
+    parser.add_argument('--max-arboles', type=int, default=None,
+                        help="Máximo de árboles; se descartan los más antiguos")
+    parser.add_argument('--rondas-nuevas', type=int, default=RONDAS_NUEVAS, help="Solo XGBoost")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_MAPE,
+                        help="Puntos de MAPE que el candidato puede empeorar")
+    parser.add_argument('--max-mape', type=float, default=None)
+    parser.add_argument('--trabajadores', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    print("="*80)
+    print(" "*22 + " REENTRENAMIENTO INCREMENTAL")
+    print("="*80)
+
+    # Se parte de la versión actual del registro (o del archivo, si no está registrado)
+    ruta_modelo = ruta_actual(args.modelo)
+    try:
+        actual = joblib.load(ruta_modelo)
+        nuevos = pd.read_csv(args.nuevos)
+    except FileNotFoundError as e:
+        print(f" ERROR: No se encontró '{e.filename}'")
+        return 1
+
+    # Variables derivadas como al valorar, con las estadísticas publicadas
+    estadisticas = cargar_estadisticas(args.estadisticas, args.dataset)
+    nuevos = derivar_caracteristicas(nuevos, estadisticas)
+    entrenamiento, validacion = dividir_indices(len(nuevos))
+    conjuntos = {'nuevos': nuevos.iloc[validacion]}
+    try:
+        historico = cargar_dataset(args.dataset)
+        prueba = historico.iloc[dividir_indices(len(historico))[1]]
+        conjuntos['histórico'] = derivar_caracteristicas(prueba, estadisticas)
+    except FileNotFoundError:
+        print("  Sin dataset histórico: se valida solo con las propiedades nuevas")
+
+    inicio = time.perf_counter()
+    conocidas = vocabulario_historico(estadisticas)
+    candidato, nuevas = reentrenar(joblib.load(ruta_modelo), nuevos.iloc[entrenamiento], conocidas,
+                                   args.arboles_nuevos, args.rondas_nuevas,
+                                   args.max_arboles, args.trabajadores)
+    print(f" Candidato entrenado con {len(entrenamiento):,} propiedades nuevas en "
+          f"{time.perf_counter() - inicio:.1f} s")
+    if nuevas:
+        print(f"   • {len(nuevas)} columnas nuevas: {', '.join(nuevas[:10])}{'...' if len(nuevas) > 10 else ''}")
+
+    aprobado, filas = validar(actual, candidato, conjuntos, args.tolerancia, args.max_mape)
+    print(f"\n   {'Modelo':<25s} | MAPE    | R²")
+    print(f"   {'-'*25} | ------- | ------")
+    for m in filas:
+        print(f"   {m['Modelo']:<25s} | {m['MAPE (%)']:>6.2f}% | {m['R²']:>6.4f}")
+
+    if not aprobado:
+        print("\n El candidato empeora la validación: NO se publica")
+        return 2
+
+    salida = args.salida or args.modelo
+    # Se publica como una versión nueva del mismo modelo, en el directorio de --salida
+    # Con la versión se guardan las métricas del candidato (sobre el histórico si se validó con él)
+    metricas = [m for m in filas if m['Modelo'].startswith('Candidato')][-1]
+    version, archivo = guardar_modelo(candidato, salida, nombre=nombre_modelo(args.modelo), metricas=metricas)
+    print(f"\n Modelo publicado en {archivo} (versión {version} de '{nombre_modelo(args.modelo)}')")
+    print(" Recuerda regenerar las estadísticas si hay ciudades nuevas: python -m valoracion.estadisticas")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
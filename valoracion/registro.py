@@ -0,0 +1,431 @@
+"""
+Sales-Predictor - Registro de modelos
+Resuelve el modelo por nombre y versión, verifica su hash y lo mantiene cargado una sola vez por proceso
+
+    registro = obtener_registro()
+    cargado = registro.actual()            # modelo, codificador y estadísticas de la versión actual
+    cargado = registro.actual(version=2)   # una versión fija (no se recarga)
+
+El registro (models/registro.json) guarda, por nombre de modelo, sus
+versiones: archivo, SHA-256 (del .pkl y, si se exportó, del bosque
+compacto) y fecha. entrenamiento.guardar_modelo escribe cada modelo que
+publica en su propio archivo (models/<nombre>-v<N>.pkl y su .arboles), lo
+registra y lo marca como la versión actual; los archivos de versiones ya
+registradas no se sobrescriben, así que volver a una anterior siempre es
+posible. Se carga y se sirve solo el artefacto cuyo hash se verificó. Un
+nombre sin registrar resuelve a models/<nombre>.pkl sin verificación.
+
+actual() sin versión sigue a la versión actual: como mucho cada
+INTERVALO_REVISION segundos compara la firma (tamaño y fecha) del registro,
+del modelo, del bosque compacto y de las estadísticas. Si cambió y sigue
+igual en la revisión siguiente (la publicación terminó de escribirse),
+carga el modelo nuevo en el hilo que revisa, verifica el hash y lo
+reemplaza con una sola asignación. Los demás hilos siguen con el anterior
+mientras tanto, y quien lo tenga lo usa hasta soltarlo. Si la carga o la
+verificación fallan, se sigue con el anterior.
+
+Uso: python -m valoracion.registro                  (modelos y versiones registradas)
+     python -m valoracion.registro --registrar models/random_forest_model.pkl
+     python -m valoracion.registro --registrar models/variantes/arboles-50.arboles --nombre random_forest_model
+     python -m valoracion.registro --activar 2      (vuelve a la versión 2)
+     python -m valoracion.registro --verificar      (compara el hash de cada versión)
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from .bosque import BosqueCompacto, cargar_modelo, ruta_compacta
+from .cache import huella_modelo, huella_valoracion
+from .codificador import CodificadorOneHot
+from .estadisticas import RUTA_ESTADISTICAS, cargar_estadisticas
+from .instrumentacion import contar
+from .rutas import RUTA_MODELO, RUTA_DATASET
+
+
+VERSION_FORMATO = 1
+INTERVALO_REVISION = 2.0
+
+
+def nombre_modelo(ruta_modelo):
+    """Nombre con el que se registra un modelo: el de su archivo sin extensión"""
+    return os.path.splitext(os.path.basename(ruta_modelo))[0]
+
+
+def ruta_registro(ruta_modelo):
+    """Registro del directorio donde está el modelo"""
+    return os.path.join(os.path.dirname(os.path.abspath(ruta_modelo)), 'registro.json')
+
+
+NOMBRE_DEFECTO = nombre_modelo(RUTA_MODELO)
+RUTA_REGISTRO = ruta_registro(RUTA_MODELO)
+
+VersionModelo = namedtuple('VersionModelo',
+                           ['nombre', 'version', 'ruta', 'sha256', 'sha256_compacto', 'metricas'],
+                           defaults=(None, None))
+
+# Métricas de prueba que se guardan con cada versión (claves de metricas.calcular_metricas)
+METRICAS_REGISTRADAS = ('MAPE (%)', 'R²')
+
+
+def ruta_version(ruta_modelo, nombre, version):
+    """Archivo propio de una versión: <directorio del modelo>/<nombre>-v<N>.pkl"""
+    return os.path.join(os.path.dirname(os.path.abspath(ruta_modelo)), f'{nombre}-v{version}.pkl')
+
+
+def leer_registro(ruta=RUTA_REGISTRO):
+    """Contenido del registro (vacío si todavía no existe)"""
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            registro = json.load(f)
+    except FileNotFoundError:
+        return {'version': VERSION_FORMATO, 'modelos': {}}
+    if registro.get('version') != VERSION_FORMATO:
+        raise ValueError(f"Versión de registro no soportada: {registro.get('version')}")
+    return registro
+
+
+def _escribir_registro(registro, ruta):
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(registro, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)
+
+
+def siguiente_version(nombre=NOMBRE_DEFECTO, ruta=RUTA_REGISTRO):
+    """Número que recibirá la próxima versión registrada del modelo"""
+    entrada = leer_registro(ruta)['modelos'].get(nombre, {'versiones': {}})
+    return max(map(int, entrada['versiones']), default=0) + 1
+
+
+def archivos_registrados(ruta=RUTA_REGISTRO):
+    """Rutas absolutas de los archivos de todas las versiones registradas"""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    return {os.path.normpath(os.path.join(directorio, datos['archivo']))
+            for entrada in leer_registro(ruta)['modelos'].values()
+            for datos in entrada['versiones'].values()}
+
+
+def _hash_compacto(ruta_modelo):
+    """SHA-256 del bosque compacto del modelo, si existe y no es más antiguo que el .pkl"""
+    meta = os.path.join(ruta_compacta(ruta_modelo), 'meta.json')
+    if not os.path.exists(meta) or (
+            os.path.exists(ruta_modelo) and os.path.getmtime(ruta_modelo) > os.path.getmtime(meta)):
+        return None
+    return huella_modelo(ruta_compacta(ruta_modelo))
+
+
+def registrar(ruta_modelo, nombre=None, ruta=None, version=None, metricas=None):
+    """Registra el archivo como una versión nueva del modelo y la marca como actual; devuelve la versión
+
+    Con `version` se exige ese número (ValueError si ya está registrado).
+    `metricas` (las de calcular_metricas sobre el conjunto de prueba) se
+    guardan con la versión para mostrarlas al cargarla.
+    """
+    ruta = ruta or ruta_registro(ruta_modelo)
+    nombre = nombre or nombre_modelo(ruta_modelo)
+    registro = leer_registro(ruta)
+    entrada = registro['modelos'].setdefault(nombre, {'actual': None, 'versiones': {}})
+    if version is None:
+        version = max(map(int, entrada['versiones']), default=0) + 1
+    elif str(version) in entrada['versiones']:
+        raise ValueError(f"La versión {version} del modelo '{nombre}' ya está registrada")
+    entrada['versiones'][str(version)] = {
+        'archivo': os.path.relpath(os.path.abspath(ruta_modelo), os.path.dirname(os.path.abspath(ruta))),
+        'sha256': huella_modelo(ruta_modelo),
+        'sha256_compacto': _hash_compacto(ruta_modelo),
+        'metricas': ({clave: round(float(metricas[clave]), 4) for clave in METRICAS_REGISTRADAS}
+                     if metricas else None),
+        'registrado': datetime.now().isoformat(timespec='seconds'),
+    }
+    entrada['actual'] = int(version)
+    _escribir_registro(registro, ruta)
+    return version
+
+
+def activar(version, nombre=NOMBRE_DEFECTO, ruta=RUTA_REGISTRO):
+    """Marca una versión ya registrada como la actual (por ejemplo, para volver atrás)"""
+    registro = leer_registro(ruta)
+    entrada = registro['modelos'].get(nombre)
+    if entrada is None or str(version) not in entrada['versiones']:
+        raise ValueError(f"No existe la versión {version} del modelo '{nombre}'")
+    entrada['actual'] = int(version)
+    _escribir_registro(registro, ruta)
+
+
+def resolver(nombre=NOMBRE_DEFECTO, version=None, ruta=RUTA_REGISTRO):
+    """VersionModelo con la ruta y el hash esperado; sin versión, la actual"""
+    entrada = leer_registro(ruta)['modelos'].get(nombre)
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    if entrada is None:
+        if version is not None:
+            raise ValueError(f"El modelo '{nombre}' no está registrado")
+        return VersionModelo(nombre, None, os.path.join(directorio, f'{nombre}.pkl'), None)
+
+    version = entrada['actual'] if version is None else int(version)
+    datos = entrada['versiones'].get(str(version))
+    if datos is None:
+        raise ValueError(f"No existe la versión {version} del modelo '{nombre}'")
+    return VersionModelo(nombre, version, os.path.join(directorio, datos['archivo']), datos['sha256'],
+                         datos.get('sha256_compacto'), datos.get('metricas'))
+
+
+def ruta_actual(ruta_modelo=RUTA_MODELO):
+    """Archivo de la versión actual del modelo (el mismo archivo si no está registrado)"""
+    return resolver(nombre_modelo(ruta_modelo), None, ruta_registro(ruta_modelo)).ruta
+
+
+def cargar_version(version, compacto=None):
+    """Carga el modelo de una versión; devuelve (modelo, hash de lo que se cargó)
+
+    De una versión registrada se carga el bosque compacto si se registró
+    con él y, si no, el .pkl: en ambos casos el mismo artefacto cuyo hash se
+    verificó (ValueError si no coincide). Sin registrar se carga lo que
+    cargar_modelo prefiera, sin verificación. La ruta también puede ser un
+    directorio de bosque compacto (por ejemplo, una variante de compresion).
+    Con compacto=False se carga siempre el .pkl, verificado contra su propio
+    hash (los lotes grandes van más rápido con predict de scikit-learn).
+    """
+    if os.path.isdir(version.ruta):
+        huella = huella_modelo(version.ruta)
+        if version.sha256 is not None and huella != version.sha256:
+            raise ValueError(f"El hash de '{version.ruta}' no coincide con la versión {version.version} "
+                             f"registrada de '{version.nombre}'")
+        return BosqueCompacto.cargar(version.ruta), huella
+
+    if version.sha256 is None:
+        modelo = cargar_modelo(version.ruta, compacto=compacto)
+        artefacto = ruta_compacta(version.ruta) if isinstance(modelo, BosqueCompacto) else version.ruta
+        return modelo, huella_modelo(artefacto)
+
+    compacto = (compacto is not False and version.sha256_compacto is not None
+                and os.path.isdir(ruta_compacta(version.ruta)))
+    artefacto = ruta_compacta(version.ruta) if compacto else version.ruta
+    esperado = version.sha256_compacto if compacto else version.sha256
+    huella = huella_modelo(artefacto) if os.path.exists(artefacto) else None
+    if huella != esperado:
+        raise ValueError(f"El hash de '{artefacto}' no coincide con la versión {version.version} "
+                         f"registrada de '{version.nombre}'")
+    return cargar_modelo(version.ruta, compacto=compacto), huella
+
+
+def _estado(ruta):
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+
+class ModeloCargado:
+    """Una versión del modelo con todo lo que necesita para predecir"""
+
+    def __init__(self, version, modelo, codificador, estadisticas, huella, firma=None):
+        self.version = version
+        self.modelo = modelo
+        self.codificador = codificador
+        self.estadisticas = estadisticas
+        self.huella = huella
+        # Las predicciones dependen también de las estadísticas: la caché usa ambas
+        self.huella_cache = huella_valoracion(huella, estadisticas)
+        self.firma = firma
+
+    @classmethod
+    def cargar(cls, version, ruta_estadisticas=RUTA_ESTADISTICAS, ruta_dataset=RUTA_DATASET, firma=None,
+               compacto=None):
+        """Carga el modelo (verificando el hash si está registrado) y sus estadísticas de referencia"""
+        modelo, huella = cargar_version(version, compacto)
+        return cls(version, modelo, CodificadorOneHot.desde_modelo(modelo),
+                   cargar_estadisticas(ruta_estadisticas, ruta_dataset), huella, firma)
+
+    def descripcion(self):
+        """'nombre vN' (o solo el nombre si no está registrado)"""
+        if self.version.version is None:
+            return self.version.nombre
+        return f"{self.version.nombre} v{self.version.version}"
+
+    def descripcion_metricas(self):
+        """'MAPE = x%, R² = y' con las métricas registradas de la versión (None si no tiene)"""
+        metricas = self.version.metricas
+        if not metricas:
+            return None
+        return f"MAPE = {metricas['MAPE (%)']:.2f}%, R² = {metricas['R²']:.4f}"
+
+
+class RegistroModelos:
+    """Modelos cargados del proceso, uno por (nombre, versión), con recarga de la versión actual"""
+
+    def __init__(self, ruta=RUTA_REGISTRO, nombre=NOMBRE_DEFECTO, ruta_estadisticas=RUTA_ESTADISTICAS,
+                 ruta_dataset=RUTA_DATASET, intervalo=INTERVALO_REVISION):
+        self.ruta = ruta
+        self.nombre = nombre
+        self.ruta_estadisticas = ruta_estadisticas
+        self.ruta_dataset = ruta_dataset
+        self.intervalo = intervalo
+        self._cargados = {}
+        # (nombre, versión) -> [última revisión, firma nueva pendiente de confirmar, firma que falló al cargar]
+        self._revisiones = {}
+        self._lock_carga = threading.Lock()
+        self._lock_revision = threading.Lock()
+        self.recargas = 0
+        self.ultimo_error = None
+
+    @classmethod
+    def para_modelo(cls, ruta_modelo=RUTA_MODELO, **kwargs):
+        """Registro del directorio del modelo, con su nombre como el predeterminado"""
+        return cls(ruta=ruta_registro(ruta_modelo), nombre=nombre_modelo(ruta_modelo), **kwargs)
+
+    def _firma(self, version):
+        return (
+            version,
+            _estado(self.ruta),
+            _estado(version.ruta),
+            _estado(os.path.join(ruta_compacta(version.ruta), 'meta.json')),
+            _estado(self.ruta_estadisticas),
+        )
+
+    def _cargar(self, nombre, version):
+        resuelta = resolver(nombre, version, self.ruta)
+        firma = self._firma(resuelta)
+        return ModeloCargado.cargar(resuelta, self.ruta_estadisticas, self.ruta_dataset, firma)
+
+    def actual(self, nombre=None, version=None):
+        """Modelo cargado, compartido por todo el proceso
+
+        Sin versión es la actual del registro y se recarga si se publica otra.
+        """
+        clave = (nombre or self.nombre, version)
+        cargado = self._cargados.get(clave)
+        if cargado is None:
+            with self._lock_carga:
+                cargado = self._cargados.get(clave)
+                if cargado is None:
+                    cargado = self._cargar(*clave)
+                    self._cargados[clave] = cargado
+                    self._revisiones[clave] = [time.monotonic(), None, None]
+            return cargado
+        if version is None and time.monotonic() - self._revisiones[clave][0] >= self.intervalo:
+            return self.revisar(clave[0])
+        return cargado
+
+    def revisar(self, nombre=None):
+        """Recarga la versión actual si su publicación cambió y ya terminó de escribirse"""
+        clave = (nombre or self.nombre, None)
+        cargado = self._cargados.get(clave)
+        if cargado is None:
+            return self.actual(clave[0])
+        # Si otro hilo ya está revisando (o cargando), se sigue con el modelo actual
+        if not self._lock_revision.acquire(blocking=False):
+            return cargado
+        try:
+            revision = self._revisiones[clave]
+            revision[0] = time.monotonic()
+            try:
+                firma = self._firma(resolver(clave[0], None, self.ruta))
+            except (OSError, ValueError, KeyError):
+                # Registro a medio escribir o dañado: se vuelve a mirar en la próxima revisión
+                return cargado
+            if firma == cargado.firma or firma == revision[2]:
+                revision[1] = None
+                return cargado
+            if firma != revision[1]:
+                revision[1] = firma
+                return cargado
+
+            try:
+                nuevo = self._cargar(*clave)
+            except Exception as e:
+                revision[1:] = [None, firma]
+                self.ultimo_error = f"{type(e).__name__}: {e}"
+                contar('recargas_fallidas')
+                return cargado
+            revision[1:] = [None, None]
+            self._cargados[clave] = nuevo
+            self.recargas += 1
+            contar('recargas_modelo')
+            return nuevo
+        finally:
+            self._lock_revision.release()
+
+    def resumen(self):
+        """Versiones cargadas, recargas y último error"""
+        return {
+            'cargados': {f'{nombre}@{version or "actual"}': c.descripcion()
+                         for (nombre, version), c in self._cargados.items()},
+            'recargas': self.recargas,
+            'ultimo_error': self.ultimo_error,
+        }
+
+
+_registros = {}
+_lock_registros = threading.Lock()
+
+
+def obtener_registro(ruta_modelo=RUTA_MODELO):
+    """Registro compartido del proceso para el directorio del modelo"""
+    clave = os.path.abspath(ruta_modelo)
+    with _lock_registros:
+        if clave not in _registros:
+            _registros[clave] = RegistroModelos.para_modelo(ruta_modelo)
+        return _registros[clave]
+
+
+def main(argv=None):
+    """Lista, registra, activa o verifica versiones de los modelos"""
+    parser = argparse.ArgumentParser(description="Registro de versiones de los modelos")
+    parser.add_argument('--registro', default=RUTA_REGISTRO)
+    parser.add_argument('--nombre', default=None,
+                        help=f"Modelo (por defecto '{NOMBRE_DEFECTO}'; al registrar, el nombre del archivo)")
+    parser.add_argument('--registrar', metavar='MODELO', default=None,
+                        help="Registra el archivo como una versión nueva (y la marca como actual)")
+    parser.add_argument('--activar', type=int, metavar='VERSION', default=None,
+                        help="Marca una versión registrada como la actual")
+    parser.add_argument('--verificar', action='store_true', help="Compara el hash de cada versión con su archivo")
+    args = parser.parse_args(argv)
+
+    if args.registrar:
+        nombre = args.nombre or nombre_modelo(args.registrar)
+        version = registrar(args.registrar, nombre, args.registro)
+        print(f" '{nombre}' v{version} registrada en {args.registro}")
+    args.nombre = args.nombre or NOMBRE_DEFECTO
+    if args.activar is not None:
+        try:
+            activar(args.activar, args.nombre, args.registro)
+        except ValueError as e:
+            print(f" ERROR: {e}")
+            return 1
+        print(f" '{args.nombre}' v{args.activar} es ahora la versión actual")
+
+    modelos = leer_registro(args.registro)['modelos']
+    if not modelos:
+        print(f" No hay modelos registrados en {args.registro}")
+        return 0
+
+    directorio = os.path.dirname(os.path.abspath(args.registro))
+    fallidas = 0
+    for nombre, entrada in modelos.items():
+        print(f"\n {nombre}")
+        for version, datos in sorted(entrada['versiones'].items(), key=lambda v: int(v[0])):
+            marca = '*' if int(version) == entrada['actual'] else ' '
+            estado = ''
+            if args.verificar:
+                ruta = os.path.join(directorio, datos['archivo'])
+                ok = os.path.exists(ruta) and huella_modelo(ruta) == datos['sha256']
+                if datos.get('sha256_compacto') is not None and os.path.isdir(ruta_compacta(ruta)):
+                    ok = ok and huella_modelo(ruta_compacta(ruta)) == datos['sha256_compacto']
+                fallidas += not ok
+                estado = ' ✓' if ok else ' ✗ (el archivo cambió o no existe)'
+            metricas = datos.get('metricas')
+            mape = f"  MAPE {metricas['MAPE (%)']:.2f}%" if metricas else ''
+            print(f"  {marca} v{version:<4s} {datos['registrado']}  {datos['archivo']}  "
+                  f"{datos['sha256'][:12]}{mape}{estado}")
+    return 1 if fallidas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""
+Sales-Predictor - Rutas del proyecto
+Ubicaciones por defecto del modelo y los datos, independientes del directorio actual
+"""
+
+import os
+
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUTA_MODELO = os.path.join(RAIZ_PROYECTO, 'models', 'random_forest_model.pkl')
+RUTA_DATASET = os.path.join(RAIZ_PROYECTO, 'data', 'dataset_limpio.csv')
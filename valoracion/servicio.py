@@ -0,0 +1,389 @@
+"""
+Sales-Predictor - Servicio HTTP de predicción
+Mantiene el modelo cargado y agrupa solicitudes simultáneas en una sola llamada a predict
+
+Uso: python -m valoracion.servicio --puerto 8000
+
+Endpoints:
+    POST /valorar   {"area": 85, "habitaciones": 3, "banos": 2, "ciudad": "Medellín",
+                     "tipo_propiedad": "Apartamento"}  (o una lista de propiedades)
+    GET  /metricas  latencia p50/p99, tamaño promedio de los lotes y tiempos por etapa
+    GET  /salud     estado del servicio y versión del modelo
+
+Cada propiedad valorada es {"precio_estimado": ..., "intervalo": [p10, p90]}:
+el intervalo son los cuantiles de las predicciones de los árboles,
+calculados en la misma pasada (no se incluye si el modelo no es un bosque).
+
+El modelo viene del registro (valoracion.registro): al publicarse una
+versión nueva, el siguiente lote ya la usa, sin reiniciar el servicio.
+"""
+
+import argparse
+import json
+import math
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from .bosque import es_bosque
+from .caracteristicas import COLUMNAS_REQUERIDAS
+from .codificador import CUANTILES_INTERVALO, CodificadorOneHot
+from .estadisticas import RUTA_ESTADISTICAS
+from .instrumentacion import resumen as resumen_etapas
+from .lote import columnas_intervalo, valorar_lote
+from .registro import RegistroModelos
+from .rutas import RUTA_MODELO, RUTA_DATASET
+
+
+VENTANA_MS = 5
+MAX_LOTE = 512
+TIMEOUT_SEGUNDOS = 30
+
+# Rangos aceptados, los mismos que valida el chatbot (coordenadas dentro de Colombia)
+RANGOS_NUMERICOS = {
+    'area': (10, 2000),
+    'habitaciones': (0, 20),
+    'banos': (0, 10),
+    'latitud': (-4.3, 13.5),
+    'longitud': (-79.0, -66.8),
+}
+
+
+class MetricasLatencia:
+    """Latencias recientes (ventana acotada) y contadores del servicio"""
+
+    def __init__(self, max_muestras=10000):
+        self._latencias = deque(maxlen=max_muestras)
+        self._lock = threading.Lock()
+        self.solicitudes = 0
+        self.errores = 0
+        self.lotes = 0
+        self.filas = 0
+
+    def registrar_solicitud(self, segundos, error=False):
+        with self._lock:
+            self._latencias.append(segundos)
+            self.solicitudes += 1
+            if error:
+                self.errores += 1
+
+    def registrar_lote(self, filas):
+        with self._lock:
+            self.lotes += 1
+            self.filas += filas
+
+    def resumen(self):
+        """Resumen serializable a JSON"""
+        with self._lock:
+            latencias = np.array(self._latencias, dtype=np.float64) * 1000
+            resumen = {
+                'solicitudes': self.solicitudes,
+                'errores': self.errores,
+                'lotes': self.lotes,
+                'filas_predichas': self.filas,
+                'tamano_lote_promedio': round(self.filas / self.lotes, 2) if self.lotes else 0.0,
+            }
+        if len(latencias):
+            p50, p99 = np.percentile(latencias, [50, 99])
+            resumen['latencia_p50_ms'] = round(float(p50), 3)
+            resumen['latencia_p99_ms'] = round(float(p99), 3)
+        else:
+            resumen['latencia_p50_ms'] = None
+            resumen['latencia_p99_ms'] = None
+        return resumen
+
+
+class AgrupadorPredicciones:
+    """Agrupa propiedades que llegan dentro de una ventana corta y las predice juntas
+
+    Cada solicitud encola su lista de propiedades con un Future. Un hilo
+    dedicado toma la primera, espera como máximo `ventana_ms` para juntar más
+    (hasta `max_lote` filas) y resuelve todas con una sola llamada a predict.
+    Con un registro, cada lote usa la versión actual del modelo.
+    """
+
+    def __init__(self, modelo, estadisticas, codificador=None,
+                 ventana_ms=VENTANA_MS, max_lote=MAX_LOTE, metricas=None, registro=None,
+                 cuantiles=CUANTILES_INTERVALO):
+        self.modelo = modelo
+        self.estadisticas = estadisticas
+        self.codificador = codificador or CodificadorOneHot.desde_modelo(modelo)
+        self.registro = registro
+        self.cargado = None
+        self.ventana = ventana_ms / 1000
+        self.max_lote = max_lote
+        self.cuantiles = cuantiles
+        self.metricas = metricas or MetricasLatencia()
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._ciclo, name='agrupador-predicciones', daemon=True)
+        self._hilo.start()
+
+    def enviar(self, propiedades):
+        """Encola una lista de propiedades y devuelve un Future con un dict por propiedad
+
+        Cada dict tiene precio_estimado y, si el modelo es un bosque, intervalo
+        (los límites de los cuantiles del agrupador).
+        """
+        futuro = Future()
+        self._cola.put((propiedades, futuro))
+        return futuro
+
+    @classmethod
+    def desde_registro(cls, registro, version=None, **kwargs):
+        """Agrupador que toma el modelo del registro (y sus versiones nuevas, si no se fija una)"""
+        cargado = registro.actual(version=version)
+        agrupador = cls(cargado.modelo, cargado.estadisticas, cargado.codificador,
+                        registro=registro if version is None else None, **kwargs)
+        agrupador.cargado = cargado
+        return agrupador
+
+    def predecir(self, propiedades, timeout=TIMEOUT_SEGUNDOS):
+        """Versión bloqueante de enviar()"""
+        return self.enviar(propiedades).result(timeout=timeout)
+
+    def _ciclo(self):
+        while True:
+            pendientes = [self._cola.get()]
+            filas = len(pendientes[0][0])
+            limite = time.perf_counter() + self.ventana
+
+            while filas < self.max_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                pendientes.append(item)
+                filas += len(item[0])
+
+            self._resolver_seguro(pendientes)
+
+    def _valorar(self, propiedades):
+        """Un dict por propiedad con precio_estimado (e intervalo si el modelo es un bosque)"""
+        # Se revisa en cada lote: la versión nueva del modelo puede no ser un bosque
+        cuantiles = self.cuantiles if es_bosque(self.modelo) else None
+        valorado = valorar_lote(pd.DataFrame(propiedades), self.modelo,
+                                self.codificador, self.estadisticas, cuantiles)
+        resultados = [{'precio_estimado': precio} for precio in valorado['precio_estimado'].tolist()]
+        if cuantiles:
+            limites = valorado[columnas_intervalo(cuantiles)].to_numpy().tolist()
+            for resultado, intervalo in zip(resultados, limites):
+                resultado['intervalo'] = intervalo
+        return resultados
+
+    def _resolver(self, pendientes):
+        propiedades = [p for lista, _ in pendientes for p in lista]
+        if self.registro is not None:
+            # Solo este hilo predice: cambiar de versión entre lotes no corta ninguna solicitud
+            cargado = self.registro.actual()
+            if cargado.modelo is not self.modelo:
+                self.modelo, self.codificador = cargado.modelo, cargado.codificador
+                self.estadisticas = cargado.estadisticas
+                self.cargado = cargado
+        try:
+            resultados = self._valorar(propiedades)
+        except Exception:
+            if len(pendientes) == 1:
+                raise
+            # Una solicitud con datos que el modelo no acepta no debe tumbar a las demás del
+            # lote: se resuelve cada una por separado y solo esa recibe el error
+            for pendiente in pendientes:
+                self._resolver_seguro([pendiente])
+            return
+
+        self.metricas.registrar_lote(len(propiedades))
+        inicio = 0
+        for lista, futuro in pendientes:
+            futuro.set_result(resultados[inicio:inicio + len(lista)])
+            inicio += len(lista)
+
+    def _resolver_seguro(self, pendientes):
+        try:
+            self._resolver(pendientes)
+        except Exception as e:
+            for _, futuro in pendientes:
+                futuro.set_exception(e)
+
+
+class PropiedadInvalida(ValueError):
+    """Propiedad rechazada con 400; `sugerencias` son nombres parecidos al que no se reconoció"""
+
+    def __init__(self, mensaje, sugerencias=None):
+        super().__init__(mensaje)
+        self.sugerencias = sugerencias or []
+
+
+def validar_propiedad(propiedad, estadisticas=None):
+    """Valida una propiedad recibida por JSON y normaliza sus campos
+
+    Todo lo que no pasa de aquí se rechaza con 400 antes de entrar a un lote
+    compartido con otras solicitudes. Con `estadisticas`, la ciudad y el tipo
+    se resuelven con el mismo índice de nombres que el chatbot ('medellin' ->
+    'Medellín'); un nombre que no se reconoce se rechaza con sugerencias en
+    lugar de valorarse con los valores por defecto.
+    """
+    if not isinstance(propiedad, dict):
+        raise ValueError("Cada propiedad debe ser un objeto JSON")
+
+    faltantes = [col for col in COLUMNAS_REQUERIDAS if propiedad.get(col) is None]
+    if faltantes:
+        raise ValueError(f"Faltan campos requeridos: {', '.join(faltantes)}")
+
+    limpia = dict(propiedad)
+    for col in ('ciudad', 'tipo_propiedad', 'departamento'):
+        if col in limpia and limpia[col] is not None and (not isinstance(limpia[col], str)
+                                                          or not limpia[col].strip()):
+            raise ValueError(f"El campo '{col}' debe ser un texto no vacío")
+
+    for col, (minimo, maximo) in RANGOS_NUMERICOS.items():
+        valor = limpia.get(col)
+        if valor is None:
+            continue
+        try:
+            # bool es int en Python, pero true/false no es un valor válido
+            if isinstance(valor, bool):
+                raise TypeError
+            valor = float(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"El campo '{col}' debe ser numérico")
+        if not math.isfinite(valor) or not minimo <= valor <= maximo:
+            raise ValueError(f"El campo '{col}' debe estar entre {minimo:g} y {maximo:g}")
+        limpia[col] = valor
+
+    if estadisticas is not None:
+        for col, etiqueta, indice in (('ciudad', 'la ciudad', estadisticas.indice_ciudades),
+                                      ('tipo_propiedad', 'el tipo de propiedad', estadisticas.indice_tipos)):
+            resuelto = indice.resolver(limpia[col])
+            if resuelto is None:
+                raise PropiedadInvalida(f"No se reconoce {etiqueta} '{limpia[col]}'",
+                                        indice.sugerencias(limpia[col]))
+            limpia[col] = resuelto
+    return limpia
+
+
+class _ManejadorValoracion(BaseHTTPRequestHandler):
+    """Manejador HTTP; el agrupador se asigna en la clase creada por crear_servidor()"""
+
+    agrupador = None
+
+    def log_message(self, formato, *args):
+        # Silenciar el log por solicitud; las métricas están en /metricas
+        pass
+
+    def _responder(self, codigo, cuerpo):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path == '/metricas':
+            self._responder(200, {**self.agrupador.metricas.resumen(), 'etapas': resumen_etapas()})
+        elif self.path == '/salud':
+            cargado = self.agrupador.cargado
+            self._responder(200, {'estado': 'ok', 'modelo': cargado.descripcion() if cargado else None,
+                                  'recargas': self.agrupador.registro.recargas if self.agrupador.registro else 0})
+        else:
+            self._responder(404, {'error': 'Ruta no encontrada'})
+
+    def do_POST(self):
+        if self.path != '/valorar':
+            self._responder(404, {'error': 'Ruta no encontrada'})
+            return
+
+        inicio = time.perf_counter()
+        try:
+            longitud = int(self.headers.get('Content-Length', 0))
+            cuerpo = json.loads(self.rfile.read(longitud) or b'null')
+            es_lista = isinstance(cuerpo, list)
+            estadisticas = self.agrupador.estadisticas
+            propiedades = [validar_propiedad(p, estadisticas) for p in (cuerpo if es_lista else [cuerpo])]
+        except ValueError as e:
+            self.agrupador.metricas.registrar_solicitud(time.perf_counter() - inicio, error=True)
+            error = {'error': str(e)}
+            if getattr(e, 'sugerencias', None):
+                error['sugerencias'] = e.sugerencias
+            self._responder(400, error)
+            return
+
+        try:
+            resultado = self.agrupador.predecir(propiedades) if propiedades else []
+        except Exception as e:
+            self.agrupador.metricas.registrar_solicitud(time.perf_counter() - inicio, error=True)
+            self._responder(500, {'error': f"Error al realizar la predicción: {e}"})
+            return
+
+        self.agrupador.metricas.registrar_solicitud(time.perf_counter() - inicio)
+        self._responder(200, resultado if es_lista else resultado[0])
+
+
+class _ServidorValoracion(ThreadingHTTPServer):
+    """Servidor multihilo con cola de conexiones amplia para ráfagas de solicitudes"""
+
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def crear_servidor(agrupador, host='127.0.0.1', puerto=8000):
+    """Crea el servidor HTTP (multihilo) asociado a un agrupador"""
+    manejador = type('ManejadorValoracion', (_ManejadorValoracion,), {'agrupador': agrupador})
+    return _ServidorValoracion((host, puerto), manejador)
+
+
+def main(argv=None):
+    """Punto de entrada del servicio"""
+    parser = argparse.ArgumentParser(description="Servicio HTTP de valoración inmobiliaria")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8000)
+    parser.add_argument('--modelo', default=RUTA_MODELO, help="Ruta del modelo entrenado")
+    parser.add_argument('--version', type=int, default=None,
+                        help="Versión registrada fija (por defecto, la actual, que se recarga al publicarse otra)")
+    parser.add_argument('--estadisticas', default=RUTA_ESTADISTICAS,
+                        help="Estadísticas de referencia precalculadas (JSON)")
+    parser.add_argument('--dataset', default=RUTA_DATASET,
+                        help="Dataset limpio, si no existen las estadísticas precalculadas")
+    parser.add_argument('--ventana-ms', type=float, default=VENTANA_MS,
+                        help="Tiempo máximo de espera para agrupar solicitudes")
+    parser.add_argument('--max-lote', type=int, default=MAX_LOTE,
+                        help="Máximo de propiedades por llamada a predict")
+    args = parser.parse_args(argv)
+
+    print("⏳ Cargando modelo entrenado...")
+    registro = RegistroModelos.para_modelo(args.modelo, ruta_estadisticas=args.estadisticas,
+                                           ruta_dataset=args.dataset)
+    try:
+        agrupador = AgrupadorPredicciones.desde_registro(registro, args.version,
+                                                         ventana_ms=args.ventana_ms, max_lote=args.max_lote)
+    except FileNotFoundError:
+        print(f" ERROR: No se encontró el modelo en '{args.modelo}'")
+        return 1
+    except ValueError as e:
+        print(f" ERROR: {e}")
+        return 1
+
+    servidor = crear_servidor(agrupador, args.host, args.puerto)
+    print(f" Modelo: {agrupador.cargado.descripcion()}")
+    print(f" Servicio escuchando en http://{args.host}:{args.puerto} (POST /valorar, GET /metricas)")
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n Servicio detenido")
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
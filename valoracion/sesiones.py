@@ -0,0 +1,103 @@
+"""
+Sales-Predictor - Sesiones de chat concurrentes
+Miles de conversaciones en un solo proceso, con un modelo cargado y las predicciones agrupadas
+
+    sesiones = SesionesChat(await asyncio.to_thread(MotorAsincrono))
+    await sesiones.motor.preparar()                       # dataset e índices, fuera del bucle
+    tipo, mensaje = await sesiones.responder('usuario-1', '85')
+    guardado = sesiones.exportar('usuario-1')             # dict JSON (p. ej. para Redis)
+
+Todo el estado de una sesión es un EstadoConversacion (valoracion.conversacion).
+Validar respuestas y armar mensajes es rápido y corre en el bucle de
+eventos; revisar la versión del modelo (que puede recargarlo) y la caché
+(que puede estar en disco) corre en un hilo. La predicción se envía al
+AgrupadorPredicciones del servicio HTTP: junta las de todas las sesiones
+que llegan dentro de una ventana corta y las resuelve con una sola
+llamada a predict en su propio hilo.
+Los mensajes de una misma sesión se procesan en orden; sesiones distintas
+avanzan a la vez.
+"""
+
+import asyncio
+
+from .conversacion import PREDICCION_PENDIENTE, EstadoConversacion, MotorConversacion
+from .servicio import MAX_LOTE, VENTANA_MS, AgrupadorPredicciones
+
+
+class MotorAsincrono:
+    """MotorConversacion con las predicciones de todas las conversaciones agrupadas
+
+    Crearlo carga el modelo (bloquea): hacerlo antes de iniciar el bucle o
+    con asyncio.to_thread.
+    """
+
+    def __init__(self, motor=None, ventana_ms=VENTANA_MS, max_lote=MAX_LOTE):
+        self.motor = motor or MotorConversacion()
+        # Mismo registro que el motor: un solo modelo en memoria y las versiones nuevas se toman al vuelo
+        self.agrupador = AgrupadorPredicciones.desde_registro(self.motor.registro,
+                                                              ventana_ms=ventana_ms, max_lote=max_lote)
+
+    async def preparar(self):
+        """Carga el dataset y los índices de comparables en un hilo, antes de la primera valoración"""
+        await asyncio.to_thread(self.motor.cargar_indices)
+
+    def bienvenida(self):
+        return self.motor.get_mensaje_bienvenida()
+
+    async def procesar(self, estado, respuesta):
+        """Procesa la respuesta según el paso de `estado`; la predicción se agrupa con las de otras sesiones"""
+        tipo, mensaje = self.motor.avanzar(estado, respuesta)
+        if tipo != PREDICCION_PENDIENTE:
+            return tipo, mensaje
+
+        try:
+            # Puede recargar el modelo (hash incluido) o leer la caché en disco: fuera del bucle
+            guardada = await asyncio.to_thread(self.motor.preparar_prediccion, estado)
+            if guardada is None:
+                resultado = (await asyncio.wrap_future(self.agrupador.enviar([dict(estado.data)])))[0]
+                prediccion, intervalo = resultado['precio_estimado'], resultado.get('intervalo')
+                await asyncio.to_thread(self.motor.cache.guardar, estado.data, prediccion, intervalo)
+            else:
+                prediccion, intervalo = guardada
+            return "success", self.motor.completar_prediccion(estado, prediccion, intervalo)
+        except Exception as e:
+            return "error", f"❌ Error al realizar la predicción: {str(e)}\n\nPor favor intenta de nuevo."
+
+
+class SesionesChat:
+    """Estados de conversación por identificador de sesión sobre un MotorAsincrono compartido"""
+
+    def __init__(self, motor):
+        self.motor = motor
+        self._estados = {}
+        self._locks = {}
+
+    def __len__(self):
+        return len(self._estados)
+
+    def iniciar(self, sesion):
+        """Crea (o reinicia) la sesión y devuelve el mensaje de bienvenida"""
+        self._estados[sesion] = EstadoConversacion()
+        return self.motor.bienvenida()
+
+    async def responder(self, sesion, respuesta):
+        """Procesa un mensaje de la sesión (la crea si no existe); devuelve (tipo, mensaje)"""
+        if sesion not in self._estados:
+            self._estados[sesion] = EstadoConversacion()
+        lock = self._locks.setdefault(sesion, asyncio.Lock())
+        async with lock:
+            return await self.motor.procesar(self._estados[sesion], respuesta)
+
+    def exportar(self, sesion):
+        """Estado de la sesión como dict serializable a JSON"""
+        return self._estados[sesion].a_dict()
+
+    def importar(self, sesion, datos):
+        """Restaura una sesión guardada con exportar()"""
+        self._estados[sesion] = EstadoConversacion.desde_dict(datos)
+
+    def cerrar(self, sesion):
+        """Olvida la sesión; devuelve su último estado o None"""
+        self._locks.pop(sesion, None)
+        estado = self._estados.pop(sesion, None)
+        return estado.a_dict() if estado is not None else None